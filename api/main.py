@@ -11,9 +11,10 @@ import logging
 import os
 import subprocess
 import sys
+import threading
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Request
@@ -287,13 +288,17 @@ async def get_status():
     model_auc = report.get("test_metrics", {}).get("auc_score")
     model_version = report.get("version", report.get("_source_file", "").replace("_report.json", ""))
 
-    # Last scan timestamp from Redis
+    # Last scan timestamp + pre-open warm-up state from Redis
     last_scan = None
     scanner_healthy = False
+    warmup = None
     if redis_pool:
         try:
             last_scan = await redis_pool.get("tradesage:last_scan")
             scanner_healthy = last_scan is not None
+            raw_warmup = await redis_pool.get("tradesage:warmup")
+            if raw_warmup:
+                warmup = json.loads(raw_warmup)
         except Exception:
             pass
 
@@ -303,6 +308,8 @@ async def get_status():
         "model_auc": model_auc,
         "model_version": model_version or "tradesage_10y",
         "scanner_healthy": scanner_healthy,
+        "scanner_ready": bool(warmup and warmup.get("status") == "ready"),
+        "warmup": warmup,
         "server_time": now.isoformat(),
     }
 
@@ -324,6 +331,33 @@ async def trigger_scan():
 
 
 
+# ══════════════════════════════════════════════════════════════
+#  GET /api/scan/history, /api/scan/diff — per-cycle snapshots
+# ══════════════════════════════════════════════════════════════
+
+@app.get("/api/scan/history")
+async def get_scan_history(limit: int = 20):
+    """Return metadata for the most recent scan cycles."""
+    from src.core.scan_history import ScanHistory
+    return ScanHistory().list_cycles(limit=limit)
+
+
+@app.get("/api/scan/diff")
+async def get_scan_diff(cycle_id: Optional[str] = None, prev_cycle_id: Optional[str] = None,
+                        thresholds: str = "0.55,0.75"):
+    """Symbols whose probability crossed a threshold between two cycles (latest vs previous by default)."""
+    from src.core.scan_history import ScanHistory
+    try:
+        levels = tuple(float(t) for t in thresholds.split(",") if t.strip())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="thresholds must be comma-separated floats")
+    return {
+        "cycle_id": cycle_id,
+        "prev_cycle_id": prev_cycle_id,
+        "changes": ScanHistory().diff(cycle_id, prev_cycle_id, thresholds=levels),
+    }
+
+
 # ══════════════════════════════════════════════════════════════
 #  GET /api/model/metrics — full model report for dashboard
 # ══════════════════════════════════════════════════════════════
@@ -377,6 +411,78 @@ async def get_model_metrics():
     }
 
 
+# ══════════════════════════════════════════════════════════════
+#  POST /api/predict — on-demand scores from the shared tree artifact
+# ══════════════════════════════════════════════════════════════
+
+PREDICT_MODEL_PATH = PROJECT_ROOT / "models" / "current.pkl"
+MAX_PREDICT_ROWS = 1000
+
+# (signature, TreeModel). The artifact is memory-mapped read-only, so every uvicorn
+# worker (and a scanner in trees mode) shares the same physical pages.
+_predict_model: Optional[tuple] = None
+_predict_rejected_sig = None  # last published bundle whose artifact failed verification
+_predict_lock = threading.Lock()
+
+
+class PredictRequest(BaseModel):
+    rows: List[Dict[str, Optional[float]]]
+
+
+def _get_predict_model():
+    """The published model's tree artifact; reloaded when a new manifest is published."""
+    global _predict_model, _predict_rejected_sig
+    from src.core.model_publish import read_manifest, verify_bundle
+    from src.core.tree_runtime import TreeModel, tree_artifact_path
+
+    artifact = tree_artifact_path(PREDICT_MODEL_PATH)
+    manifest = read_manifest(PREDICT_MODEL_PATH)
+    try:
+        sig = manifest.get("published_at") if manifest else artifact.stat().st_mtime
+    except OSError:
+        sig = None
+    if _predict_model is not None and _predict_model[0] == sig:
+        return _predict_model
+
+    with _predict_lock:
+        if _predict_model is not None and _predict_model[0] == sig:
+            return _predict_model  # another request loaded it meanwhile
+        # Only the tree artifact is read here, so only its checksum is checked
+        if sig is None or sig == _predict_rejected_sig or (
+                manifest is not None and not verify_bundle(PREDICT_MODEL_PATH, manifest, names=[artifact.name])):
+            if sig is not None and sig != _predict_rejected_sig:
+                _predict_rejected_sig = sig
+                logger.warning(f"Predict model {sig} failed verification; not loaded")
+            if _predict_model is not None:
+                return _predict_model  # mid-publish or rejected: keep serving the previous model
+            raise HTTPException(status_code=503, detail="No published model artifact available")
+        _predict_model = (sig, TreeModel(artifact))
+        logger.info(f"Predict model loaded (published {sig})")
+        return _predict_model
+
+
+@app.post("/api/predict")
+def predict(req: PredictRequest):
+    """
+    Calibrated probabilities for feature rows ({feature: value}; missing features = 0).
+    A plain def: FastAPI runs it in its threadpool, off the event loop.
+    """
+    if not req.rows:
+        raise HTTPException(status_code=400, detail="rows must not be empty")
+    if len(req.rows) > MAX_PREDICT_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PREDICT_ROWS} rows per request")
+
+    sig, model = _get_predict_model()
+    probs = model.predict_proba(model.records_matrix(req.rows))
+    known = set(model.feature_names)
+    return {
+        "model_published_at": sig,
+        "features": len(model.feature_names),
+        "unknown_features": sorted({k for row in req.rows for k in row} - known),
+        "probabilities": [round(float(p), 6) for p in probs],
+    }
+
+
 # ══════════════════════════════════════════════════════════════
 #  GET /api/portfolio — active positions from ledger
 # ══════════════════════════════════════════════════════════════
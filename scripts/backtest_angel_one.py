@@ -15,6 +15,7 @@ sys.path.append(PROJECT_ROOT)
 
 from src.core.feature_engineering import FeatureEngineer
 from src.core.model_training import TradingModelTrainer
+from src.core.portfolio_backtest import PortfolioBacktester, build_panel
 
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
@@ -43,6 +44,25 @@ STT_GST_PCT = 0.001          # 0.1% STT + GST + stamp duty
 SLIPPAGE_PCT = 0.0005        # 0.05% slippage
 TOTAL_COST_PCT = BROKERAGE_PCT + STT_GST_PCT + SLIPPAGE_PCT  # 0.18% per trade
 
+# Bars that touch both SL and TP: resolve from intraday candles (FIVE_MINUTE / FIFTEEN_MINUTE)
+# instead of assuming the stop. Empty = pessimistic SL-first.
+INTRABAR_INTERVAL = os.getenv('BACKTEST_INTRABAR_INTERVAL', '').strip().upper()
+
+
+def make_intrabar_resolver():
+    """IntrabarResolver fetching missing sessions from Angel One, or cache-only without credentials."""
+    from src.core.intrabar import IntrabarResolver
+    fetch_fn = None
+    try:
+        from src.angel.angel_one_api import AngelOneAPI
+        from src.angel.angel_data_fetcher import AngelDataFetcher
+        fetcher = AngelDataFetcher(AngelOneAPI(str(Path(PROJECT_ROOT) / 'config' / 'angel_config.json')),
+                                   cache_dir=str(DATA_DIR))
+        fetch_fn = lambda symbol, day: fetcher.fetch_session_candles(symbol, day, interval=INTRABAR_INTERVAL)
+    except Exception as e:
+        logger.warning(f"  Intrabar resolver: Angel One unavailable ({e}) — using cached candles only")
+    return IntrabarResolver(fetch_fn=fetch_fn, interval=INTRABAR_INTERVAL)
+
 def run_backtest():
     logger.info("="*60)
     logger.info(" TRADESAGE HISTORICAL PNL BACKTESTER")
@@ -108,8 +128,12 @@ def run_backtest():
     logger.info(f"Loaded {len(data_files)} stocks for backtesting...")
     if nifty_df is not None:
         logger.info("  Market context: ENABLED")
+    resolver = make_intrabar_resolver() if INTRABAR_INTERVAL else None
+    if resolver is not None:
+        logger.info(f"  Intrabar SL/TP resolution: {INTRABAR_INTERVAL}")
     processed = 0
     trades = []
+    panel_frames = {}  # per-symbol OHLCV + model output for the portfolio simulation
 
     for file in data_files:
         symbol = file.stem.replace('_daily', '')
@@ -140,8 +164,12 @@ def run_backtest():
 
             # Align df_features to X_bt index (prepare_training_data may drop rows)
             df_sim = df_features.loc[X_bt.index]
+            panel_frames[symbol] = df_sim[[c for c in ['open', 'high', 'low', 'close', 'volume', 'atr']
+                                           if c in df_sim.columns]].assign(
+                probability=probabilities, prediction=predictions)
 
             # --- vectorised trade simulation ---
+            opens  = df_sim['open'].values
             closes = df_sim['close'].values
             highs  = df_sim['high'].values
             lows   = df_sim['low'].values
@@ -154,6 +182,9 @@ def run_backtest():
                     exit_price, reason = 0.0, ''
                     if lows[i] <= sl:
                         exit_price, reason = sl, 'Stop Loss'
+                        if (resolver is not None and highs[i] >= tp
+                                and resolver.resolve(symbol, dates[i], sl, tp, opens[i]) == 'take_profit'):
+                            exit_price, reason = tp, 'Take Profit'
                     elif highs[i] >= tp:
                         exit_price, reason = tp, 'Take Profit'
                     elif (dates[i] - entry_date).days >= MAX_HOLD_DAYS:
@@ -193,7 +224,18 @@ def run_backtest():
         processed += 1
         if processed % 100 == 0:
             logger.info(f"  Processed {processed} stocks, {len(trades)} trades so far...")
-            
+
+    if resolver is not None:
+        resolver.flush()
+        r = resolver.summary()
+        logger.info(f"  Intrabar: {r['ambiguous']} ambiguous bars -> {r['reclassified']} reclassified as TP "
+                    f"({r['reclassified_pct']}%), {r['resolved_open']} by the open, "
+                    f"{r['resolved_intraday']} from candles, {r['unresolved']} unresolved (kept SL), "
+                    f"{r['fetches']} fetches")
+
+    if panel_frames:
+        run_portfolio_simulation(panel_frames)
+
     if not trades:
         logger.warning(f"[!] No trades were initiated across {len(data_files)} stocks during this backtest!")
         return
@@ -278,5 +320,28 @@ def run_backtest():
     trades_df.to_csv(ledger_path, index=False)
     logger.info(f"Saved full chronological trade ledger to: {ledger_path}")
 
+def run_portfolio_simulation(panel_frames):
+    """
+    Replay the live scanner's rules (shared ₹50k, top-10 ranking, prob >= 0.75,
+    ₹1000 risk / ₹10k cap sizing, fees) over every symbol's predictions at once.
+    """
+    logger.info("\n" + "="*60)
+    logger.info(" PORTFOLIO SIMULATION (live scanner rules)")
+    logger.info("="*60)
+    panel = build_panel(panel_frames)
+    logger.info(f"  Panel: {len(panel['dates'])} days x {len(panel['symbols'])} symbols")
+
+    sim = PortfolioBacktester()
+    results = sim.run(panel)
+    if not sim.trades:
+        logger.warning("  No trades met the live auto-trade rules.")
+        return results
+
+    os.makedirs(Path(PROJECT_ROOT) / 'data', exist_ok=True)
+    ledger_path = Path(PROJECT_ROOT) / 'data' / 'backtest_portfolio_ledger.csv'
+    sim.get_trades_df().to_csv(ledger_path, index=False)
+    logger.info(f"Saved portfolio trade ledger to: {ledger_path}")
+    return results
+
 if __name__ == "__main__":
     run_backtest()
@@ -0,0 +1,150 @@
+"""
+TradeSage Backtest Parameter Sweep
+Runs features + model inference once (cached under data/sweep_cache/), then
+evaluates a grid or an Optuna search of entry/exit parameters in parallel.
+
+    python scripts/sweep_backtest.py                      # default portfolio grid
+    python scripts/sweep_backtest.py --trials 200         # Optuna search instead
+    python scripts/sweep_backtest.py --grid '{"sl_atr_mult": [2, 3], "max_hold_days": [3, 5, 10]}'
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from src.core.feature_engineering import FeatureEngineer
+from src.core.model_training import TradingModelTrainer
+from src.core.param_sweep import ParameterSweep, PredictionCache, build_prediction_frames, expand_grid
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(PROJECT_ROOT) / 'data_cache_angel'
+MODEL_PATH = Path(PROJECT_ROOT) / 'models' / 'tradesage_angel.pkl'
+OUTPUT_DIR = Path(PROJECT_ROOT) / 'data'
+
+SKIP_KEYWORDS = ['BEES', 'IETF', 'BETA', 'CASE', 'ETF', 'NIFTY', 'SENSEX',
+                 'GOLD', 'SILVER', 'LIQUID', 'GILT', 'BOND']
+
+# Default searches around the live rules (SL 3.0 / TP 3.5 ATR, 5-day hold, prob >= 0.75)
+DEFAULT_GRIDS = {
+    'portfolio': {
+        'sl_atr_mult': [2.0, 2.5, 3.0, 3.5],
+        'tp_atr_mult': [2.5, 3.5, 4.5],
+        'max_hold_days': [3, 5, 10],
+        'trade_prob': [0.65, 0.70, 0.75, 0.80],
+    },
+    'single': {
+        'stop_loss_atr_multiplier': [1.5, 2.0, 3.0],
+        'take_profit_pct': [0.04, 0.06, 0.08],
+        'position_size': [0.05, 0.10, 0.20],
+        'min_confidence': [0.6, 0.65, 0.7, 0.75],
+    },
+}
+DEFAULT_SPACES = {
+    'portfolio': {'sl_atr_mult': (1.5, 4.0), 'tp_atr_mult': (2.0, 6.0),
+                  'max_hold_days': (2, 15), 'trade_prob': (0.6, 0.9)},
+    'single': {'stop_loss_atr_multiplier': (1.0, 4.0), 'take_profit_pct': (0.02, 0.12),
+               'position_size': (0.05, 0.25), 'min_confidence': (0.55, 0.9)},
+}
+
+
+def _read_csv(path):
+    df = pd.read_csv(path, index_col='timestamp', parse_dates=True)
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+    df.columns = [c.lower().strip() for c in df.columns]
+    return df
+
+
+def load_prediction_frames(model_path, data_dir, rebuild=False):
+    """Per-symbol OHLCV + model output, from the sweep cache when model and data are unchanged."""
+    data_files = [
+        f for f in data_dir.glob('*_daily.csv')
+        if f.stat().st_size > 5000 and not any(k in f.name.upper() for k in SKIP_KEYWORDS)
+    ]
+    if not data_files:
+        raise FileNotFoundError(f"No CSV data found in {data_dir}")
+    nifty_file = data_dir / 'NSEI_daily.csv'
+    fingerprint_files = data_files + ([nifty_file] if nifty_file.exists() else [])
+
+    cache = PredictionCache()
+    key = cache.fingerprint(model_path, fingerprint_files)
+
+    def build():
+        trainer = TradingModelTrainer()
+        trainer.load_model(str(model_path))
+        engineer = FeatureEngineer()
+        nifty_df = _read_csv(nifty_file) if nifty_file.exists() else None
+        if nifty_df is not None and len(nifty_df) < 200:
+            nifty_df = None
+        logger.info(f"Computing features + predictions for {len(data_files)} stocks...")
+        stock_data = {f.stem.replace('_daily', ''): _read_csv(f) for f in data_files}
+        return build_prediction_frames(trainer, engineer, stock_data, index_df=nifty_df)
+
+    if rebuild:
+        frames = build()
+        cache.save(key, frames)
+        return frames
+    return cache.get_or_build(key, build)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TradeSage backtest parameter sweep')
+    parser.add_argument('--engine', choices=['portfolio', 'single'], default='portfolio',
+                        help='portfolio: live scanner rules on shared capital; single: per-symbol Backtester')
+    parser.add_argument('--grid', type=str, default=None, help='JSON {param: [values]} (default: built-in grid)')
+    parser.add_argument('--trials', type=int, default=0, help='Run an Optuna search with N trials instead of a grid')
+    parser.add_argument('--objective', type=str, default='sharpe_ratio', help='Metric maximized by --trials')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--stop-drawdown', type=float, default=None,
+                        help='Abandon portfolio runs once drawdown reaches this %% (e.g. -25)')
+    parser.add_argument('--model-path', type=str, default=str(MODEL_PATH))
+    parser.add_argument('--data-dir', type=str, default=str(DATA_DIR))
+    parser.add_argument('--rebuild-cache', action='store_true', help='Recompute predictions even if cached')
+    args = parser.parse_args()
+
+    model_path = Path(args.model_path)
+    if not model_path.exists():
+        logger.error(f"[ERROR] Model not found: {model_path}")
+        return
+
+    frames = load_prediction_frames(model_path, Path(args.data_dir), rebuild=args.rebuild_cache)
+    if not frames:
+        logger.error("[ERROR] No symbols produced predictions.")
+        return
+
+    sweep = ParameterSweep(frames, engine=args.engine, workers=args.workers,
+                           stop_drawdown_pct=args.stop_drawdown)
+    if args.trials:
+        results = sweep.optimize(DEFAULT_SPACES[args.engine], n_trials=args.trials, objective=args.objective)
+    else:
+        space = json.loads(args.grid) if args.grid else DEFAULT_GRIDS[args.engine]
+        results = sweep.run(expand_grid(space))
+
+    front = ParameterSweep.pareto_front(results)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    results_path = OUTPUT_DIR / f'sweep_results_{args.engine}.csv'
+    front_path = OUTPUT_DIR / f'sweep_pareto_{args.engine}.csv'
+    results.sort_values('sharpe_ratio', ascending=False).to_csv(results_path, index=False)
+    front.to_csv(front_path, index=False)
+
+    logger.info("\n" + "=" * 60)
+    logger.info(f" PARETO FRONT — return vs drawdown ({len(front)} of {len(results)} runs)")
+    logger.info("=" * 60)
+    logger.info(front.to_string(index=False))
+    logger.info(f"\nSaved results to {results_path}")
+    logger.info(f"Saved Pareto front to {front_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,8 @@ Usage:
     python scripts/train.py --source angel                    # Fetch live from Angel One
     python scripts/train.py --source cache --ensemble         # Enable ensemble
     python scripts/train.py --forward-days 5 --threshold 0.04 # Custom config
+    python scripts/train.py --source cache --walk-forward     # Rolling-window out-of-sample backtest
+    python scripts/train.py --incremental models/current.pkl  # Append trees for the newest days
 """
 
 import argparse
@@ -23,6 +25,7 @@ import numpy as np
 from pathlib import Path
 from datetime import datetime
 from tqdm import tqdm
+from sklearn.metrics import roc_auc_score
 
 # Ensure UTF-8 output on Windows
 if sys.platform == 'win32':
@@ -36,15 +39,32 @@ sys.path.insert(0, str(PROJECT_ROOT))
 
 from src.core.feature_engineering import FeatureEngineer
 from src.core.model_training import TradingModelTrainer
+from src.core.training_data import TrainingData
+from src.core.feature_shards import DEFAULT_SHARD_DIR, FeatureShardWriter
 
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
+# --incremental exits with this code when the base model has drifted (or cannot be
+# continued) so the caller can fall back to a full retrain
+FULL_RETRAIN_EXIT_CODE = 3
+INCREMENTAL_WARMUP_ROWS = 300  # history before the cutoff needed by the longest indicators (252d)
+
 
 # ──────────────────────────────────────────────────────────────────────
 #  DATA LOADING
 # ──────────────────────────────────────────────────────────────────────
 
+def score_auc(trainer, data):
+    """AUC of the trainer's calibrated probabilities on a TrainingData window (None if undefined)."""
+    if len(data) == 0:
+        return None
+    try:
+        return roc_auc_score(data.y, trainer.predict_proba_calibrated(data))
+    except ValueError:
+        return None  # single class in the window — no signal either way
+
+
 def load_from_cache(cache_dir, max_stocks=None):
     """Load stock data from cached CSV files."""
     cache_path = Path(cache_dir)
@@ -149,6 +169,42 @@ def main():
                         help='Parallel workers for Angel One fetching')
     parser.add_argument('--stock-list', default=None,
                         help='Path to JSON file with stock symbols (for --source angel)')
+    parser.add_argument('--memmap', action='store_true',
+                        help='Back the training matrix by data/training_buffer.npy instead of RAM')
+    parser.add_argument('--tune-workers', type=int, default=1,
+                        help='Parallel Optuna trial processes (cores are split between them)')
+    parser.add_argument('--tune-pruner', choices=['median', 'hyperband', 'none'], default='median',
+                        help='Optuna pruner for unpromising trials (default: median)')
+    parser.add_argument('--tune-storage', default=None,
+                        help='Optuna storage URL (e.g. sqlite:///data/optuna_studies.db); '
+                             'persists studies and warm-starts from the previous one')
+    parser.add_argument('--incremental', default=None, metavar='BASE_MODEL',
+                        help='Continue boosting BASE_MODEL on the days since its training cutoff '
+                             'instead of training from scratch')
+    parser.add_argument('--inc-new-trees', type=int, default=100,
+                        help='Trees appended per model in --incremental mode (default: 100)')
+    parser.add_argument('--inc-holdout-days', type=int, default=40,
+                        help='Newest trading days held out as val / test in --incremental mode (default: 40)')
+    parser.add_argument('--drift-auc-drop', type=float, default=0.03,
+                        help='--incremental: base model AUC drop on the newest days that forces a full retrain')
+    parser.add_argument('--out-of-core', action='store_true',
+                        help='Stream the training rows to on-disk shards and train from them '
+                             '(uses full history; --max-rows-per-stock is ignored)')
+    parser.add_argument('--walk-forward', action='store_true',
+                        help='Retrain on rolling windows and backtest the out-of-sample predictions '
+                             '(uses full history; --max-rows-per-stock is ignored)')
+    parser.add_argument('--wf-train-days', type=int, default=504,
+                        help='Walk-forward training window in trading days (default: 504 = ~2y)')
+    parser.add_argument('--wf-test-days', type=int, default=63,
+                        help='Walk-forward test window / step in trading days (default: 63 = ~1 quarter)')
+    parser.add_argument('--wf-expanding', action='store_true',
+                        help='Anchor every training window at the start of history')
+    parser.add_argument('--wf-workers', type=int, default=None,
+                        help='Walk-forward worker processes (default: all cores, capped by --wf-memory-gb)')
+    parser.add_argument('--wf-memory-gb', type=float, default=2.0,
+                        help='Memory budget for concurrent walk-forward windows (default: 2.0)')
+    parser.add_argument('--wf-refit-every', type=int, default=4,
+                        help='Full refit every N walk-forward windows; the rest warm-start (default: 4)')
     args = parser.parse_args()
 
     start_time = time.time()
@@ -199,6 +255,19 @@ def main():
     else:
         logger.info("  Market context: DISABLED")
 
+    if args.walk_forward:
+        run_walk_forward(args, stock_data, nifty_df)
+        return
+
+    trainer = TradingModelTrainer()
+    if args.incremental:
+        trainer.load_model(args.incremental)
+        if not trainer.trained_until:
+            logger.error("Base model has no recorded training cutoff — full retrain required")
+            sys.exit(FULL_RETRAIN_EXIT_CODE)
+        cutoff = pd.Timestamp(trainer.trained_until)
+        logger.info(f"  Incremental: continuing {args.incremental} (trained until {cutoff.date()})")
+
     # ── Step 3: Feature engineering ──
     logger.info(f"\n🔧 Step 3: Feature engineering for {len(stock_data)} stocks...")
     engineer = FeatureEngineer()
@@ -206,9 +275,20 @@ def main():
     all_data = []
     failed_count = 0
 
+    # Out-of-core: training rows go straight to disk shards; only val/test rows stay in RAM
+    shard_writer = None
+    if args.out_of_core:
+        dates = np.unique(np.concatenate([df.index.to_numpy(dtype='datetime64[ns]') for df in stock_data.values()]))
+        val_start = pd.Timestamp(dates[int(len(dates) * 0.90)])
+        test_start = pd.Timestamp(dates[int(len(dates) * 0.95)])
+        shard_dir = DEFAULT_SHARD_DIR / 'train'
+
     for symbol, df in tqdm(stock_data.items(), desc="Engineering features"):
         try:
-            if args.max_rows_per_stock and len(df) > args.max_rows_per_stock:
+            if args.incremental:
+                # Only rows after the cutoff are new; keep enough history before it for the indicators
+                df = df.iloc[max(0, df.index.searchsorted(cutoff) - INCREMENTAL_WARMUP_ROWS):]
+            elif not args.out_of_core and args.max_rows_per_stock and len(df) > args.max_rows_per_stock:
                 df = df.iloc[-args.max_rows_per_stock:]
 
             df_feat = engineer.add_technical_indicators(df, index_df=nifty_df)
@@ -219,6 +299,11 @@ def main():
                 max_drawdown=args.max_drawdown,
             )
             df_final['symbol'] = symbol
+            if args.out_of_core:
+                if shard_writer is None:
+                    shard_writer = FeatureShardWriter(shard_dir, engineer.feature_columns(df_final.columns))
+                shard_writer.add_frame(df_final[df_final.index < val_start])
+                df_final = df_final[df_final.index >= val_start]
             all_data.append(df_final)
         except Exception as e:
             failed_count += 1
@@ -232,41 +317,111 @@ def main():
         sys.exit(1)
 
     # ── Step 4: Combine and split ──
-    logger.info(f"\n📊 Step 4: Walk-forward date split (90 / 5 / 5)...")
-    combined = pd.concat(all_data).sort_index()
-    X, y, feature_names = engineer.prepare_training_data(combined)
-
-    dates = X.index.unique().sort_values()
-    n_dates = len(dates)
-    val_start = dates[int(n_dates * 0.90)]
-    test_start = dates[int(n_dates * 0.95)]
-
-    train_mask = X.index < val_start
-    val_mask = (X.index >= val_start) & (X.index < test_start)
-    test_mask = X.index >= test_start
+    if args.incremental:
+        logger.info(f"\n📊 Step 4: Incremental split (new rows / {args.inc_holdout_days}-day val + test holdout)...")
+    else:
+        logger.info(f"\n📊 Step 4: Walk-forward date split (90 / 5 / 5)...")
+    # One date-sorted float32 buffer; per-symbol frames are released as they are copied in
+    n_stocks = len(all_data)
+    data = TrainingData.from_frames(
+        all_data, engineer.feature_columns, consume=True,
+        memmap_path=PROJECT_ROOT / 'data' / 'training_buffer.npy' if args.memmap else None,
+    )
+    del all_data
+    feature_names = data.feature_names
+
+    if args.incremental:
+        dates = np.unique(data.dates)
+        val_start = pd.Timestamp(dates[-args.inc_holdout_days])
+        test_start = pd.Timestamp(dates[-(args.inc_holdout_days // 2)])
+        # Rows up to the cutoff were already learned; the holdout stays unseen by the trees
+        _, train_data, val_data, test_data = data.split_dates(cutoff + pd.Timedelta(days=1),
+                                                               val_start, test_start)
+        n_train, train_positive_rate = len(train_data), float(train_data.y.mean()) if len(train_data) else 0.0
+        if not n_train:
+            logger.error(f"No new training rows between {cutoff.date()} and {val_start.date()}")
+            sys.exit(1)
+    elif args.out_of_core:
+        if shard_writer is None:
+            logger.error("No valid data after feature engineering!")
+            sys.exit(1)
+        manifest = shard_writer.close()
+        if not manifest['rows']:
+            logger.error(f"No training rows before {val_start.date()}")
+            sys.exit(1)
+        val_data, test_data = data.split_dates(test_start)
+        n_train, train_positive_rate = manifest['rows'], manifest['positives'] / max(manifest['rows'], 1)
+    else:
+        dates = np.unique(data.dates)
+        n_dates = len(dates)
+        val_start = pd.Timestamp(dates[int(n_dates * 0.90)])
+        test_start = pd.Timestamp(dates[int(n_dates * 0.95)])
 
-    X_train, y_train = X[train_mask], y[train_mask]
-    X_val, y_val = X[val_mask], y[val_mask]
-    X_test, y_test = X[test_mask], y[test_mask]
+        # Date-sorted rows: each split is a view over the same buffer
+        train_data, val_data, test_data = data.split_dates(val_start, test_start)
+        n_train, train_positive_rate = len(train_data), float(train_data.y.mean())
 
     logger.info(f"  Features: {len(feature_names)}")
-    logger.info(f"  Train: {len(X_train):,} samples (up to {val_start.date()})")
-    logger.info(f"  Val:   {len(X_val):,} samples ({val_start.date()} → {test_start.date()})")
-    logger.info(f"  Test:  {len(X_test):,} samples ({test_start.date()} → end)")
-    logger.info(f"  Positive rate (train): {y_train.mean() * 100:.1f}%")
+    logger.info(f"  Train: {n_train:,} samples (up to {val_start.date()})")
+    if args.out_of_core:
+        logger.info(f"         {len(manifest['shards'])} shards in {shard_dir}")
+    logger.info(f"  Val:   {len(val_data):,} samples ({val_start.date()} → {test_start.date()})")
+    logger.info(f"  Test:  {len(test_data):,} samples ({test_start.date()} → end)")
+    logger.info(f"  Positive rate (train): {train_positive_rate * 100:.1f}%")
 
     # ── Step 5: Train ──
     logger.info(f"\n🤖 Step 5: Training model...")
-    trainer = TradingModelTrainer()
-    trainer.train_model(X_train, y_train, X_val, y_val, use_ensemble=args.ensemble)
+    trainer.tune_workers = args.tune_workers
+    trainer.tune_pruner = args.tune_pruner
+    trainer.tune_storage = args.tune_storage
+    if args.incremental:
+        # Drift check: the base model re-scored now on its saved reference window (the held-out
+        # test days of the run that produced it) vs on the newest (test) days — same model,
+        # same feature pipeline, both windows unseen by its trees
+        ref, ref_data, base_auc = trainer.reference_window, None, None
+        if ref:
+            # Clip to rows before this run's holdout so the two windows never overlap
+            ref_start = pd.Timestamp(ref['start'])
+            ref_end = min(pd.Timestamp(ref['end']) + pd.Timedelta(days=1), val_start)
+            if ref_start < ref_end:
+                ref_data = data.split_dates(ref_start, ref_end)[1]
+                base_auc = score_auc(trainer, ref_data)
+        current_auc = score_auc(trainer, test_data)
+        if base_auc is None or current_auc is None:
+            logger.warning("  Drift check skipped: base model has no reference window in the loaded "
+                           "history, or a window holds a single class")
+        else:
+            logger.info(f"  Base model AUC: reference {ref['start']} → {ref['end']} {base_auc:.4f} "
+                        f"(pos {ref_data.y.mean() * 100:.1f}%)  →  newest days {current_auc:.4f} "
+                        f"(pos {test_data.y.mean() * 100:.1f}%)")
+            if base_auc - current_auc > args.drift_auc_drop:
+                logger.warning(f"  Drift: AUC dropped {base_auc - current_auc:.4f} "
+                               f"(> {args.drift_auc_drop}) — full retrain required")
+                sys.exit(FULL_RETRAIN_EXIT_CODE)
+        try:
+            trainer.update_model(train_data, None, val_data, None, new_trees=args.inc_new_trees)
+        except ValueError as e:
+            logger.error(f"  {e}")
+            sys.exit(FULL_RETRAIN_EXIT_CODE)
+    elif args.out_of_core:
+        trainer.train_external(shard_dir, val_data, use_ensemble=args.ensemble)
+    else:
+        trainer.train_model(train_data, None, val_data, None, use_ensemble=args.ensemble)
 
     # ── Step 6: Evaluate ──
     logger.info(f"\n📈 Step 6: Evaluation...")
     logger.info(f"\n--- VALIDATION SET ---")
-    val_metrics = trainer.evaluate_model(X_val, y_val)
+    val_metrics = trainer.evaluate_model(val_data)
 
     logger.info(f"\n--- TEST SET (held-out, never seen during training) ---")
-    test_metrics = trainer.evaluate_model(X_test, y_test)
+    test_metrics = trainer.evaluate_model(test_data)
+
+    # Reference window for the next --incremental drift check: these test days, after trained_until
+    trainer.reference_window = {
+        'start': str(test_start.date()),
+        'end': str(pd.Timestamp(test_data.dates[-1]).date()) if len(test_data) else str(test_start.date()),
+        'auc': float(test_metrics.get('auc_score', 0.0)),
+    }
 
     # ── Step 7: Feature importance ──
     logger.info(f"\n🔍 Step 7: Feature importance...")
@@ -289,18 +444,20 @@ def main():
 
     report = {
         'training_date': datetime.now().isoformat(),
-        'version': 'unified-v1',
+        'version': 'incremental-v1' if args.incremental else 'unified-v1',
+        'base_model': args.incremental,
         'elapsed_seconds': round(elapsed, 1),
         'data_source': args.source,
-        'stocks_trained': len(all_data),
-        'total_samples': len(X),
-        'train_samples': len(X_train),
-        'val_samples': len(X_val),
-        'test_samples': len(X_test),
+        'stocks_trained': n_stocks,
+        'total_samples': n_train + len(val_data) + len(test_data),
+        'train_samples': n_train,
+        'val_samples': len(val_data),
+        'test_samples': len(test_data),
         'features': len(feature_names),
-        'ensemble_mode': args.ensemble,
+        'ensemble_mode': bool(trainer.ensemble_models) if args.incremental else args.ensemble,
         'market_context': nifty_df is not None,
         'split': {
+            'train_from': str((cutoff + pd.Timedelta(days=1)).date()) if args.incremental else None,
             'train_until': str(val_start.date()),
             'val_until': str(test_start.date()),
             'test_from': str(test_start.date()),
@@ -361,5 +518,39 @@ def main():
     logger.info("=" * 80)
 
 
+def run_walk_forward(args, stock_data, nifty_df):
+    """Rolling-window retrain → out-of-sample predictions → portfolio backtest."""
+    from src.core.walk_forward import WalkForward, build_feature_table
+
+    logger.info(f"\n🔧 Step 3: Feature table for {len(stock_data)} stocks (cached)...")
+    table_path = build_feature_table(
+        FeatureEngineer(), stock_data, index_df=nifty_df,
+        forward_days=args.forward_days, gain_threshold=args.threshold, max_drawdown=args.max_drawdown,
+    )
+
+    logger.info(f"\n🔁 Step 4: Walk-forward ({args.wf_train_days}d train / {args.wf_test_days}d test)...")
+    wf = WalkForward(table_path, train_days=args.wf_train_days, test_days=args.wf_test_days,
+                     expanding=args.wf_expanding, refit_every=args.wf_refit_every,
+                     workers=args.wf_workers, memory_budget_gb=args.wf_memory_gb)
+    result = wf.run()
+
+    out_dir = PROJECT_ROOT / 'data'
+    os.makedirs(out_dir, exist_ok=True)
+    result['windows'].to_csv(out_dir / 'walk_forward_windows.csv', index=False)
+    result['equity'].to_csv(out_dir / 'walk_forward_equity.csv')
+    result['trades'].to_csv(out_dir / 'walk_forward_trades.csv', index=False)
+
+    m = result['metrics']
+    logger.info("\n" + "=" * 80)
+    logger.info("  WALK-FORWARD COMPLETE")
+    logger.info("=" * 80)
+    logger.info(f"  Windows:   {m['walk_forward']['windows']}  (OOS from {m['walk_forward']['oos_start']})")
+    logger.info(f"  Mean AUC:  {m['walk_forward']['mean_auc']:.4f}")
+    logger.info(f"  Return:    {m.get('total_return_pct', 0):.2f}%   Max DD: {m.get('max_drawdown_pct', 0):.2f}%   "
+                f"Sharpe: {m.get('sharpe_ratio', 0):.2f}")
+    logger.info(f"  Saved windows / equity / trades to {out_dir}/walk_forward_*.csv")
+    logger.info("=" * 80)
+
+
 if __name__ == '__main__':
     main()
@@ -18,7 +18,6 @@ import argparse
 import json
 import logging
 import os
-import shutil
 import subprocess
 import sys
 from datetime import datetime
@@ -34,6 +33,8 @@ if sys.platform == 'win32':
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+from src.core.model_publish import atomic_copy, publish_model
+
 # ── Paths ──
 MODEL_PATH     = PROJECT_ROOT / 'models' / 'tradesage_10y.pkl'
 REPORT_PATH    = PROJECT_ROOT / 'models' / 'tradesage_10y_report.json'
@@ -212,13 +213,13 @@ def main():
         # DEPLOY
         logger.info(f"\n  ✅ AUC {test_auc:.4f} >= 0.70 — DEPLOYING")
 
-        # Copy model to current.pkl (Windows doesn't support symlinks easily)
-        shutil.copy2(str(MODEL_PATH), str(CURRENT_MODEL))
-        logger.info(f"  Copied {MODEL_PATH.name} → {CURRENT_MODEL.name}")
+        # Publish to current.pkl: atomic copy + manifest (the scanner hot-swaps on it)
+        publish_model(MODEL_PATH, CURRENT_MODEL)
+        logger.info(f"  Published {MODEL_PATH.name} → {CURRENT_MODEL.name}")
 
         # Copy report to current_report.json so the API/frontend always loads fresh data
         CURRENT_REPORT = PROJECT_ROOT / 'models' / 'current_report.json'
-        shutil.copy2(str(REPORT_PATH), str(CURRENT_REPORT))
+        atomic_copy(REPORT_PATH, CURRENT_REPORT)
         logger.info(f"  Copied {REPORT_PATH.name} → {CURRENT_REPORT.name}")
 
         msg = (
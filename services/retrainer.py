@@ -4,7 +4,9 @@ TradeSage Daily Retrainer
 Runs daily at 16:30 IST (after market close), Mon–Fri.
 1. Fetches today's OHLCV for all stocks via Angel One
 2. Appends to existing data_cache_angel/ CSVs
-3. Runs training pipeline
+3. Runs training pipeline — incremental (appends trees to models/current.pkl for the
+   newest days) on most nights; a full retrain every RETRAIN_FULL_EVERY_DAYS days, when
+   there is no current model, or when the incremental run detects drift
 4. Compares new AUC vs current — hot-swaps model via symlink if improved
 5. Sends Telegram notification on success/degradation
 
@@ -46,6 +48,16 @@ logger = logging.getLogger("tradesage.retrainer")
 
 IST = timezone(timedelta(hours=5, minutes=30))
 
+# Optuna studies persist here so each night's tuning warm-starts from the previous best trials
+TUNE_STORAGE = f"sqlite:///{PROJECT_ROOT / 'data' / 'optuna_studies.db'}"
+TUNE_WORKERS = int(os.getenv("RETRAIN_TUNE_WORKERS", "2"))
+
+# Incremental vs full retrain
+RETRAIN_MODE = os.getenv("RETRAIN_MODE", "incremental")  # incremental | full
+FULL_RETRAIN_EVERY_DAYS = int(os.getenv("RETRAIN_FULL_EVERY_DAYS", "7"))
+FULL_RETRAIN_EXIT_CODE = 3  # scripts/train.py --incremental: drift detected / cannot continue
+STATE_PATH = PROJECT_ROOT / "models" / "retrain_state.json"
+
 
 # ══════════════════════════════════════════════════════════════
 #  TELEGRAM HELPER
@@ -183,13 +195,33 @@ def fetch_todays_data():
 #  RUN TRAINING
 # ══════════════════════════════════════════════════════════════
 
-def run_training() -> dict:
+def load_retrain_state() -> dict:
+    try:
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def full_retrain_due() -> bool:
+    """Full retrain when forced, without a current model, or on the periodic schedule."""
+    if RETRAIN_MODE == "full" or not (PROJECT_ROOT / "models" / "current.pkl").exists():
+        return True
+    last_full = load_retrain_state().get("last_full")
+    if not last_full:
+        return True
+    age = datetime.now(IST).date() - datetime.fromisoformat(last_full).date()
+    return age.days >= FULL_RETRAIN_EVERY_DAYS
+
+
+def run_training(incremental: bool = False) -> dict:
     """Execute the training pipeline and return the report."""
     timestamp = datetime.now(IST).strftime("%Y%m%d_%H%M")
-    model_filename = f"tradesage_retrain_{timestamp}.pkl"
+    kind = "incremental" if incremental else "retrain"
+    model_filename = f"tradesage_{kind}_{timestamp}.pkl"
     model_path = str(PROJECT_ROOT / "models" / model_filename)
 
-    logger.info(f"🤖 Starting training → {model_filename}")
+    logger.info(f"🤖 Starting {'incremental' if incremental else 'full'} training → {model_filename}")
 
     train_cmd = [
         sys.executable,
@@ -199,8 +231,15 @@ def run_training() -> dict:
         "--forward-days", "5",
         "--threshold", "0.02",
         "--max-drawdown", "-0.99",
-        "--ensemble",
     ]
+    if incremental:
+        train_cmd += ["--incremental", str(PROJECT_ROOT / "models" / "current.pkl")]
+    else:
+        train_cmd += [
+            "--ensemble",
+            "--tune-storage", TUNE_STORAGE,
+            "--tune-workers", str(TUNE_WORKERS),
+        ]
 
     try:
         result = subprocess.run(
@@ -211,6 +250,11 @@ def run_training() -> dict:
             timeout=7200,  # 2 hours max
         )
 
+        if incremental and result.returncode == FULL_RETRAIN_EXIT_CODE:
+            logger.warning("Incremental retrain refused (drift or feature change) — running full retrain")
+            send_telegram("⚠️ Retrain: drift detected — falling back to full retrain")
+            return run_training(incremental=False)
+
         if result.returncode != 0:
             logger.error(f"Training failed (exit code {result.returncode})")
             logger.error(f"STDERR: {result.stderr[-500:]}")
@@ -225,6 +269,9 @@ def run_training() -> dict:
             with open(report_path) as f:
                 report = json.load(f)
             report["model_path"] = model_path
+            if not incremental:
+                with open(STATE_PATH, "w") as f:
+                    json.dump({"last_full": datetime.now(IST).isoformat()}, f)
             return report
         else:
             logger.error("No training report generated")
@@ -245,27 +292,24 @@ def run_training() -> dict:
 # ══════════════════════════════════════════════════════════════
 
 def hot_swap_model(new_model_path: str):
-    """Update the models/current.pkl to point to the new model (copy, not symlink)."""
+    """Publish the new model as models/current.pkl (atomic copy + checksummed manifest)."""
     current_link = PROJECT_ROOT / "models" / "current.pkl"
 
     try:
-        import shutil
-
-        # Remove existing file/symlink
-        if current_link.exists() or current_link.is_symlink():
-            current_link.unlink()
+        from src.core.model_publish import atomic_copy, publish_model
 
-        # Always copy — symlinks break inside Docker containers
-        shutil.copy2(new_model_path, str(current_link))
-        logger.info(f"Model copied to {current_link}")
+        # Pickle + tree artifact are renamed into place, the manifest last; the scanner
+        # watches the manifest and loads the new bundle into a standby slot
+        publish_model(new_model_path, current_link)
+        logger.info(f"Model published to {current_link}")
 
         # Also copy the report to all standard locations
         report_src = new_model_path.replace(".pkl", "_report.json")
         if os.path.exists(report_src):
             # Copy to current_report.json (hot-swap target)
-            shutil.copy2(report_src, str(PROJECT_ROOT / "models" / "current_report.json"))
+            atomic_copy(report_src, PROJECT_ROOT / "models" / "current_report.json")
             # Copy to tradesage_10y_report.json (primary report the API + frontend read)
-            shutil.copy2(report_src, str(PROJECT_ROOT / "models" / "tradesage_10y_report.json"))
+            atomic_copy(report_src, PROJECT_ROOT / "models" / "tradesage_10y_report.json")
             logger.info(f"Reports updated: current_report.json + tradesage_10y_report.json")
 
     except Exception as e:
@@ -297,7 +341,7 @@ def retrain_pipeline():
         return
 
     # 3. Run training
-    report = run_training()
+    report = run_training(incremental=not full_retrain_due())
     if report is None:
         return
 
@@ -349,6 +393,9 @@ def retrain_pipeline():
                 report_path = new_model_path.replace(".pkl", "_report.json")
                 if os.path.exists(report_path):
                     os.remove(report_path)
+                artifact_path = new_model_path.replace(".pkl", ".trees.npz")
+                if os.path.exists(artifact_path):
+                    os.remove(artifact_path)
                 logger.info("Rejected model files cleaned up")
         except Exception:
             pass
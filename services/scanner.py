@@ -20,6 +20,7 @@ import os
 import sys
 import time
 import threading
+from collections import deque
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
@@ -34,7 +35,16 @@ from dotenv import load_dotenv
 load_dotenv(PROJECT_ROOT / ".env")
 
 from src.core.feature_engineering import FeatureEngineer
-from src.core.model_training import TradingModelTrainer
+from src.core.model_publish import read_manifest, verify_bundle
+from src.core.scan_history import ScanHistory, KEY_FEATURES
+
+# "trees" scores with the pure-NumPy artifact saved next to each model (<model>.trees.npz)
+# and never imports xgboost / lightgbm / catboost / sklearn; "native" uses the full trainer
+MODEL_RUNTIME = os.getenv("SCANNER_MODEL_RUNTIME", "native").strip().lower()
+if MODEL_RUNTIME == "trees":
+    from src.core.tree_runtime import TreeModel, tree_artifact_path
+else:
+    from src.core.model_training import TradingModelTrainer
 
 # ── Logging ──
 LOG_DIR = PROJECT_ROOT / "logs"
@@ -179,8 +189,12 @@ class AngelSessionManager:
                 cfg = str(alt_config if alt_config.exists() else config_path)
 
                 logger.info(f"🔑 Connecting to Angel One... (config: {Path(cfg).name})")
+                old_fetcher = self.fetcher
                 self.api = AngelOneAPI(cfg)
                 self.fetcher = AngelDataFetcher(self.api)
+                # Keep warmed caches across reconnects
+                if old_fetcher is not None:
+                    self.fetcher.adopt_cache(old_fetcher)
                 self._last_connect = datetime.now(IST)
                 self._consecutive_failures = 0
                 logger.info("✅ Angel One API connected successfully")
@@ -235,14 +249,100 @@ class AngelSessionManager:
 #  MODEL LOADER (supports hot-swap via symlink)
 # ══════════════════════════════════════════════════════════════
 
+class FeatureState:
+    """
+    Last engineered feature rows per symbol, keyed by the raw bars they were computed from.
+    The pre-open warm-up fills it with yesterday's state and every scan refreshes it; a
+    symbol whose bars are unchanged since (no trade yet, LTP equal to the cached close,
+    repeated force scans) reuses its rows instead of re-running the feature pipeline.
+    Only the last ROWS rows per symbol are kept.
+    """
+
+    ROWS = 10  # generate_signal needs >= 10 engineered rows
+    BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+    def __init__(self):
+        self._state = {}  # {symbol: (index key, last bar, engineered rows)}
+
+    @classmethod
+    def _key(cls, df: pd.DataFrame):
+        """Index shape plus the last bar's OHLCV (compared NaN-safe: a NaN volume still matches)."""
+        last = df.reindex(columns=cls.BAR_COLUMNS).iloc[-1].to_numpy(dtype=np.float64)
+        return (len(df), df.index[0], df.index[-1]), last
+
+    def get(self, symbol: str, df: pd.DataFrame):
+        hit = self._state.get(symbol)
+        if hit is None:
+            return None
+        index_key, last = self._key(df)
+        if hit[0] != index_key or not np.array_equal(hit[1], last, equal_nan=True):
+            return None
+        return hit[2].copy(deep=False)
+
+    def put(self, symbol: str, df: pd.DataFrame, features: pd.DataFrame):
+        self._state[symbol] = (*self._key(df), features.iloc[-self.ROWS:].copy())
+
+    def __len__(self):
+        return len(self._state)
+
+
 class ModelManager:
-    """Manages model loading with hot-swap support via symlink."""
+    """
+    Live + standby model slots. A newly published model (its manifest changed — or the
+    file mtime, for models published without one) is checksum-verified and loaded into
+    a standby slot by a background thread, validated on a canary batch of recent live
+    feature rows, and swapped in by check_reload() between scan cycles (a pointer flip).
+    The scan loop never blocks on a load and never sees a half-loaded model.
+    """
+
+    CANARY_ROWS = 64
+    FUND_HISTORY_TTL = 3600  # seconds between bulk reloads of point-in-time fundamentals
 
     def __init__(self):
-        self.trainer = TradingModelTrainer()
+        self.trainer = self._new_model()
         self.engineer = FeatureEngineer()
+        self.feature_state = FeatureState()
         self.model_path = None
-        self._last_mtime = 0
+        self._loaded_sig = None    # manifest published_at (or mtime) of the live model
+        self._rejected_sig = None  # last bundle that failed verification / validation
+        self._standby = None       # (model, signature), validated, waiting for the flip
+        self._loader = None
+        self._canary = deque(maxlen=self.CANARY_ROWS)
+        self._fund_history_at = 0.0
+
+    @staticmethod
+    def _new_model():
+        return TreeModel() if MODEL_RUNTIME == "trees" else TradingModelTrainer()
+
+    @staticmethod
+    def _signature(path):
+        manifest = read_manifest(path)
+        if manifest is not None:
+            return manifest.get("published_at"), manifest
+        return os.path.getmtime(path), None
+
+    def refresh_fundamentals_history(self, symbols, force: bool = False):
+        """
+        Bulk-load point-in-time fundamentals for the watchlist into the feature engine,
+        at most once per FUND_HISTORY_TTL, so generate_signal never queries the store per symbol.
+        """
+        if not force and time.time() - self._fund_history_at < self.FUND_HISTORY_TTL:
+            return
+        try:
+            from src.core.fundamentals_store import FundamentalsStore
+            t0 = time.time()
+            history = FundamentalsStore().get_history_frames(list(symbols))
+        except Exception as e:
+            logger.warning(f"Fundamentals history preload failed: {e}")
+            return
+        self.engineer.set_fundamentals_history(history)
+        self._fund_history_at = time.time()
+        logger.info(f"Fundamentals history loaded for {len(history)} symbols in {time.time() - t0:.1f}s")
+
+    def note_canary(self, rows: pd.DataFrame):
+        """Remember live feature rows; new models are validated on them before going live."""
+        for i in range(len(rows)):
+            self._canary.append(rows.iloc[[i]])
 
     def load(self, model_path: str = None):
         """Load model, preferring symlink models/current.pkl."""
@@ -256,13 +356,20 @@ class ModelManager:
         if model_path:
             search_paths.insert(0, Path(model_path))
 
-        logger.info("🔍 Searching for model file...")
+        logger.info(f"🔍 Searching for model file ({MODEL_RUNTIME} runtime)...")
         for p in search_paths:
             logger.info(f"  Checking: {p} — {'EXISTS' if p.exists() else 'not found'}")
+            if p.exists() and MODEL_RUNTIME == "trees" and not tree_artifact_path(p).exists():
+                logger.info(f"  Skipping {p.name}: no tree artifact ({tree_artifact_path(p).name})")
+                continue
             if p.exists():
+                sig, manifest = self._signature(p)
+                if manifest is not None and not verify_bundle(p, manifest):
+                    logger.warning(f"  Skipping {p.name}: checksum does not match its manifest")
+                    continue
                 self.model_path = p
                 self.trainer.load_model(str(p))
-                self._last_mtime = os.path.getmtime(p)
+                self._loaded_sig = sig
                 logger.info(f"✅ Model loaded: {p} ({p.stat().st_size / 1024 / 1024:.1f} MB)")
                 return True
 
@@ -270,50 +377,225 @@ class ModelManager:
         return False
 
     def check_reload(self) -> bool:
-        """Check if model file has been updated (hot-swap)."""
+        """
+        Called between scan cycles: flip to a validated standby model if one is ready,
+        otherwise start loading a newly published model in the background.
+        """
+        if self._standby is not None:
+            model, sig = self._standby
+            self._standby = None
+            self.trainer = model  # pointer flip — the next scan cycle uses the new model
+            self._loaded_sig = sig
+            logger.info("✅ Model hot-swap complete (standby → live)")
+            send_telegram("🔄 Model hot-swapped in scanner (no restart)")
+            return True
+
         if not self.model_path or not self.model_path.exists():
             return False
-        current_mtime = os.path.getmtime(self.model_path)
-        if current_mtime > self._last_mtime:
-            logger.info("🔄 Model file changed — hot-swapping...")
-            try:
-                self.trainer.load_model(str(self.model_path))
-                self._last_mtime = current_mtime
-                logger.info("✅ Model hot-swap complete")
-                send_telegram("🔄 Model hot-swapped in scanner (no restart)")
-                return True
-            except Exception as e:
-                logger.error(f"Hot-swap failed: {e}")
+        if self._loader is not None and self._loader.is_alive():
+            return False
+        try:
+            sig, manifest = self._signature(self.model_path)
+        except OSError:
+            return False
+        if sig not in (self._loaded_sig, self._rejected_sig):
+            logger.info("🔄 New model published — loading standby in background...")
+            self._loader = threading.Thread(
+                target=self._prepare_standby, args=(sig, manifest, list(self._canary)),
+                name="model-standby", daemon=True,
+            )
+            self._loader.start()
         return False
 
+    def _prepare_standby(self, sig, manifest, canary_rows):
+        try:
+            if manifest is not None and not verify_bundle(self.model_path, manifest):
+                raise ValueError("checksum does not match the manifest")
+            model = self._new_model()
+            model.load_model(str(self.model_path))
+            self._validate(model, canary_rows)
+            self._standby = (model, sig)
+            logger.info("Standby model validated — swapping in at the next cycle boundary")
+        except Exception as e:
+            self._rejected_sig = sig
+            logger.error(f"Standby model rejected: {e}")
+            send_telegram(f"⚠️ New model rejected by scanner (keeping current): {e}")
+
+    @staticmethod
+    def _validate(model, canary_rows):
+        """Canary batch: the model must score recent live rows with finite probabilities in [0, 1]."""
+        names = list(model.feature_names or [])
+        if not names:
+            raise ValueError("model has no feature names")
+        if canary_rows:
+            canary = pd.concat(canary_rows)
+            missing = set(names) - set(canary.columns)
+            if len(missing) > 0.1 * len(names):
+                raise ValueError(f"{len(missing)} / {len(names)} model features are not produced by the feature pipeline")
+        else:
+            canary = pd.DataFrame(np.zeros((1, len(names))), columns=names)
+        _, probs = model.predict(canary)
+        probs = np.asarray(probs, dtype=float)
+        if probs.shape != (len(canary),) or not np.isfinite(probs).all() or probs.min() < 0 or probs.max() > 1:
+            raise ValueError("canary predictions are malformed or out of range")
+
+
+# ══════════════════════════════════════════════════════════════
+#  PRE-OPEN WARM-UP
+# ══════════════════════════════════════════════════════════════
+
+class ScannerWarmup:
+    """
+    Runs once before each market open (next_market_open() minus lead_minutes):
+    connects Angel One, loads the instrument master and daily CSV caches into memory,
+    computes yesterday's feature state for every symbol (kept in model_mgr.feature_state
+    for the first scan to reuse), warms the boosters with one
+    batch prediction, and pre-fetches fundamentals for the most likely candidates.
+    Readiness is published to Redis (tradesage:warmup) for /api/status.
+    """
+
+    def __init__(self, lead_minutes: float = 20, top_candidates: int = 30):
+        self.lead_minutes = lead_minutes
+        self.top_candidates = top_candidates
+        self.status = "idle"
+        self.warmed_for = None        # market open the last warm-up targeted
+        self.candidates = []
+        self.probabilities = {}       # {symbol: probability at yesterday's close}
+        self.stats = {}
+
+    def seconds_until_due(self, next_open: datetime) -> float:
+        start = next_open - timedelta(minutes=self.lead_minutes)
+        return (start - datetime.now(IST)).total_seconds()
+
+    def due(self, next_open: datetime) -> bool:
+        return self.warmed_for != next_open and self.seconds_until_due(next_open) <= 0
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "warmed_for": self.warmed_for.isoformat() if self.warmed_for else None,
+            "candidates": self.candidates[:10],
+            **self.stats,
+        }
+
+    def _publish(self, redis_client):
+        if redis_client:
+            try:
+                redis_client.set("tradesage:warmup", json.dumps(self.to_dict()))
+            except Exception:
+                pass
+
+    def run(self, next_open: datetime, model_mgr: "ModelManager", angel_mgr: AngelSessionManager,
+            watchlist: list, redis_client=None) -> bool:
+        """Execute the warm-up phase. Returns True when the scanner is ready."""
+        logger.info(f"🔥 Pre-open warm-up for {next_open.strftime('%Y-%m-%d %H:%M IST')}...")
+        self.status = "warming"
+        self.warmed_for = next_open
+        self.stats = {"started_at": datetime.now(IST).isoformat()}
+        self._publish(redis_client)
+        t0 = time.time()
+
+        try:
+            # 1. Fresh session + instrument master + daily caches in memory
+            if not angel_mgr.is_connected and not angel_mgr.connect():
+                raise RuntimeError("Angel One connection failed")
+            fetcher = angel_mgr.fetcher
+            fetcher.get_instruments()
+            self.stats["cached_frames"] = fetcher.preload_cache(watchlist)
+
+            # 2. Yesterday's feature state for every symbol
+            model_mgr.refresh_fundamentals_history(watchlist, force=True)
+            rows, symbols = [], []
+            for symbol in watchlist:
+                df = fetcher.get_cached_frame(symbol)
+                if df is None or len(df) < 200:
+                    continue
+                try:
+                    feat = model_mgr.engineer.add_technical_indicators(df, symbol=symbol).dropna()
+                except Exception as e:
+                    logger.debug(f"Warm-up features failed for {symbol}: {e}")
+                    continue
+                if not feat.empty:
+                    model_mgr.feature_state.put(symbol, df, feat)
+                    rows.append(feat.iloc[[-1]])
+                    symbols.append(symbol)
+            self.stats["features_ready"] = len(symbols)
+
+            # 3. Warm the boosters (batch + single-row path) and rank likely candidates
+            if rows:
+                model_mgr.note_canary(pd.concat(rows[-ModelManager.CANARY_ROWS:]))
+                _, probs = model_mgr.trainer.predict(pd.concat(rows))
+                model_mgr.trainer.predict(rows[0])
+                self.probabilities = dict(zip(symbols, map(float, probs)))
+                order = np.argsort(-np.asarray(probs))[:self.top_candidates]
+                self.candidates = [symbols[i] for i in order]
+
+            # 4. FinBERT + fundamentals for likely candidates
+            try:
+                from src.core.fundamental_analyzer import get_fundamental_analyzer
+                analyzer = get_fundamental_analyzer()
+                for symbol in self.candidates:
+                    analyzer.fetch_fundamentals(symbol)
+            except ImportError:
+                logger.warning("FundamentalAnalyzer not available — skipping fundamentals warm-up")
+
+            self.status = "ready"
+        except Exception as e:
+            logger.error(f"Warm-up failed: {e}", exc_info=True)
+            self.status = "failed"
+            self.stats["error"] = str(e)
+
+        self.stats["elapsed"] = round(time.time() - t0, 1)
+        self._publish(redis_client)
+        logger.info(f"🔥 Warm-up {self.status} in {self.stats['elapsed']:.0f}s "
+                    f"({self.stats.get('features_ready', 0)} symbols, {len(self.candidates)} candidates)")
+        return self.status == "ready"
+
 
 # ══════════════════════════════════════════════════════════════
 #  SIGNAL GENERATION
 # ══════════════════════════════════════════════════════════════
 
-def generate_signal(symbol: str, df: pd.DataFrame, model_mgr: ModelManager) -> dict:
-    """Run feature engineering + model prediction for a single stock."""
+def generate_signal(symbol: str, df: pd.DataFrame, model_mgr: ModelManager,
+                    record: dict = None) -> dict:
+    """
+    Run feature engineering + model prediction for a single stock.
+    If `record` is given, it is filled with the probability, key features and
+    filter outcome for the scan history log.
+    """
+    if record is None:
+        record = {}
     try:
-        df = model_mgr.engineer.add_technical_indicators(df, symbol=symbol)
-        df.dropna(inplace=True)
+        raw = df
+        df = model_mgr.feature_state.get(symbol, raw)
+        if df is None:
+            df = model_mgr.engineer.add_technical_indicators(raw, symbol=symbol)
+            df.dropna(inplace=True)
+            if not df.empty:
+                model_mgr.feature_state.put(symbol, raw, df)
 
         if df.empty or len(df) < 10:
+            record["outcome"] = "no_features"
             return None
 
         latest = df.iloc[-1]
         current_price = float(latest["close"])
         current_volume = float(latest["volume"])
+        record["features"] = {k: float(latest[k]) for k in KEY_FEATURES if k in latest.index}
 
         # Circuit filter: skip stocks with price=0 or volume=0
         if current_price <= 0 or current_volume <= 0:
+            record["outcome"] = "circuit"
             return None
 
         # Quality filter: skip penny stocks and illiquid instruments
         MIN_STOCK_PRICE = 50   # ₹50 minimum to avoid penny stock manipulation
         MIN_VOLUME = 100000    # 1 lakh minimum daily volume for liquidity
         if current_price < MIN_STOCK_PRICE:
+            record["outcome"] = "penny"
             return None
         if current_volume < MIN_VOLUME:
+            record["outcome"] = "illiquid"
             return None
 
         atr = float(latest.get("atr", current_price * 0.02))
@@ -322,10 +604,13 @@ def generate_signal(symbol: str, df: pd.DataFrame, model_mgr: ModelManager) -> d
 
         # Predict
         preds, probs = model_mgr.trainer.predict(df.iloc[[-1]])
+        model_mgr.note_canary(df.iloc[[-1]])
         prob = float(probs[0])
         pred = int(preds[0])
+        record["probability"] = prob
 
         if pred != 1 or prob < 0.55:
+            record["outcome"] = "below_threshold"
             return None
 
         # Calculate trade levels
@@ -350,10 +635,12 @@ def generate_signal(symbol: str, df: pd.DataFrame, model_mgr: ModelManager) -> d
             "confidence": confidence,
         }
 
+        record["outcome"] = "signal"
         return signal
 
     except Exception as e:
         logger.debug(f"Signal gen failed for {symbol}: {e}")
+        record["outcome"] = "error"
         return None
 
 
@@ -480,6 +767,14 @@ def run_scanner():
         logger.error("No watchlist found")
         sys.exit(1)
 
+    # ── Pre-open warm-up ──
+    warmup = ScannerWarmup(lead_minutes=float(os.getenv("SCANNER_WARMUP_LEAD_MINUTES", "20")))
+
+    # ── Per-cycle scan snapshots (append-only columnar log) ──
+    scan_history = ScanHistory()
+    SCAN_HISTORY_KEEP_DAYS = int(os.getenv("SCAN_HISTORY_KEEP_DAYS", "30"))
+    history_pruned_on = None
+
     # ── Rate limiter: 3 req/sec ──
     rate_limiter = TokenBucketRateLimiter(rate=3.0, capacity=3.0)
 
@@ -493,6 +788,15 @@ def run_scanner():
             # Check for model hot-swap
             model_mgr.check_reload()
 
+            # Drop old scan snapshots once per day (the scanner runs for weeks between restarts)
+            today = datetime.now(IST).date()
+            if history_pruned_on != today:
+                try:
+                    scan_history.prune(keep_days=SCAN_HISTORY_KEEP_DAYS)
+                except Exception as e:
+                    logger.warning(f"Scan history prune failed: {e}")
+                history_pruned_on = today
+
             # Check for manual scan trigger
             force_scan = False
             if redis_client:
@@ -532,6 +836,11 @@ def run_scanner():
 
                 # Save local signals for fallback
                 local_signals = []
+                fundamental_metrics = None
+                # Per-symbol output for the scan history log
+                cycle_records = {}
+                cycle_started = datetime.now(IST)
+                model_mgr.refresh_fundamentals_history(watchlist)
 
                 for i, symbol in enumerate(watchlist, 1):
                     if i % 100 == 0:
@@ -539,8 +848,12 @@ def run_scanner():
                         logger.info(msg)
                         if redis_client: redis_client.publish("tradesage:signals", msg)
 
+                    fetch_start = time.time()
                     df = fetch_stock_data(angel_mgr, symbol, rate_limiter)
+                    record = {"symbol": symbol, "fetch_latency": round(time.time() - fetch_start, 3)}
+                    cycle_records[symbol] = record
                     if df is None:
+                        record["outcome"] = "fetch_failed"
                         errors += 1
                         continue
 
@@ -549,13 +862,14 @@ def run_scanner():
                     # INJECT LIVE LTP: Replace the stale 'close' of the latest daily candle with TRUE real-time price
                     try:
                         live_ltp = angel_mgr.api.get_ltp(symbol)
-                        if live_ltp and live_ltp > 0:
+                        if live_ltp and live_ltp > 0 and live_ltp != df['close'].iloc[-1]:
+                            df = df.copy()  # cached frames are read-only views
                             df.iloc[-1, df.columns.get_loc('close')] = live_ltp
                             logger.debug(f"Updated {symbol} with live LTP: {live_ltp}")
                     except Exception as e:
                         logger.warning(f"Could not fetch live LTP for {symbol}: {e}")
 
-                    signal = generate_signal(symbol, df, model_mgr)
+                    signal = generate_signal(symbol, df, model_mgr, record=record)
                     if signal:
                         local_signals.append(signal)
 
@@ -592,23 +906,33 @@ def run_scanner():
                     
                     finals = []
                     try:
-                        from src.core.fundamental_analyzer import FundamentalAnalyzer
-                        analyzer = FundamentalAnalyzer()
+                        from src.core.fundamental_analyzer import get_fundamental_analyzer
+                        analyzer = get_fundamental_analyzer()
                         
+                        verdicts = analyzer.evaluate_candidates([sig['symbol'] for sig in candidate_pool])
                         for sig in candidate_pool:
-                            try:
-                                flags = analyzer.evaluate_candidate(sig['symbol'])
-                                if flags:  # Dictionary returned on success
-                                    sig['fundamentals'] = flags
-                                    finals.append(sig)
-                            except Exception as e:
+                            flags = verdicts.get(sig['symbol'])
+                            if flags:  # Dictionary returned on success
+                                sig['fundamentals'] = flags
+                                finals.append(sig)
+                            elif flags is None:
                                 # Don't block signal on fundamental analysis failure
-                                logger.debug(f"Fundamental analysis failed for {sig['symbol']}: {e}")
                                 finals.append(sig)
+                        fundamental_metrics = analyzer.get_metrics()
+                        logger.info(f"Fundamental stage: {fundamental_metrics['last_batch_seconds']}s "
+                                    f"for {fundamental_metrics['last_batch_size']} candidates "
+                                    f"(RSS {fundamental_metrics['rss_mb']} MB)")
                     except ImportError:
                         logger.warning("FundamentalAnalyzer not available — skipping fundamental filter")
                         finals = candidate_pool
                     
+                    # Record the fundamental stage outcome per candidate
+                    published = {s['symbol'] for s in finals}
+                    for sig in candidate_pool:
+                        rec = cycle_records.get(sig['symbol'])
+                        if rec is not None:
+                            rec["outcome"] = "published" if sig['symbol'] in published else "fundamental_reject"
+
                     # Overwrite local_signals with the finalized batch
                     local_signals = finals
                     signal_count = len(local_signals)
@@ -628,6 +952,22 @@ def run_scanner():
                             f"News:{sig.get('fundamentals', {}).get('sentiment', 'N/A')}]"
                         )
 
+                # Persist this cycle's snapshot and diff against the previous one
+                crossings = []
+                try:
+                    scan_history.record_cycle(
+                        list(cycle_records.values()),
+                        started_at=cycle_started,
+                        meta={"elapsed": round(elapsed, 1), "signals": signal_count},
+                    )
+                    crossings = scan_history.diff()
+                    if crossings:
+                        logger.info(f"🔀 {len(crossings)} threshold crossings since last cycle")
+                    if redis_client:
+                        redis_client.set("tradesage:scan_diff", json.dumps(crossings))
+                except Exception as e:
+                    logger.warning(f"Scan history write failed: {e}")
+
                 # Update last scan timestamp
                 if redis_client:
                     try:
@@ -639,6 +979,8 @@ def run_scanner():
                             "errors": errors,
                             "fetched": successful_fetches,
                             "elapsed": round(elapsed, 1),
+                            "crossings": len(crossings),
+                            "fundamental": fundamental_metrics,
                         }))
                     except Exception:
                         pass
@@ -794,6 +1136,11 @@ def run_scanner():
 
             else:
                 next_open = next_market_open()
+                if warmup.due(next_open):
+                    warmup.run(next_open, model_mgr, angel_mgr, watchlist, redis_client)
+                    send_telegram(f"🔥 Pre-open warm-up {warmup.status} "
+                                  f"({warmup.stats.get('elapsed', 0):.0f}s)")
+
                 wait_seconds = (next_open - datetime.now(IST)).total_seconds()
                 wait_hours = wait_seconds / 3600
 
@@ -804,6 +1151,9 @@ def run_scanner():
 
                 # Sleep in chunks to allow graceful shutdown and force scans
                 sleep_chunk = min(wait_seconds, 300)  # Max 5 min chunks
+                until_warmup = warmup.seconds_until_due(next_open)
+                if warmup.warmed_for != next_open and until_warmup > 0:
+                    sleep_chunk = min(sleep_chunk, max(until_warmup, 5))
                 
                 for _ in range(int(sleep_chunk / 5)):
                     if redis_client and redis_client.get("tradesage:force_scan") == "1":
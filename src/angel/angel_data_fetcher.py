@@ -6,6 +6,9 @@ Handles fetching instruments, historical candle data, and managing local cache.
 import os
 import json
 import logging
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
 import requests
 from datetime import datetime, timedelta
@@ -17,10 +20,14 @@ from src.angel.angel_one_api import AngelOneAPI
 
 logger = logging.getLogger(__name__)
 
+# Byte budget for parsed CSV frames kept in memory (least recently used evicted first)
+FRAME_CACHE_MB = int(os.getenv('ANGEL_FRAME_CACHE_MB', '384'))
+
+
 class AngelDataFetcher:
     """Historical Data Fetcher using Angel One SmartAPI"""
     
-    def __init__(self, api_client: AngelOneAPI, cache_dir='data_cache_angel'):
+    def __init__(self, api_client: AngelOneAPI, cache_dir='data_cache_angel', frame_cache_mb=FRAME_CACHE_MB):
         self.api = api_client.get_api()
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True, parents=True)
@@ -28,6 +35,11 @@ class AngelDataFetcher:
         self.instrument_cache_file = self.cache_dir / 'instruments.json'
         self.instrument_list = []
         self.symbol_to_token = {}
+        # Parsed CSV caches kept in memory: {symbol: (mtime, DataFrame)}, LRU order.
+        # Frames are stored read-only; readers get shallow views, never copies.
+        self._frame_cache = OrderedDict()
+        self._frame_cache_bytes = 0
+        self.frame_cache_limit = int(frame_cache_mb * 1024 * 1024)
 
     def get_instruments(self, force_fetch=False):
         """Fetch all instruments from Angel One and cache them"""
@@ -111,12 +123,9 @@ class AngelDataFetcher:
             # If fetched within 24 hours, use cache to save API limits
             file_time = datetime.fromtimestamp(cache_file.stat().st_mtime)
             if datetime.now() - file_time < timedelta(hours=24):
-                try:
-                    df = pd.read_csv(cache_file, index_col='timestamp', parse_dates=True)
-                    if len(df) > 200:
-                        return df
-                except Exception:
-                    pass
+                cached = self._read_cache_file(symbol, cache_file)
+                if cached is not None and len(cached) > 200:
+                    return cached
 
         # Time calculations
         to_date = datetime.now()
@@ -149,8 +158,7 @@ class AngelDataFetcher:
                     
                     # Save to cache
                     df.to_csv(cache_file)
-                    
-                    return df
+                    return self._cache_put(symbol, cache_file.stat().st_mtime, df)
                 elif not candle_data.get('status'):
                     # Handle rate limit from JSON structure if available
                     import time
@@ -174,6 +182,121 @@ class AngelDataFetcher:
                     
         return None
 
+    def _read_cache_file(self, symbol, cache_file):
+        """Read a cache CSV, reusing the parsed frame while the file is unchanged on disk."""
+        try:
+            mtime = cache_file.stat().st_mtime
+            hit = self._cache_get(symbol)
+            if hit is not None and hit[0] == mtime:
+                return hit[1].copy(deep=False)
+            df = pd.read_csv(cache_file, index_col='timestamp', parse_dates=True)
+            return self._cache_put(symbol, mtime, df)
+        except Exception:
+            return None
+
+    # ------------------------------------------------------------------ #
+    #  IN-MEMORY FRAME CACHE                                               #
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _frozen(df):
+        """One read-only float64 block: cached frames cannot be modified through a view."""
+        try:
+            values = df.to_numpy(dtype=np.float64, copy=True)
+        except (TypeError, ValueError):
+            return df.copy()
+        values.flags.writeable = False
+        return pd.DataFrame(values, index=df.index.copy(), columns=df.columns, copy=False)
+
+    def _cache_get(self, key):
+        hit = self._frame_cache.get(key)
+        if hit is not None:
+            self._frame_cache.move_to_end(key)
+        return hit
+
+    def _cache_put(self, key, mtime, df):
+        """Store a frame (evicting least recently used ones over the byte budget); returns a view."""
+        frozen = self._frozen(df)
+        old = self._frame_cache.pop(key, None)
+        if old is not None:
+            self._frame_cache_bytes -= old[2]
+        nbytes = int(frozen.memory_usage(index=True).sum())
+        if nbytes <= self.frame_cache_limit:
+            self._frame_cache[key] = (mtime, frozen, nbytes)
+            self._frame_cache_bytes += nbytes
+            while self._frame_cache_bytes > self.frame_cache_limit:
+                _, (_, _, evicted) = self._frame_cache.popitem(last=False)
+                self._frame_cache_bytes -= evicted
+        return frozen.copy(deep=False)
+
+    def preload_cache(self, symbols):
+        """
+        Parse the cache CSVs for `symbols` into memory ahead of a scan. Returns the count loaded
+        (frames beyond the byte budget are evicted again, oldest first).
+        """
+        loaded = 0
+        for symbol in symbols:
+            cache_file = self.cache_dir / f"{symbol}_daily.csv"
+            if cache_file.exists() and self._read_cache_file(symbol, cache_file) is not None:
+                loaded += 1
+        return loaded
+
+    def adopt_cache(self, other):
+        """Take over another fetcher's parsed frames and instrument map (e.g. across a reconnect)."""
+        self._frame_cache = other._frame_cache
+        self._frame_cache_bytes = other._frame_cache_bytes
+        if other.symbol_to_token:
+            self.instrument_list = other.instrument_list
+            self.symbol_to_token = other.symbol_to_token
+
+    def get_cached_frame(self, symbol):
+        """Return a read-only view of the in-memory cached frame for a symbol (no API call), or None."""
+        hit = self._cache_get(symbol)
+        return hit[1].copy(deep=False) if hit is not None else None
+
+    def fetch_session_candles(self, symbol, day, interval='FIFTEEN_MINUTE'):
+        """
+        Intraday candles for one past trading session (e.g. to resolve a backtest bar).
+        Any Angel One interval works ('FIVE_MINUTE', 'FIFTEEN_MINUTE', ...). Not cached here.
+        """
+        if not self.symbol_to_token:
+            self.get_instruments()
+        token = self.symbol_to_token.get(symbol)
+        if not token:
+            return None
+
+        day = pd.Timestamp(day)
+        historicParam = {
+            "exchange": "NSE",
+            "symboltoken": str(token),
+            "interval": interval,
+            "fromdate": day.strftime("%Y-%m-%d 09:15"),
+            "todate": day.strftime("%Y-%m-%d 15:30"),
+        }
+        for attempt in range(3):
+            try:
+                candle_data = self.api.getCandleData(historicParam)
+            except Exception as e:
+                if "exceeding access rate" in str(e).lower() or "429" in str(e):
+                    import time
+                    time.sleep(1.5 + attempt * 2)
+                    continue
+                logger.error(f"Error fetching {interval} candles for {symbol} on {day.date()}: {e}")
+                return None
+            if not candle_data.get('status') and "exceeding access rate" in str(candle_data):
+                import time
+                time.sleep(1 + attempt * 2)
+                continue
+            if not candle_data.get('data'):
+                return None
+            df = pd.DataFrame(candle_data['data'], columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            df.set_index('timestamp', inplace=True)
+            for col in ['open', 'high', 'low', 'close', 'volume']:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+            return df.dropna().sort_index()
+        return None
+
     def fetch_multiple_symbols(self, symbols, period_days=730, max_workers=3):
         """Fetch multiple symbols in parallel"""
         if not self.symbol_to_token:
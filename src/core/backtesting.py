@@ -6,6 +6,7 @@ volume filters, and comprehensive metrics (Sharpe, Calmar, recovery factor).
 
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import warnings
 import os
@@ -13,13 +14,138 @@ import os
 warnings.filterwarnings('ignore')
 
 
+class StreamingMetrics:
+    """
+    Running equity and trade statistics, updated in O(1) per bar / per trade:
+    preallocated equity array, running peak and max drawdown, Welford mean/variance
+    of bar returns, win/loss tallies and exit-reason counts. Readable mid-run
+    (e.g. to stop a losing sweep run early) and at the end by _calculate_metrics.
+    """
+
+    def __init__(self, initial_capital, capacity=256):
+        self.initial_capital = initial_capital
+        self._equity = np.empty(max(int(capacity), 1))
+        self.bars = 0
+        self.peak = -np.inf
+        self.max_drawdown = 0.0  # fraction, <= 0
+        self._ret_n = 0
+        self._ret_mean = 0.0
+        self._ret_m2 = 0.0
+
+        self.total_trades = 0
+        self.wins = 0
+        self.losses = 0
+        # Per-trade values (rounded, as booked in the trade log), summed on demand with
+        # np.sum and left as NumPy scalars so totals, averages and their round() match
+        # the pandas aggregation over the trade log to the last bit
+        self._win_pnls = []
+        self._loss_pnls = []
+        self._fees = []
+        self._confidences = []
+        self.exit_reasons = {}
+
+    @classmethod
+    def from_history(cls, initial_capital, equity_curve, trades):
+        """Replay a finished equity curve and trade log."""
+        stream = cls(initial_capital, capacity=len(equity_curve))
+        for value in equity_curve:
+            stream.update(value)
+        for trade in trades:
+            stream.record_trade(trade)
+        return stream
+
+    def update(self, equity):
+        """Append one bar's equity."""
+        n = self.bars
+        if n == len(self._equity):
+            self._equity = np.concatenate([self._equity, np.empty(n)])
+        if n:
+            prev = self._equity[n - 1]
+            ret = equity / prev - 1 if prev else 0.0
+            self._ret_n += 1
+            delta = ret - self._ret_mean
+            self._ret_mean += delta / self._ret_n
+            self._ret_m2 += delta * (ret - self._ret_mean)
+        self._equity[n] = equity
+        self.bars = n + 1
+        if equity > self.peak:
+            self.peak = equity
+        drawdown = (equity - self.peak) / self.peak
+        if drawdown < self.max_drawdown:
+            self.max_drawdown = drawdown
+
+    def record_trade(self, trade):
+        """Count a closed trade (dict with net_pnl, fees, exit_reason, confidence)."""
+        net_pnl = trade['net_pnl']
+        self.total_trades += 1
+        if net_pnl > 0:
+            self.wins += 1
+            self._win_pnls.append(net_pnl)
+        elif net_pnl < 0:
+            self.losses += 1
+            self._loss_pnls.append(net_pnl)
+        self._fees.append(trade['fees'])
+        self._confidences.append(trade['confidence'])
+        reason = trade['exit_reason']
+        self.exit_reasons[reason] = self.exit_reasons.get(reason, 0) + 1
+
+    @property
+    def equity(self):
+        """Equity so far (a view — copy it if the backtest keeps running)."""
+        return self._equity[:self.bars]
+
+    @property
+    def current_equity(self):
+        return self._equity[self.bars - 1] if self.bars else self.initial_capital
+
+    @property
+    def win_sum(self):
+        return np.sum(self._win_pnls) if self._win_pnls else 0.0
+
+    @property
+    def loss_sum(self):
+        return np.sum(self._loss_pnls) if self._loss_pnls else 0.0
+
+    @property
+    def fees(self):
+        return np.sum(self._fees) if self._fees else 0.0
+
+    @property
+    def confidence_sum(self):
+        return np.sum(self._confidences) if self._confidences else 0.0
+
+    @property
+    def max_drawdown_pct(self):
+        return self.max_drawdown * 100
+
+    @property
+    def sharpe_ratio(self):
+        """Annualized Sharpe of bar returns (0 when undefined)."""
+        if self._ret_n > 1 and self._ret_m2 > 0:
+            std = np.sqrt(self._ret_m2 / (self._ret_n - 1))
+            return self._ret_mean / std * np.sqrt(252)
+        return 0
+
+    def snapshot(self):
+        """Cheap mid-run summary."""
+        return {
+            'bars': self.bars,
+            'equity': round(float(self.current_equity), 2),
+            'return_pct': round(float(self.current_equity / self.initial_capital - 1) * 100, 2),
+            'max_drawdown_pct': round(float(self.max_drawdown_pct), 2),
+            'sharpe_ratio': round(float(self.sharpe_ratio), 2),
+            'total_trades': self.total_trades,
+            'win_rate': round(self.wins / self.total_trades * 100, 2) if self.total_trades else 0.0,
+        }
+
+
 class Backtester:
     """Backtesting engine with realistic fills, fees, and comprehensive metrics."""
 
     def __init__(self, initial_capital=100000, position_size=0.10,
                  stop_loss_atr_multiplier=3.0, take_profit_pct=0.05,
                  brokerage_per_order=20.0, stt_pct=0.001,
-                 slippage_pct=0.001, min_volume=100000):
+                 slippage_pct=0.001, min_volume=100000, verbose=True, intrabar_resolver=None):
         """
         Initialize backtester.
 
@@ -32,6 +158,10 @@ class Backtester:
             stt_pct: Securities Transaction Tax on sell (default: 0.1%)
             slippage_pct: Slippage per trade (default: 0.1%)
             min_volume: Minimum avg volume filter (default: 100K)
+            verbose: Print the results table after each backtest (default: True)
+            intrabar_resolver: Optional IntrabarResolver deciding, from intraday candles,
+                whether SL or TP came first when a bar touches both (default: assume SL).
+                Candles it fetches are flushed to its cache at the end of every run.
         """
         self.initial_capital = initial_capital
         self.position_size = position_size
@@ -41,8 +171,12 @@ class Backtester:
         self.stt_pct = stt_pct
         self.slippage_pct = slippage_pct
         self.min_volume = min_volume
+        self.verbose = verbose
+        self.intrabar_resolver = intrabar_resolver
         self.trades = []
         self.equity_curve = []
+        self.stream = None  # StreamingMetrics of the last run
+        self.stopped_early = False
 
     def calculate_position_size(self, capital, price, atr):
         """Risk-based position sizing."""
@@ -57,15 +191,15 @@ class Backtester:
         shares = min(shares, max_shares)
         return max(shares, 0)
 
-    def run_backtest(self, df, predictions, probabilities, min_confidence=0.6):
+    def run_backtest(self, df, predictions, probabilities, min_confidence=0.6, stop_when=None, symbol=None):
         """
         Runs backtest simulation with realistic fills, fees, and slippage.
-        """
-        self.trades = []
-        capital = self.initial_capital
-        self.equity_curve = [capital]
-        position = None
 
+        symbol: needed by intrabar_resolver to look up intraday candles.
+
+        stop_when: optional callable(StreamingMetrics) -> bool checked after every bar;
+        when it returns True the open position is closed and the run ends early.
+        """
         df = df.copy()
         df.columns = [c.lower() for c in df.columns]
 
@@ -74,127 +208,151 @@ class Backtester:
         predictions = predictions[:min_len]
         probabilities = probabilities[:min_len]
 
-        for i in range(1, len(df)):
-            row = df.iloc[i]
-            prev_row = df.iloc[i - 1]
-            current_open  = row['open']
-            current_high  = row['high']
-            current_low   = row['low']
-            current_close = row['close']
-            current_date  = df.index[i]
+        capital = self._simulate(df, predictions, probabilities, min_confidence, stop_when, symbol)
+        return self._calculate_metrics(capital)
 
-            atr = prev_row.get('atr', 0)
-            if pd.isna(atr) or atr <= 0:
-                atr = abs(current_close * 0.02)
+    def _simulate(self, df, predictions, probabilities, min_confidence, stop_when=None, symbol=None):
+        """
+        Single-position event loop over plain arrays (one pass, no per-bar pandas access).
+        Fills self.trades / self.stream / self.equity_curve and returns final capital.
+        """
+        self.trades = []
+        self.stopped_early = False
+        capital = self.initial_capital
+        n = len(df)
+        stream = self.stream = StreamingMetrics(capital, capacity=n + 1)
+        stream.update(capital)
+        position = None
 
+        if n == 0:
+            self.equity_curve = stream.equity
+            return capital
+        opens = df['open'].to_numpy(dtype=float).tolist()
+        highs = df['high'].to_numpy(dtype=float).tolist()
+        lows = df['low'].to_numpy(dtype=float).tolist()
+        closes = df['close'].to_numpy(dtype=float).tolist()
+        dates = df.index
+
+        # Entry-bar ATR is the previous bar's (2% of close when missing)
+        if 'atr' in df.columns:
+            atrs = df['atr'].to_numpy(dtype=float)
+        else:
+            atrs = np.zeros(n)
+        prev_atr = np.empty(n)
+        prev_atr[0] = np.nan
+        prev_atr[1:] = atrs[:-1]
+        bad = np.isnan(prev_atr) | (prev_atr <= 0)
+        prev_atr = np.where(bad, np.abs(np.asarray(closes) * 0.02), prev_atr).tolist()
+
+        # Mean volume of the previous 20 bars (fewer at the start)
+        avg_vol = (df['volume'].astype(float).rolling(20, min_periods=1).mean()
+                   .shift(1).to_numpy().tolist())
+
+        # Bar i may enter on the previous bar's signal
+        signal = (np.asarray(predictions) == 1) & (np.asarray(probabilities) >= min_confidence)
+        signal = signal.tolist()
+
+        sl_slip = 1 - self.slippage_pct
+        tp_slip = 1 - self.slippage_pct / 2
+        update = stream.update
+        resolver = self.intrabar_resolver
+
+        for i in range(1, n):
             # ─── CHECK EXITS FIRST ───
             if position is not None:
                 exit_reason = None
-                exit_price = None
-
-                if current_low <= position['stop_loss']:
+                if lows[i] <= position['stop_loss']:
                     exit_reason = 'stop_loss'
-                    exit_price = position['stop_loss']
-                elif current_high >= position['take_profit']:
+                    exit_price = position['stop_loss'] * sl_slip  # Worse price on SL
+                    # Bar spans both levels: ask the intraday candles which came first
+                    if (resolver is not None and highs[i] >= position['take_profit']
+                            and resolver.resolve(symbol, dates[i], position['stop_loss'],
+                                                 position['take_profit'], opens[i]) == 'take_profit'):
+                        exit_reason = 'take_profit'
+                        exit_price = position['take_profit'] * tp_slip
+                elif highs[i] >= position['take_profit']:
                     exit_reason = 'take_profit'
-                    exit_price = position['take_profit']
+                    exit_price = position['take_profit'] * tp_slip  # Small slippage on TP
 
                 if exit_reason:
-                    # Apply slippage on exit
-                    if exit_reason == 'stop_loss':
-                        exit_price *= (1 - self.slippage_pct)  # Worse price on SL
-                    else:
-                        exit_price *= (1 - self.slippage_pct / 2)  # Small slippage on TP
-
-                    # Calculate P&L with fees
-                    gross_pnl = (exit_price - position['entry_price']) * position['shares']
-                    sell_value = exit_price * position['shares']
-                    exit_fees = self.brokerage + (sell_value * self.stt_pct)
-                    net_pnl = gross_pnl - position['entry_fees'] - exit_fees
-                    pnl_pct = (exit_price / position['entry_price'] - 1) * 100
-
-                    capital += sell_value - exit_fees
-
-                    self.trades.append({
-                        'entry_date': position['entry_date'],
-                        'exit_date': current_date,
-                        'entry_price': position['entry_price'],
-                        'exit_price': round(exit_price, 2),
-                        'shares': position['shares'],
-                        'gross_pnl': round(gross_pnl, 2),
-                        'fees': round(position['entry_fees'] + exit_fees, 2),
-                        'net_pnl': round(net_pnl, 2),
-                        'pnl_pct': round(pnl_pct, 2),
-                        'exit_reason': exit_reason,
-                        'confidence': position['confidence']
-                    })
+                    capital = self._close_position(position, exit_price, dates[i], exit_reason,
+                                                   capital, round_exit=True)
                     position = None
 
             # ─── CHECK ENTRIES ───
-            if position is None and i > 0:
-                prev_pred = predictions[i - 1]
-                prev_prob = probabilities[i - 1]
-
-                if prev_pred == 1 and prev_prob >= min_confidence:
-                    # Volume filter
-                    avg_vol = df['volume'].iloc[max(0, i-20):i].mean()
-                    if avg_vol < self.min_volume:
-                        self.equity_curve.append(capital)
-                        continue
-
-                    # Apply slippage on entry (worse fill)
-                    entry_price = current_open * (1 + self.slippage_pct)
-                    shares = self.calculate_position_size(capital, entry_price, atr)
-
-                    entry_fees = self.brokerage  # Buy-side brokerage
-                    total_cost = entry_price * shares + entry_fees
-
-                    if shares > 0 and total_cost <= capital:
-                        stop_loss = entry_price - (self.sl_atr_mult * atr)
-                        take_profit = entry_price * (1 + self.tp_pct)
-                        capital -= total_cost
-
-                        position = {
-                            'shares': shares,
-                            'entry_price': entry_price,
-                            'stop_loss': stop_loss,
-                            'take_profit': take_profit,
-                            'entry_date': current_date,
-                            'confidence': prev_prob,
-                            'entry_fees': entry_fees,
-                        }
-
-            pos_value = position['shares'] * current_close if position else 0
-            self.equity_curve.append(capital + pos_value)
+            if position is None and signal[i - 1]:
+                # Volume filter
+                if avg_vol[i] < self.min_volume:
+                    update(capital)
+                    if stop_when is not None and stop_when(stream):
+                        self.stopped_early = True
+                        break
+                    continue
+
+                # Apply slippage on entry (worse fill)
+                entry_price = opens[i] * (1 + self.slippage_pct)
+                atr = prev_atr[i]
+                shares = self.calculate_position_size(capital, entry_price, atr)
+
+                entry_fees = self.brokerage  # Buy-side brokerage
+                total_cost = entry_price * shares + entry_fees
+
+                if shares > 0 and total_cost <= capital:
+                    capital -= total_cost
+                    position = {
+                        'shares': shares,
+                        'entry_price': entry_price,
+                        'stop_loss': entry_price - (self.sl_atr_mult * atr),
+                        'take_profit': entry_price * (1 + self.tp_pct),
+                        'entry_date': dates[i],
+                        'confidence': probabilities[i - 1],
+                        'entry_fees': entry_fees,
+                    }
+
+            pos_value = position['shares'] * closes[i] if position else 0
+            update(capital + pos_value)
+            if stop_when is not None and stop_when(stream):
+                self.stopped_early = True
+                break
 
         # ─── CLOSE ANY REMAINING POSITION ───
         if position is not None:
-            exit_price = df.iloc[-1]['close']
-            gross_pnl = (exit_price - position['entry_price']) * position['shares']
-            sell_value = exit_price * position['shares']
-            exit_fees = self.brokerage + (sell_value * self.stt_pct)
-            net_pnl = gross_pnl - position['entry_fees'] - exit_fees
-            pnl_pct = (exit_price / position['entry_price'] - 1) * 100
-            capital += sell_value - exit_fees
-
-            self.trades.append({
-                'entry_date': position['entry_date'],
-                'exit_date': df.index[-1],
-                'entry_price': position['entry_price'],
-                'exit_price': exit_price,
-                'shares': position['shares'],
-                'gross_pnl': round(gross_pnl, 2),
-                'fees': round(position['entry_fees'] + exit_fees, 2),
-                'net_pnl': round(net_pnl, 2),
-                'pnl_pct': round(pnl_pct, 2),
-                'exit_reason': 'end_of_data',
-                'confidence': position['confidence']
-            })
-
-        return self._calculate_metrics(capital)
+            last = stream.bars - 1  # bar index the run ended on
+            capital = self._close_position(position, closes[last], dates[last],
+                                           'early_stop' if self.stopped_early else 'end_of_data',
+                                           capital, round_exit=False)
+        self.equity_curve = stream.equity
+        if resolver is not None:
+            resolver.flush()
+        return capital
+
+    def _close_position(self, position, exit_price, exit_date, exit_reason, capital, round_exit):
+        """Book an exit (P&L net of fees) into self.trades / self.stream and return the updated capital."""
+        gross_pnl = (exit_price - position['entry_price']) * position['shares']
+        sell_value = exit_price * position['shares']
+        exit_fees = self.brokerage + (sell_value * self.stt_pct)
+        net_pnl = gross_pnl - position['entry_fees'] - exit_fees
+        pnl_pct = (exit_price / position['entry_price'] - 1) * 100
+
+        trade = {
+            'entry_date': position['entry_date'],
+            'exit_date': exit_date,
+            'entry_price': position['entry_price'],
+            'exit_price': round(exit_price, 2) if round_exit else exit_price,
+            'shares': position['shares'],
+            'gross_pnl': round(gross_pnl, 2),
+            'fees': round(position['entry_fees'] + exit_fees, 2),
+            'net_pnl': round(net_pnl, 2),
+            'pnl_pct': round(pnl_pct, 2),
+            'exit_reason': exit_reason,
+            'confidence': position['confidence']
+        }
+        self.trades.append(trade)
+        self.stream.record_trade(trade)
+        return capital + (sell_value - exit_fees)
 
     def _calculate_metrics(self, final_capital):
-        """Comprehensive performance metrics."""
+        """Comprehensive performance metrics, read off the run's StreamingMetrics."""
         total_return = (final_capital - self.initial_capital) / self.initial_capital * 100
 
         if not self.trades:
@@ -206,56 +364,48 @@ class Backtester:
                 'message': 'No trades executed'
             }
 
-        trades_df = pd.DataFrame(self.trades)
-        winning = trades_df[trades_df['net_pnl'] > 0]
-        losing  = trades_df[trades_df['net_pnl'] < 0]
+        stream = self.stream
+        if stream is None or stream.total_trades != len(self.trades):
+            stream = StreamingMetrics.from_history(self.initial_capital, self.equity_curve, self.trades)
 
-        total_trades = len(trades_df)
-        win_count    = len(winning)
-        loss_count   = len(losing)
+        total_trades = stream.total_trades
+        win_count    = stream.wins
+        loss_count   = stream.losses
         win_rate     = (win_count / total_trades * 100) if total_trades > 0 else 0
 
         # Profit factor (using net P&L)
-        total_wins   = winning['net_pnl'].sum() if not winning.empty else 0
-        total_losses = abs(losing['net_pnl'].sum()) if not losing.empty else 1
+        win_sum, loss_sum = stream.win_sum, stream.loss_sum
+        total_wins   = win_sum if win_count else 0
+        total_losses = abs(loss_sum) if loss_count else 1
         profit_factor = total_wins / total_losses if total_losses > 0 else float('inf')
 
         # Total fees paid
-        total_fees = trades_df['fees'].sum()
+        total_fees = stream.fees
 
         # Average win/loss
-        avg_win  = winning['net_pnl'].mean() if not winning.empty else 0
-        avg_loss = losing['net_pnl'].mean() if not losing.empty else 0
+        avg_win  = win_sum / win_count if win_count else 0
+        avg_loss = loss_sum / loss_count if loss_count else 0
 
         # Win/loss ratio
         win_loss_ratio = abs(avg_win / avg_loss) if avg_loss != 0 else float('inf')
 
         # Equity curve metrics
-        equity = pd.Series(self.equity_curve)
-        running_max = equity.expanding().max()
-        drawdown = (equity - running_max) / running_max
-        max_drawdown = drawdown.min() * 100
-
-        # Sharpe ratio (annualized)
-        daily_returns = equity.pct_change().dropna()
-        if len(daily_returns) > 1 and daily_returns.std() > 0:
-            sharpe = (daily_returns.mean() / daily_returns.std()) * np.sqrt(252)
-        else:
-            sharpe = 0
+        max_drawdown = stream.max_drawdown_pct
+        sharpe = stream.sharpe_ratio
 
         # Calmar ratio (annualized return / max drawdown)
-        trading_days = len(self.equity_curve)
+        trading_days = stream.bars
         annual_return = ((final_capital / self.initial_capital) ** (252 / max(trading_days, 1)) - 1) * 100
         calmar = abs(annual_return / max_drawdown) if max_drawdown != 0 else 0
 
         # Recovery factor (total return / max drawdown)
         recovery_factor = abs(total_return / max_drawdown) if max_drawdown != 0 else 0
 
-        # Exit reason breakdown
-        exit_reasons = trades_df['exit_reason'].value_counts().to_dict()
+        # Exit reason breakdown (most frequent first)
+        exit_reasons = dict(sorted(stream.exit_reasons.items(), key=lambda kv: -kv[1]))
 
         # Average confidence
-        avg_confidence = trades_df['confidence'].mean() * 100
+        avg_confidence = stream.confidence_sum / total_trades * 100
 
         results = {
             'initial_capital': self.initial_capital,
@@ -285,7 +435,8 @@ class Backtester:
             }
         }
 
-        self._print_results(results)
+        if self.verbose:
+            self._print_results(results)
         return results
 
     def _print_results(self, results):
@@ -343,6 +494,86 @@ class Backtester:
         print(f"  Trades exported → {path}")
 
 
+# ══════════════════════════════════════════════════════════════
+#  UNIVERSE DRIVER — one independent single-position backtest per symbol
+# ══════════════════════════════════════════════════════════════
+
+_SIM_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'atr']
+
+
+def _backtest_symbol(task):
+    """Process-pool worker: (symbol, df, predictions, probabilities, min_confidence, params)."""
+    symbol, df, predictions, probabilities, min_confidence, params = task
+    bt = Backtester(**params, verbose=False)
+    metrics = bt.run_backtest(df, predictions, probabilities, min_confidence=min_confidence, symbol=symbol)
+    equity = pd.Series(bt.equity_curve, index=df.index[:len(bt.equity_curve)], dtype=float)
+    return symbol, metrics, bt.trades, equity
+
+
+def run_universe_backtest(symbol_inputs, min_confidence=0.6, workers=None, verbose=True, **params):
+    """
+    Backtest many symbols in parallel across processes.
+
+    Args:
+        symbol_inputs: {symbol: (df, predictions, probabilities)}
+        min_confidence: Entry probability threshold
+        workers: Process count (default: os.cpu_count()). Forced to 1 when an
+            intrabar_resolver is passed, so its fetch function, stats and candle
+            cache stay in this process.
+        **params: Backtester keyword arguments, applied to every symbol
+
+    Each symbol trades its own `initial_capital` sleeve. Returns a dict with
+    'per_symbol' metrics, a combined 'trades' DataFrame (with a symbol column),
+    the summed 'equity' curve, and 'summary' metrics over the whole universe.
+    """
+    tasks = []
+    for symbol, (df, predictions, probabilities) in symbol_inputs.items():
+        df = df.copy()
+        df.columns = [c.lower() for c in df.columns]
+        df = df[[c for c in _SIM_COLUMNS if c in df.columns]]
+        tasks.append((symbol, df, np.asarray(predictions), np.asarray(probabilities), min_confidence, params))
+    if not tasks:
+        return {'per_symbol': {}, 'trades': pd.DataFrame(), 'equity': pd.Series(dtype=float), 'summary': {}}
+
+    workers = workers or os.cpu_count() or 1
+    if params.get('intrabar_resolver') is not None:
+        workers = 1
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outputs = list(pool.map(_backtest_symbol, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    else:
+        outputs = [_backtest_symbol(task) for task in tasks]
+
+    per_symbol, all_trades, curves = {}, [], {}
+    for symbol, metrics, trades, equity in outputs:
+        per_symbol[symbol] = metrics
+        all_trades.extend({**t, 'symbol': symbol} for t in trades)
+        curves[symbol] = equity
+
+    # Sum the sleeves; a sleeve sits at its starting capital before its first bar
+    aggregate = Backtester(**params, verbose=verbose)
+    equity_df = pd.DataFrame(curves).sort_index().ffill().fillna(aggregate.initial_capital)
+    equity = equity_df.sum(axis=1)
+
+    aggregate.initial_capital = aggregate.initial_capital * len(outputs)
+    aggregate.trades = sorted(all_trades, key=lambda t: t['exit_date'])
+    # The summed curve already opens at the starting capital unless a sleeve moved on its
+    # first bar; only then is the starting point prepended (no duplicate flat bar)
+    curve = equity.tolist()
+    if curve and curve[0] != aggregate.initial_capital:
+        curve.insert(0, aggregate.initial_capital)
+    aggregate.equity_curve = curve
+    final_capital = sum(m['final_capital'] for m in per_symbol.values())
+    summary = aggregate._calculate_metrics(final_capital)
+
+    return {
+        'per_symbol': per_symbol,
+        'trades': aggregate.get_trades_df(),
+        'equity': equity,
+        'summary': summary,
+    }
+
+
 if __name__ == '__main__':
     # Quick test with synthetic data
     print("=== Backtester v2 Quick Test ===\n")
@@ -0,0 +1,114 @@
+"""
+TradeSage Fast Inference
+Compiled prediction path for a trained TradingModelTrainer. The sklearn path copies the
+DataFrame, patches missing columns one by one, reorders, and runs every wrapper's
+predict_proba, the LogisticRegression meta-learner and IsotonicRegression.predict.
+
+CompiledPredictor is built once (at load time) and holds:
+    - raw boosters: XGBoost inplace_predict on a private CPU copy, the LightGBM Booster,
+      and CatBoost's native predict
+    - the meta-learner folded into a coefficient vector + intercept (sigmoid of a dot)
+    - the isotonic calibrator as its threshold arrays (np.interp, clipped at the ends)
+    - a cached column -> feature-index mapping per input column layout
+
+predict(X) takes a float32 matrix already in model feature order; predict_frame(df)
+maps a DataFrame into one. Results match predict_proba_calibrated().
+"""
+
+import logging
+
+import numpy as np
+import xgboost as xgb
+
+logger = logging.getLogger(__name__)
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+class CompiledPredictor:
+    """Calibrated probabilities from plain NumPy input, without the sklearn wrappers."""
+
+    def __init__(self, trainer):
+        if trainer.model is None:
+            raise ValueError("No model to compile.")
+        self.feature_names = list(trainer.feature_names or trainer.model.get_booster().feature_names)
+        self._feature_index = {name: i for i, name in enumerate(self.feature_names)}
+        self._layouts = {}  # {tuple(columns): (source positions, target positions)}
+
+        # Private CPU copy so inplace_predict never touches the trainer's booster
+        self.booster = xgb.Booster(model_file=bytearray(trainer.model.get_booster().save_raw()))
+        self.booster.set_param({'device': 'cpu'})
+
+        # Ensemble members + meta-learner, mirroring TradingModelTrainer._raw_predict
+        self.members = []
+        self.meta_coef = self.meta_intercept = None
+        meta = getattr(trainer, 'meta_learner', None)
+        if trainer.ensemble_models and meta is not None:
+            for name, model in trainer.ensemble_models.items():
+                self.members.append(self._member(name, model))
+            self.meta_coef = np.asarray(meta.coef_, dtype=np.float64).ravel()
+            self.meta_intercept = float(np.asarray(meta.intercept_).ravel()[0])
+
+        # Isotonic calibrator with out_of_bounds='clip' == linear interpolation, clipped
+        self.iso_x = self.iso_y = None
+        if trainer.calibrator is not None:
+            self.iso_x = np.asarray(trainer.calibrator.X_thresholds_, dtype=np.float64)
+            self.iso_y = np.asarray(trainer.calibrator.y_thresholds_, dtype=np.float64)
+
+    @staticmethod
+    def _member(name, model):
+        """(name, fn(X) -> P(class 1)) over the model's native predictor where there is one."""
+        booster = getattr(model, 'booster_', None) or getattr(model, 'booster', None)
+        if name == 'lgbm' and booster is not None:
+            return name, booster.predict
+        if name == 'catboost' and hasattr(model, 'predict'):
+            return name, lambda X: model.predict(X, prediction_type='Probability')[:, 1]
+        return name, lambda X: model.predict_proba(X)[:, 1]
+
+    # ------------------------------------------------------------------ #
+    #  INPUT                                                               #
+    # ------------------------------------------------------------------ #
+
+    def _layout(self, columns):
+        key = tuple(columns)
+        layout = self._layouts.get(key)
+        if layout is None:
+            pairs = [(src, self._feature_index[c]) for src, c in enumerate(key) if c in self._feature_index]
+            src = np.array([p[0] for p in pairs], dtype=np.intp)
+            dst = np.array([p[1] for p in pairs], dtype=np.intp)
+            layout = self._layouts[key] = (src, dst)
+        return layout
+
+    def matrix(self, df):
+        """DataFrame -> float32 matrix in model feature order (missing features = 0)."""
+        src, dst = self._layout(df.columns)
+        X = np.zeros((len(df), len(self.feature_names)), dtype=np.float32)
+        # Only the model's columns are converted: extra ones (e.g. 'symbol') may be non-numeric
+        X[:, dst] = df.iloc[:, src].to_numpy(dtype=np.float32)
+        X[~np.isfinite(X)] = 0.0
+        return X
+
+    # ------------------------------------------------------------------ #
+    #  PREDICTION                                                          #
+    # ------------------------------------------------------------------ #
+
+    def predict(self, X):
+        """Calibrated P(class 1) for a float32 matrix in feature order; inf / NaN are treated as 0."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if not np.isfinite(X).all():
+            X = np.where(np.isfinite(X), X, np.float32(0.0))
+
+        raw = self.booster.inplace_predict(X, validate_features=False)
+        if self.meta_coef is not None:
+            features = np.column_stack([raw] + [fn(X) for _, fn in self.members])
+            raw = _sigmoid(features @ self.meta_coef + self.meta_intercept)
+        if self.iso_x is not None:
+            return np.interp(raw, self.iso_x, self.iso_y)
+        return np.asarray(raw, dtype=np.float64)
+
+    def predict_frame(self, df):
+        return self.predict(self.matrix(df))
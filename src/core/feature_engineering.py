@@ -20,7 +20,9 @@ class FeatureEngineer:
 
     def __init__(self):
         self._scraper = None  # Lazy-loaded ScreenerScraper
+        self._fund_store = None  # Lazy-loaded FundamentalsStore
         self._fund_cache = {}  # {symbol: {metric: value}}
+        self._fund_history = None  # {symbol: point-in-time frame indexed by as_of}; None = not preloaded
 
     def _get_scraper(self):
         """Lazy-load ScreenerScraper to avoid import errors when Obscura isn't installed."""
@@ -32,10 +34,24 @@ class FeatureEngineer:
                 logger.warning(f"Could not load ScreenerScraper: {e}")
         return self._scraper
 
+    def _get_fund_store(self):
+        """Lazy-open the on-disk fundamentals store (per-symbol lookups, no bulk load)."""
+        if self._fund_store is None:
+            try:
+                from src.core.fundamentals_store import FundamentalsStore
+                self._fund_store = FundamentalsStore()
+            except Exception as e:
+                logger.warning(f"Could not open FundamentalsStore: {e}")
+        return self._fund_store
+
     def set_fundamentals_cache(self, cache: dict):
         """Pre-load fundamentals cache from batch fetch (used by training pipeline)."""
         self._fund_cache = cache
 
+    def set_fundamentals_history(self, history: dict):
+        """Pre-load point-in-time fundamentals ({symbol: frame}, see FundamentalsStore.get_history_frames)."""
+        self._fund_history = history
+
     def add_technical_indicators(self, df, index_df=None, symbol=None):
         """
         Full feature pipeline: raw indicators -> normalized derived features -> regime flags -> fundamentals.
@@ -445,30 +461,68 @@ class FeatureEngineer:
         except Exception:
             return df
 
+    # Metric in the fundamentals store -> feature column
+    _FUND_COLUMNS = {
+        'pe_ratio': 'fund_pe',
+        'roe': 'fund_roe',
+        'roce': 'fund_roce',
+        'debt_to_equity': 'fund_debt_equity',
+        'promoter_holding': 'fund_promoter',
+        'fii_holding': 'fund_fii',
+        'dii_holding': 'fund_dii',
+        'dividend_yield': 'fund_div_yield',
+    }
+
+    # Metric in the point-in-time history -> feature column. Only metrics with a dated
+    # history from Screener's tables: scrape-day snapshots of roe / pe_ratio / dividend_yield
+    # would be 0 for every bar before the first scrape and real only for the newest ones.
+    _FUND_ASOF_COLUMNS = {
+        'roe_annual': 'fund_roe',
+        'roce': 'fund_roce',
+        'debt_to_equity': 'fund_debt_equity',
+        'promoter_holding': 'fund_promoter',
+        'fii_holding': 'fund_fii',
+        'dii_holding': 'fund_dii',
+    }
+
     def _add_fundamental_features(self, df, symbol):
         """
-        Inject fundamental metrics as constant features across all rows for a stock.
-        These are slow-changing values (updated quarterly) so a constant column is correct.
+        Inject fundamental metrics for a stock.
+        With point-in-time history available, each bar gets only what was public on
+        its date (as-of merge); P/E and dividend yield are rebuilt per bar from the close
+        and the latest annual EPS / dividend per share.
+        Without history, the latest snapshot is used as a constant column.
         Features: fund_pe, fund_roe, fund_roce, fund_debt_equity, fund_promoter,
                   fund_fii, fund_dii, fund_div_yield
         """
+        history = self._fund_history.get(symbol) if self._fund_history is not None else None
+        if self._fund_history is None:
+            # Ad-hoc use only: batch callers preload history via set_fundamentals_history
+            store = self._get_fund_store()
+            if store:
+                try:
+                    history = store.get_history_frames([symbol]).get(symbol)
+                except Exception as e:
+                    logger.debug(f"Fundamentals history lookup failed for {symbol}: {e}")
+        if history is not None and len(history):
+            return self._add_fundamentals_asof(df, history)
+
         # Default all to 0 (neutral)
-        fund_features = {
-            'fund_pe': 0.0,
-            'fund_roe': 0.0,
-            'fund_roce': 0.0,
-            'fund_debt_equity': 0.0,
-            'fund_promoter': 0.0,
-            'fund_fii': 0.0,
-            'fund_dii': 0.0,
-            'fund_div_yield': 0.0,
-        }
+        fund_features = {col: 0.0 for col in self._FUND_COLUMNS.values()}
 
         # Try to get fundamentals from pre-loaded cache first
         data = self._fund_cache.get(symbol)
 
         # Only fall back to live scraper if NO bulk cache was pre-loaded
         # (i.e., during live scanning, not during training)
+        if data is None and not self._fund_cache:
+            store = self._get_fund_store()
+            if store:
+                try:
+                    data = store.get(symbol)
+                except Exception as e:
+                    logger.debug(f"Fundamentals store lookup failed for {symbol}: {e}")
+
         if data is None and not self._fund_cache:
             scraper = self._get_scraper()
             if scraper:
@@ -479,20 +533,39 @@ class FeatureEngineer:
                     data = {}
 
         if data:
-            fund_features['fund_pe'] = float(data.get('pe_ratio', 0) or 0)
-            fund_features['fund_roe'] = float(data.get('roe', 0) or 0)
-            fund_features['fund_roce'] = float(data.get('roce', 0) or 0)
-            fund_features['fund_debt_equity'] = float(data.get('debt_to_equity', 0) or 0)
-            fund_features['fund_promoter'] = float(data.get('promoter_holding', 0) or 0)
-            fund_features['fund_fii'] = float(data.get('fii_holding', 0) or 0)
-            fund_features['fund_dii'] = float(data.get('dii_holding', 0) or 0)
-            fund_features['fund_div_yield'] = float(data.get('dividend_yield', 0) or 0)
+            for metric, col in self._FUND_COLUMNS.items():
+                fund_features[col] = float(data.get(metric, 0) or 0)
 
         for col, val in fund_features.items():
             df[col] = val
 
         return df
 
+    def _add_fundamentals_asof(self, df, history):
+        """Backward as-of merge of a symbol's point-in-time fundamentals onto the daily rows."""
+        bar_dates = pd.DatetimeIndex(df.index)
+        if bar_dates.tz is not None:
+            bar_dates = bar_dates.tz_localize(None)
+        left = pd.DataFrame({'as_of': bar_dates.normalize().astype('datetime64[ns]')})
+        right = history.reset_index()
+        right['as_of'] = right['as_of'].astype('datetime64[ns]')
+        merged = pd.merge_asof(left, right, on='as_of', direction='backward')
+
+        for col in self._FUND_COLUMNS.values():
+            df[col] = 0.0
+        for metric, col in self._FUND_ASOF_COLUMNS.items():
+            values = merged[metric].to_numpy(dtype=float) if metric in merged else np.zeros(len(df))
+            df[col] = np.nan_to_num(values, nan=0.0)
+
+        # Price-relative P/E and dividend yield from the latest annual EPS / dividend per share
+        close = df['close'].to_numpy(dtype=float)
+        n = len(df)
+        eps = merged['eps'].to_numpy(dtype=float) if 'eps' in merged else np.full(n, np.nan)
+        dps = merged['dps'].to_numpy(dtype=float) if 'dps' in merged else np.full(n, np.nan)
+        df['fund_pe'] = np.divide(close, eps, out=np.zeros(n), where=eps > 0)
+        df['fund_div_yield'] = np.divide(dps * 100, close, out=np.zeros(n), where=(dps >= 0) & (close > 0))
+        return df
+
     # ------------------------------------------------------------------ #
     #  TARGET + TRAINING DATA                                              #
     # ------------------------------------------------------------------ #
@@ -524,10 +597,8 @@ class FeatureEngineer:
 
         return df
 
-    def prepare_training_data(self, df, target_col='target'):
-        """Returns X, y, feature_names — with strict leakage prevention."""
-        df = df.dropna()
-
+    def feature_columns(self, columns):
+        """Model input columns among `columns` — strict leakage prevention."""
         # Strict exclusion — no raw prices, no future-derived, no raw indicators
         exclude_cols = {
             'open', 'high', 'low', 'close', 'volume',
@@ -555,7 +626,13 @@ class FeatureEngineer:
             'hammer', 'bullish_engulfing',
         }
 
-        feature_cols = [c for c in df.columns if c not in exclude_cols]
+        return [c for c in columns if c not in exclude_cols]
+
+    def prepare_training_data(self, df, target_col='target'):
+        """Returns X, y, feature_names — with strict leakage prevention."""
+        df = df.dropna()
+
+        feature_cols = self.feature_columns(df.columns)
 
         # Downcast to float32 to halve memory usage and prevent OOM
         X = df[feature_cols].astype(np.float32)
@@ -0,0 +1,206 @@
+"""
+TradeSage Feature Shards
+On-disk feature store for out-of-core training: the training matrix is written as
+fixed-size float32 .npy shards (X, y, dates) plus a manifest, and read back one
+shard at a time — memory-mapped — by XGBoost's external-memory DataIter or a
+LightGBM Sequence. Only a shard (plus the learners' quantized pages) is ever resident.
+
+    data_cache/feature_shards/<name>/
+        manifest.json            feature names, per-shard rows / positives / date range
+        shard_00000.X.npy        float32 (rows x features), sanitized
+        shard_00000.y.npy        float32 labels
+        shard_00000.dates.npy    datetime64[ns]
+"""
+
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+logger = logging.getLogger(__name__)
+
+try:
+    import lightgbm as lgb
+    HAS_LIGHTGBM = True
+except ImportError:
+    HAS_LIGHTGBM = False
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_SHARD_DIR = PROJECT_ROOT / "data_cache" / "feature_shards"
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (None where unsupported)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    except (ImportError, AttributeError):
+        try:
+            import psutil
+            info = psutil.Process().memory_info()
+            return round(getattr(info, 'peak_wset', info.rss) / 1e6, 1)
+        except ImportError:
+            return None
+
+
+class FeatureShardWriter:
+    """Buffers rows and writes them out as fixed-size shards."""
+
+    def __init__(self, out_dir, feature_names, rows_per_shard=250_000):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        for stale in self.out_dir.glob("shard_*.npy"):
+            stale.unlink()
+        self.feature_names = list(feature_names)
+        self.rows_per_shard = rows_per_shard
+        self.shards = []
+        self._buffer = []
+        self._buffered = 0
+
+    def add_frame(self, df, target_col='target'):
+        """Append a per-symbol frame (features + target); rows with any NaN are dropped."""
+        df = df.dropna()
+        if not len(df):
+            return
+        X = df[self.feature_names].to_numpy(dtype=np.float32, copy=True)
+        X[~np.isfinite(X)] = 0.0
+        self.add(X, df[target_col].to_numpy(dtype=np.float32), df.index.to_numpy(dtype='datetime64[ns]'))
+
+    def add(self, X, y, dates):
+        self._buffer.append((X, y, dates))
+        self._buffered += len(y)
+        while self._buffered >= self.rows_per_shard:
+            self._flush(self.rows_per_shard)
+
+    def _flush(self, rows):
+        X = np.concatenate([b[0] for b in self._buffer])
+        y = np.concatenate([b[1] for b in self._buffer])
+        dates = np.concatenate([b[2] for b in self._buffer])
+        name = f"shard_{len(self.shards):05d}"
+        np.save(self.out_dir / f"{name}.X.npy", X[:rows])
+        np.save(self.out_dir / f"{name}.y.npy", y[:rows])
+        np.save(self.out_dir / f"{name}.dates.npy", dates[:rows])
+        self.shards.append({
+            'name': name, 'rows': int(rows), 'positives': int(y[:rows].sum()),
+            'start': str(dates[:rows].min()), 'end': str(dates[:rows].max()),
+        })
+        self._buffer = [(X[rows:], y[rows:], dates[rows:])] if len(y) > rows else []
+        self._buffered = len(y) - rows
+
+    def close(self):
+        """Flush the remainder and write the manifest. Returns the manifest."""
+        if self._buffered:
+            self._flush(self._buffered)
+        manifest = {
+            'feature_names': self.feature_names,
+            'rows': sum(s['rows'] for s in self.shards),
+            'positives': sum(s['positives'] for s in self.shards),
+            'shards': self.shards,
+        }
+        tmp_path = self.out_dir / "manifest.json.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.out_dir / "manifest.json")
+        logger.info(f"Wrote {len(self.shards)} feature shards ({manifest['rows']:,} rows) to {self.out_dir}")
+        return manifest
+
+
+class FeatureShards:
+    """Read side of a shard directory."""
+
+    def __init__(self, shard_dir):
+        self.shard_dir = Path(shard_dir)
+        with open(self.shard_dir / "manifest.json", "r") as f:
+            self.manifest = json.load(f)
+        self.feature_names = self.manifest['feature_names']
+        self.shards = self.manifest['shards']
+
+    def __len__(self):
+        return self.manifest['rows']
+
+    @property
+    def positives(self):
+        return self.manifest['positives']
+
+    def load(self, i, mmap=True):
+        """(X, y, dates) of shard i, memory-mapped by default."""
+        name = self.shards[i]['name']
+        mode = 'r' if mmap else None
+        return (np.load(self.shard_dir / f"{name}.X.npy", mmap_mode=mode),
+                np.load(self.shard_dir / f"{name}.y.npy", mmap_mode=mode),
+                np.load(self.shard_dir / f"{name}.dates.npy", mmap_mode=mode))
+
+    def sample(self, max_rows, seed=42):
+        """Uniform row sample across all shards, date-sorted, as (X DataFrame, y Series)."""
+        rng = np.random.default_rng(seed)
+        frac = min(1.0, max_rows / max(len(self), 1))
+        parts = []
+        for i in range(len(self.shards)):
+            X, y, dates = self.load(i)
+            take = np.sort(rng.choice(len(y), size=int(round(len(y) * frac)), replace=False))
+            parts.append((np.asarray(X[take]), np.asarray(y[take]), np.asarray(dates[take])))
+        X = np.concatenate([p[0] for p in parts])
+        y = np.concatenate([p[1] for p in parts])
+        dates = np.concatenate([p[2] for p in parts])
+        order = np.argsort(dates, kind='stable')
+        index = pd.DatetimeIndex(dates[order])
+        return (pd.DataFrame(X[order], columns=self.feature_names, index=index, copy=False),
+                pd.Series(y[order], index=index))
+
+    def xgb_iter(self, cache_dir):
+        return ShardIter(self, cache_dir)
+
+
+class ShardIter(xgb.DataIter):
+    """XGBoost external-memory iterator: hands over one memory-mapped shard per call."""
+
+    def __init__(self, shards: FeatureShards, cache_dir):
+        self.shards = shards
+        self._i = 0
+        self.rows_read = 0
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        super().__init__(cache_prefix=str(Path(cache_dir) / "xgb_cache"))
+
+    def next(self, input_data):
+        if self._i == len(self.shards.shards):
+            return False
+        X, y, _ = self.shards.load(self._i)
+        input_data(data=X, label=y, feature_names=self.shards.feature_names)
+        self.rows_read += len(y)
+        self._i += 1
+        return True
+
+    def reset(self):
+        self._i = 0
+
+
+class BoosterProba:
+    """predict_proba() over a native LightGBM Booster, so it can sit in ensemble_models."""
+
+    def __init__(self, booster):
+        self.booster = booster
+
+    def predict_proba(self, X):
+        p = self.booster.predict(X)
+        return np.column_stack([1 - p, p])
+
+
+if HAS_LIGHTGBM:
+    class ShardSequence(lgb.Sequence):
+        """LightGBM Sequence over one shard; a Dataset built from a list of these bins in batches."""
+
+        def __init__(self, shards: FeatureShards, i, batch_size=65_536):
+            self.X = shards.load(i)[0]
+            self.batch_size = batch_size
+
+        def __getitem__(self, idx):
+            return np.asarray(self.X[idx], dtype=np.float64)
+
+        def __len__(self):
+            return len(self.X)
@@ -1,36 +1,140 @@
 import yfinance as yf
 import logging
-from tradingview_ta import TA_Handler, Interval, Exchange
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from src.core.screener_scraper import ScreenerScraper
+from src.core.tradingview_ratings import TradingViewRatings, UNKNOWN_RATING
 
 # NLP dependencies
 import os
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
-try:
-    from transformers import pipeline
-    HAS_NLP = True
-except ImportError:
-    HAS_NLP = False
+from src.core.sentiment_engine import SentimentEngine
 
 logger = logging.getLogger(__name__)
 
+# Per-source deadlines (seconds) for the concurrent enrichment stage
+SOURCE_TIMEOUTS = {
+    'screener': float(os.getenv("ENRICH_SCREENER_TIMEOUT", "20")),
+    'tradingview': float(os.getenv("ENRICH_TRADINGVIEW_TIMEOUT", "8")),
+    'news': float(os.getenv("ENRICH_NEWS_TIMEOUT", "8")),
+}
+
+
+class CircuitBreaker:
+    """
+    Opens after `max_failures` consecutive failures/timeouts and skips the source
+    for `cooldown` seconds, then lets one batch through to probe it again.
+    """
+
+    def __init__(self, name: str, max_failures: int = 5, cooldown: float = 300):
+        self.name = name
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            if time.time() - self.opened_at >= self.cooldown:
+                # Half-open: allow a probe; one more failure re-opens immediately
+                self.opened_at = None
+                self.failures = self.max_failures - 1
+                return False
+            return True
+
+    def record(self, ok: bool):
+        with self._lock:
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.failures >= self.max_failures and self.opened_at is None:
+                self.opened_at = time.time()
+                logger.warning(f"Circuit open for {self.name} ({self.failures} failures) — "
+                               f"skipping for {self.cooldown:.0f}s")
+
+
+def _current_rss_mb():
+    """Resident set size of this process in MB (Linux /proc, falls back to peak RSS)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except Exception:
+        return None
+
+
 class FundamentalAnalyzer:
     """
     Extends purely technical ML models by filtering trading candidates through 
     Warren-Buffett style fundamentals and institutional News Sentiment.
+    Long-lived processes should use get_fundamental_analyzer() so FinBERT loads once.
     """
     
     def __init__(self):
-        self.nlp = None
-        if HAS_NLP:
-            try:
-                # Load FinBERT - specialized specifically in financial sentiment
-                logger.info("loading FinBERT NLP model from HuggingFace (Takes ~2GB RAM)...")
-                self.nlp = pipeline("text-classification", model="ProsusAI/finbert")
-            except Exception as e:
-                logger.warning(f"Could not load FinBERT: {e}")
+        rss_before = _current_rss_mb()
+        t0 = time.time()
+        # FinBERT - specialized specifically in financial sentiment (~2GB RAM for torch fp32)
+        threads = os.getenv("FINBERT_THREADS")
+        self.sentiment_engine = SentimentEngine(
+            backend=os.getenv("FINBERT_BACKEND", "torch"),
+            batch_size=int(os.getenv("FINBERT_BATCH_SIZE", "16")),
+            num_threads=int(threads) if threads else None,
+            cache_ttl=float(os.getenv("SENTIMENT_CACHE_TTL_HOURS", "6")) * 3600,
+        )
+        self.nlp = self.sentiment_engine.nlp
                 
         self.screener = ScreenerScraper()
+        self.tv_ratings = TradingViewRatings()
+
+        # Concurrent enrichment: one pool shared by all sources, one breaker per source
+        self._executor = ThreadPoolExecutor(max_workers=int(os.getenv("ENRICH_WORKERS", "16")),
+                                            thread_name_prefix="enrich")
+        self.breakers = {name: CircuitBreaker(name) for name in SOURCE_TIMEOUTS}
+
+        rss_after = _current_rss_mb()
+        self._metrics_lock = threading.Lock()
+        self.metrics = {
+            'model_load_seconds': round(time.time() - t0, 2),
+            'model_rss_mb': round(rss_after - rss_before, 1) if rss_before and rss_after else None,
+            'nlp_loaded': self.nlp is not None,
+            'candidates_evaluated': 0,
+            'batches': 0,
+            'last_batch_size': 0,
+            'last_batch_seconds': 0.0,
+            'stage_seconds': {'fundamentals': 0.0, 'tradingview': 0.0, 'sentiment': 0.0},
+            'timeouts': {name: 0 for name in SOURCE_TIMEOUTS},
+            'partial_results': 0,
+        }
+
+    def _record_stage(self, stage: str, seconds: float):
+        with self._metrics_lock:
+            self.metrics['stage_seconds'][stage] = round(
+                self.metrics['stage_seconds'].get(stage, 0.0) + seconds, 3)
+
+    def get_metrics(self) -> dict:
+        """Load cost, cumulative per-stage latency and current process memory."""
+        with self._metrics_lock:
+            m = {**self.metrics, 'stage_seconds': dict(self.metrics['stage_seconds'])}
+        n = m['candidates_evaluated']
+        m['avg_candidate_seconds'] = round(sum(m['stage_seconds'].values()) / n, 3) if n else 0.0
+        m['rss_mb'] = _current_rss_mb()
+        m['sentiment'] = self.sentiment_engine.get_stats()
+        m['tradingview'] = self.tv_ratings.get_stats()
+        m['circuits_open'] = [name for name, b in self.breakers.items() if b.opened_at is not None]
+        return m
 
     def fetch_fundamentals(self, symbol: str):
         """Fetch strict fundamental ratios using Screener.in with yfinance fallback"""
@@ -63,96 +167,59 @@ class FundamentalAnalyzer:
 
     def fetch_tradingview_rating(self, symbol: str):
         """
-        Hit TradingView API for 26-indicator consensus rating.
+        TradingView 26-indicator consensus rating (cached, see TradingViewRatings).
         Returns a dict with recommendation, buy/sell/neutral counts, and a weighted score.
         """
+        return self.tv_ratings.get_rating(symbol)
+
+    def fetch_headlines(self, symbol: str, limit: int = 5):
+        """Latest `limit` Yahoo Finance headlines for a symbol (empty list on failure)."""
         try:
-            handler = TA_Handler(
-                symbol=symbol,
-                exchange="NSE",
-                screener="india",
-                interval=Interval.INTERVAL_1_DAY
-            )
-            analysis = handler.get_analysis()
-            summary = analysis.summary
-            
-            recommendation = summary.get('RECOMMENDATION', 'UNKNOWN')
-            buy_count = summary.get('BUY', 0)
-            sell_count = summary.get('SELL', 0)
-            neutral_count = summary.get('NEUTRAL', 0)
-            total = buy_count + sell_count + neutral_count
-            
-            # Weighted score: -1.0 (strong sell) to +1.0 (strong buy)
-            if total > 0:
-                weighted_score = round((buy_count - sell_count) / total, 3)
-            else:
-                weighted_score = 0.0
-            
-            return {
-                'recommendation': recommendation,
-                'buy': buy_count,
-                'sell': sell_count,
-                'neutral': neutral_count,
-                'score': weighted_score,  # -1.0 to +1.0
-            }
+            return self._yahoo_headlines(symbol, limit)
         except Exception as e:
-            logger.debug(f"TradingView fetch failed for {symbol}: {e}")
-            return {
-                'recommendation': 'UNKNOWN',
-                'buy': 0, 'sell': 0, 'neutral': 0,
-                'score': 0.0,
-            }
+            logger.debug(f"News fetch failed for {symbol}: {e}")
+            return []
+
+    @staticmethod
+    def _yahoo_headlines(symbol: str, limit: int = 5):
+        news = yf.Ticker(f"{symbol}.NS").news
+        if not news:
+            return []
+        headlines = [article.get('content', {}).get('title', article.get('title', '')) for article in news[:limit]]
+        return [h for h in headlines if h]  # Filter out empty ones
 
     def analyze_news_sentiment(self, symbol: str):
         """Scrape latest 5 news headlines from Yahoo and pass through FinBERT"""
+        return self.analyze_news_sentiment_batch([symbol])[symbol]
+
+    def analyze_news_sentiment_batch(self, symbols: list) -> dict:
+        """
+        Sentiment for many symbols with a single batched FinBERT pass over all of their
+        headlines (deduped, cached by headline hash). Returns {symbol: sentiment dict}.
+        """
         if not self.nlp:
-            return {'score': 0, 'label': 'NO_NLP', 'confidence': 0, 'headlines_found': 0}
-            
+            return {s: {'score': 0, 'label': 'NO_NLP', 'confidence': 0, 'headlines_found': 0}
+                    for s in symbols}
+
+        # No news = NO_DATA, NOT neutral (important distinction)
+        headlines_by_symbol = {s: self.fetch_headlines(s) for s in symbols}
+        return self._score_headlines(headlines_by_symbol)
+
+    def _score_headlines(self, headlines_by_symbol: dict) -> dict:
+        """Run one batched FinBERT pass over already-fetched headlines."""
+        symbols = list(headlines_by_symbol)
+        if not self.nlp:
+            return {s: {'score': 0, 'label': 'NO_NLP', 'confidence': 0, 'headlines_found': 0}
+                    for s in symbols}
+        for s, hs in headlines_by_symbol.items():
+            logger.debug(f"Sentiment headlines for {s}: {hs}")
+
         try:
-            yf_symbol = f"{symbol}.NS"
-            stock = yf.Ticker(yf_symbol)
-            news = stock.news
-            
-            if not news:
-                # No news = NO_DATA, NOT neutral (important distinction)
-                return {'score': 0, 'label': 'NO_DATA', 'confidence': 0, 'headlines_found': 0}
-                
-            headlines = [article.get('content', {}).get('title', article.get('title', '')) for article in news[:5]]
-            headlines = [h for h in headlines if h]  # Filter out empty ones
-            
-            if not headlines:
-                return {'score': 0, 'label': 'NO_DATA', 'confidence': 0, 'headlines_found': 0}
-            
-            logger.debug(f"Sentiment headlines for {symbol}: {headlines}")
-            results = self.nlp(headlines)
-            
-            # Map FinBERT labels to scores
-            score_map = {"positive": 1.0, "neutral": 0.0, "negative": -1.0}
-            total_score = 0
-            
-            for res in results:
-                total_score += score_map.get(res['label'], 0) * res['score']
-                
-            avg_score = total_score / len(headlines)
-            avg_confidence = sum([r['score'] for r in results]) / len(results)
-            
-            # Tighter thresholds: ±0.1 instead of ±0.2 (anti-neutral bias)
-            if avg_score > 0.1:
-                final_label = 'POSITIVE'
-            elif avg_score < -0.1:
-                final_label = 'NEGATIVE'
-            else:
-                final_label = 'NEUTRAL'
-                
-            return {
-                'score': round(avg_score, 4),
-                'label': final_label,
-                'confidence': round(avg_confidence, 4),
-                'headlines_found': len(headlines),
-            }
+            return self.sentiment_engine.score_symbols(headlines_by_symbol)
         except Exception as e:
-            logger.debug(f"Sentiment analysis failed for {symbol}: {e}")
-            return {'score': 0, 'label': 'NO_DATA', 'confidence': 0, 'headlines_found': 0}
+            logger.debug(f"Sentiment analysis failed for {symbols}: {e}")
+            return {s: {'score': 0, 'label': 'NO_DATA', 'confidence': 0, 'headlines_found': 0}
+                    for s in symbols}
 
     def compute_composite_score(self, tv_data: dict, sentiment_data: dict, fundamentals: dict) -> dict:
         """
@@ -210,17 +277,32 @@ class FundamentalAnalyzer:
             'fundamental_component': round(fund_score, 1),
         }
 
-    def evaluate_candidate(self, symbol: str):
+    def evaluate_candidate(self, symbol: str, sentiment: dict = None):
         """
         The Master Filter. Returns a dict with enriched data if the stock survives,
         or False if it should be rejected.
+        Pass a precomputed `sentiment` (from analyze_news_sentiment_batch) to skip FinBERT here.
         """
         logger.info(f"   [Fundamental Scan] evaluating {symbol}...")
         
+        t0 = time.time()
         fundamentals = self.fetch_fundamentals(symbol)
+        t1 = time.time()
         tv_data = self.fetch_tradingview_rating(symbol)
-        sentiment = self.analyze_news_sentiment(symbol)
-        
+        t2 = time.time()
+        if sentiment is None:
+            sentiment = self.analyze_news_sentiment(symbol)
+        t3 = time.time()
+        self._record_stage('fundamentals', t1 - t0)
+        self._record_stage('tradingview', t2 - t1)
+        self._record_stage('sentiment', t3 - t2)
+        with self._metrics_lock:
+            self.metrics['candidates_evaluated'] += 1
+
+        return self.apply_filters(symbol, fundamentals, tv_data, sentiment)
+
+    def apply_filters(self, symbol: str, fundamentals: dict, tv_data: dict, sentiment: dict):
+        """The rejection rules + conviction score, on data that has already been fetched."""
         tv_rating = tv_data.get('recommendation', 'UNKNOWN')
         
         logger.info(f"      TV Rating: {tv_rating} (B:{tv_data.get('buy',0)} S:{tv_data.get('sell',0)} N:{tv_data.get('neutral',0)} score:{tv_data.get('score',0)})")
@@ -277,3 +359,111 @@ class FundamentalAnalyzer:
             "pe_ratio": round(pe_ratio, 1) if pe_ratio is not None else "N/A",
             "conviction_score": composite['composite_score'],
         }
+
+    def evaluate_candidates(self, symbols: list) -> dict:
+        """
+        Batch version of evaluate_candidate for a scan's candidate pool.
+        Screener, TradingView and Yahoo news are fanned out concurrently for every
+        candidate, each source under its own deadline and circuit breaker. Whatever
+        arrived in time is used; missing sources fall back to neutral defaults.
+        Returns {symbol: enriched dict | False}. A symbol whose evaluation raises maps
+        to None, so the caller can decide not to block the signal on it.
+        """
+        t0 = time.time()
+        symbols = list(symbols)
+
+        # name -> (fetcher, metrics stage, "came back empty" check, batched). The fetchers
+        # swallow their own errors, so an empty/UNKNOWN result is what a failure looks like
+        # here; no headlines is a legitimate answer for quiet stocks and doesn't count.
+        # A batched fetcher takes the whole symbol list and returns {symbol: value}.
+        sources = {
+            'screener': (self.fetch_fundamentals, 'fundamentals', lambda v: not v, False),
+            'tradingview': (self.tv_ratings.get_ratings, 'tradingview',
+                            lambda v: v.get('recommendation') == 'UNKNOWN', True),
+            'news': (self._yahoo_headlines, 'sentiment', lambda v: False, False),
+        }
+        futures = {name: {} for name in sources}
+        for name, (fn, _, _, batched) in sources.items():
+            if self.breakers[name].is_open:
+                logger.info(f"   [Fundamental Scan] {name} circuit open — using defaults")
+                continue
+            if batched:
+                batch_future = self._executor.submit(fn, symbols)
+                futures[name] = {symbol: batch_future for symbol in symbols}
+                continue
+            for symbol in symbols:
+                futures[name][symbol] = self._executor.submit(fn, symbol)
+
+        # Per-source deadlines, all measured from the same fan-out start
+        gathered = {name: {} for name in sources}
+        partial = set()
+        for name, (_, stage, is_empty, batched) in sources.items():
+            pending_futures = futures[name]
+            if not pending_futures:
+                partial.update(symbols)
+                continue
+            remaining = max(0.0, t0 + SOURCE_TIMEOUTS[name] - time.time())
+            done, not_done = wait(set(pending_futures.values()), timeout=remaining)
+
+            failures = 0
+            for symbol, f in pending_futures.items():
+                if f in not_done:
+                    f.cancel()
+                    with self._metrics_lock:
+                        self.metrics['timeouts'][name] += 1
+                elif f.exception() is None:
+                    value = f.result().get(symbol, UNKNOWN_RATING) if batched else f.result()
+                    if not is_empty(value):
+                        gathered[name][symbol] = value
+                        continue
+                failures += 1
+                partial.add(symbol)
+            self.breakers[name].record(failures < len(pending_futures))
+            self._record_stage(stage, min(time.time() - t0, SOURCE_TIMEOUTS[name]))
+
+        # One FinBERT pass for every candidate's headlines that arrived in time
+        t_nlp = time.time()
+        sentiments = self._score_headlines({s: gathered['news'].get(s, []) for s in symbols})
+        self._record_stage('sentiment', time.time() - t_nlp)
+
+        results = {}
+        for symbol in symbols:
+            try:
+                logger.info(f"   [Fundamental Scan] evaluating {symbol}"
+                            f"{' (partial data)' if symbol in partial else ''}...")
+                results[symbol] = self.apply_filters(
+                    symbol,
+                    gathered['screener'].get(symbol, {}),
+                    gathered['tradingview'].get(symbol, dict(UNKNOWN_RATING)),
+                    sentiments.get(symbol, {'score': 0, 'label': 'NO_DATA', 'confidence': 0,
+                                            'headlines_found': 0}),
+                )
+            except Exception as e:
+                logger.debug(f"Fundamental analysis failed for {symbol}: {e}")
+                results[symbol] = None
+
+        with self._metrics_lock:
+            self.metrics['candidates_evaluated'] += len(symbols)
+            self.metrics['partial_results'] += len(partial)
+            self.metrics['batches'] += 1
+            self.metrics['last_batch_size'] = len(symbols)
+            self.metrics['last_batch_seconds'] = round(time.time() - t0, 2)
+        return results
+
+
+# ── Process-wide analyzer: FinBERT is loaded once (fundamentals come from the TTL store) ──
+_shared_analyzer = None
+_shared_lock = threading.Lock()
+
+
+def get_fundamental_analyzer() -> FundamentalAnalyzer:
+    """Return the resident FundamentalAnalyzer, creating it on first use."""
+    global _shared_analyzer
+    if _shared_analyzer is None:
+        with _shared_lock:
+            if _shared_analyzer is None:
+                _shared_analyzer = FundamentalAnalyzer()
+                logger.info(f"FundamentalAnalyzer resident "
+                            f"(load {_shared_analyzer.metrics['model_load_seconds']}s, "
+                            f"+{_shared_analyzer.metrics['model_rss_mb']} MB)")
+    return _shared_analyzer
@@ -0,0 +1,220 @@
+"""
+TradeSage Fundamentals Store
+Keyed on-disk cache of Screener fundamentals backed by SQLite in WAL mode:
+per-symbol rows with their fetch time (TTL checked on read), atomic upserts, and
+concurrent readers alongside a writer — safe for the scanner and retrainer at once.
+
+A second table keeps point-in-time history: every scrape is recorded under its
+date, along with the per-quarter / per-year values parsed from Screener's tables,
+each dated by when it became public. get_history_frames() returns it per symbol
+for as-of merging in the feature engine.
+
+Replaces data_cache/fundamentals/fundamentals_cache.json, which is imported on first use.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_DB_PATH = PROJECT_ROOT / "data_cache" / "fundamentals" / "fundamentals.db"
+LEGACY_JSON_PATH = PROJECT_ROOT / "data_cache" / "fundamentals" / "fundamentals_cache.json"
+DEFAULT_MAX_AGE_DAYS = 7
+
+
+class FundamentalsStore:
+    """SQLite (WAL) key-value store: symbol -> latest fundamentals dict + fetched_at."""
+
+    def __init__(self, db_path=None, max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_age_days = max_age_days
+        self._local = threading.local()  # sqlite3 connections are per-thread
+
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fundamentals ("
+                " symbol TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fundamentals_history ("
+                " symbol TEXT NOT NULL,"
+                " as_of TEXT NOT NULL,"
+                " metric TEXT NOT NULL,"
+                " value REAL NOT NULL,"
+                " PRIMARY KEY (symbol, as_of, metric))"
+            )
+        if LEGACY_JSON_PATH.exists() and self.db_path == DEFAULT_DB_PATH:
+            self._import_legacy_json(LEGACY_JSON_PATH)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _import_legacy_json(self, path: Path):
+        """One-time migration of the old single-file JSON cache."""
+        try:
+            with open(path, "r") as f:
+                legacy = json.load(f)
+        except Exception as e:
+            logger.debug(f"Could not read legacy fundamentals cache: {e}")
+            return
+        rows, history = [], []
+        for symbol, entry in legacy.items():
+            data = {k: v for k, v in entry.items() if not k.startswith("_")}
+            ts = float(entry.get("_ts", 0))
+            rows.append((symbol, json.dumps(data), ts))
+            history.extend(self._snapshot_rows(symbol, data, ts))
+        with self._conn() as conn:
+            # Never overwrite anything scraped since
+            conn.executemany(
+                "INSERT OR IGNORE INTO fundamentals (symbol, data, fetched_at) VALUES (?, ?, ?)", rows
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO fundamentals_history (symbol, as_of, metric, value) VALUES (?, ?, ?, ?)",
+                history,
+            )
+        try:
+            path.rename(path.with_suffix(".json.migrated"))
+        except OSError:
+            pass  # another process migrated it concurrently
+        logger.info(f"Imported {len(rows)} symbols from legacy fundamentals JSON cache")
+
+    # ------------------------------------------------------------------ #
+    #  READ                                                                #
+    # ------------------------------------------------------------------ #
+
+    def _max_age_seconds(self, max_age_days):
+        days = self.max_age_days if max_age_days is None else max_age_days
+        return days * 86400 if days else None
+
+    def get(self, symbol: str, max_age_days: float = None):
+        """Fresh fundamentals for one symbol, or None if missing/expired."""
+        return self.get_many([symbol], max_age_days).get(symbol)
+
+    def get_many(self, symbols, max_age_days: float = None) -> dict:
+        """{symbol: data} for the symbols that have a fresh entry (max_age_days=0 disables TTL)."""
+        symbols = list(symbols)
+        max_age = self._max_age_seconds(max_age_days)
+        cutoff = time.time() - max_age if max_age else 0
+        out = {}
+        conn = self._conn()
+        for i in range(0, len(symbols), 500):  # stay under SQLite's bound-parameter limit
+            chunk = symbols[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT symbol, data FROM fundamentals WHERE symbol IN ({placeholders}) AND fetched_at >= ?",
+                (*chunk, cutoff),
+            ).fetchall()
+            for symbol, data in rows:
+                out[symbol] = json.loads(data)
+        return out
+
+    def fetched_at(self, symbol: str):
+        row = self._conn().execute(
+            "SELECT fetched_at FROM fundamentals WHERE symbol = ?", (symbol,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM fundamentals").fetchone()[0]
+
+    # ------------------------------------------------------------------ #
+    #  WRITE                                                               #
+    # ------------------------------------------------------------------ #
+
+    def put(self, symbol: str, data: dict, fetched_at: float = None):
+        self.put_many({symbol: data}, fetched_at)
+
+    def put_many(self, items: dict, fetched_at: float = None, history: dict = None):
+        """
+        Upsert {symbol: data} in a single transaction, recording each as a dated
+        snapshot in the history table. `history` optionally adds parsed per-period
+        rows: {symbol: [(as_of 'YYYY-MM-DD', metric, value), ...]}.
+        """
+        if not items and not history:
+            return
+        ts = fetched_at or time.time()
+        history_rows = []
+        for symbol, data in items.items():
+            history_rows.extend(self._snapshot_rows(symbol, data, ts))
+        for symbol, rows in (history or {}).items():
+            history_rows.extend((symbol, as_of, metric, float(value)) for as_of, metric, value in rows)
+
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT INTO fundamentals (symbol, data, fetched_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(symbol) DO UPDATE SET data = excluded.data, fetched_at = excluded.fetched_at",
+                [(symbol, json.dumps(data), ts) for symbol, data in items.items()],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO fundamentals_history (symbol, as_of, metric, value) VALUES (?, ?, ?, ?)",
+                history_rows,
+            )
+
+    @staticmethod
+    def _snapshot_rows(symbol, data, ts):
+        """History rows for a scrape: every numeric metric, dated the day it was scraped."""
+        as_of = datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+        return [(symbol, as_of, metric, float(value)) for metric, value in data.items()
+                if isinstance(value, (int, float)) and not isinstance(value, bool)]
+
+    def prune(self, older_than_days: float):
+        """Delete entries older than `older_than_days`. Returns rows removed."""
+        cutoff = time.time() - older_than_days * 86400
+        with self._conn() as conn:
+            return conn.execute("DELETE FROM fundamentals WHERE fetched_at < ?", (cutoff,)).rowcount
+
+    # ------------------------------------------------------------------ #
+    #  POINT-IN-TIME HISTORY                                               #
+    # ------------------------------------------------------------------ #
+
+    def get_history(self, symbols=None) -> pd.DataFrame:
+        """Long-format history: columns symbol, as_of (datetime64), metric, value."""
+        conn = self._conn()
+        if symbols is None:
+            frames = [pd.read_sql_query("SELECT symbol, as_of, metric, value FROM fundamentals_history", conn)]
+        else:
+            symbols = list(symbols)
+            frames = []
+            for i in range(0, len(symbols), 500):
+                chunk = symbols[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                frames.append(pd.read_sql_query(
+                    f"SELECT symbol, as_of, metric, value FROM fundamentals_history WHERE symbol IN ({placeholders})",
+                    conn, params=chunk,
+                ))
+        history = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+            columns=['symbol', 'as_of', 'metric', 'value'])
+        history['as_of'] = pd.to_datetime(history['as_of'])
+        return history
+
+    def get_history_frames(self, symbols=None) -> dict:
+        """
+        {symbol: wide DataFrame indexed by as_of, one column per metric}, forward-filled
+        so each row holds everything known on that date. Ready for pd.merge_asof.
+        """
+        history = self.get_history(symbols)
+        if history.empty:
+            return {}
+        wide = history.pivot_table(index=['symbol', 'as_of'], columns='metric', values='value', aggfunc='last')
+        wide.columns.name = None
+        return {symbol: frame.droplevel('symbol').sort_index().ffill()
+                for symbol, frame in wide.groupby(level='symbol', sort=False)}
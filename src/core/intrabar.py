@@ -0,0 +1,149 @@
+"""
+TradeSage Intrabar Resolver
+Decides which level was hit first when a daily bar spans both the stop-loss and the
+take-profit. The backtests otherwise assume the stop (pessimistic, unverifiable).
+
+Intraday candles are fetched lazily — only for the rare ambiguous bars — and kept in
+a per-symbol CSV cache (data_cache_angel/intrabar/<interval>/<SYMBOL>.csv), so a
+re-run costs no API calls. Days with no intraday data are remembered too.
+"""
+
+import json
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "data_cache_angel" / "intrabar"
+
+
+class IntrabarResolver:
+    """
+    resolve() returns 'stop_loss' or 'take_profit' for an ambiguous daily bar.
+
+    fetch_fn(symbol, day) -> DataFrame of that session's candles (open/high/low/close,
+    time-indexed) or None. Without one, only candles already in the cache are used.
+    Anything that cannot be resolved keeps the pessimistic 'stop_loss'.
+    """
+
+    def __init__(self, fetch_fn=None, interval='FIFTEEN_MINUTE', cache_dir=None):
+        self.fetch_fn = fetch_fn
+        self.interval = interval
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR / interval
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._frames = {}    # {symbol: DataFrame of cached candles}
+        self._pending = {}   # {symbol: [DataFrame]} fetched since the last flush
+        self._misses = self._load_misses()
+        self._misses_dirty = False
+        self.stats = {'ambiguous': 0, 'resolved_open': 0, 'resolved_intraday': 0,
+                      'unresolved': 0, 'reclassified': 0, 'fetches': 0, 'fetch_failures': 0}
+
+    # ------------------------------------------------------------------ #
+    #  CACHE                                                               #
+    # ------------------------------------------------------------------ #
+
+    def _misses_path(self):
+        return self.cache_dir / "_no_data.json"
+
+    def _load_misses(self):
+        try:
+            with open(self._misses_path(), "r") as f:
+                return {symbol: set(days) for symbol, days in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _cached_frame(self, symbol):
+        if symbol not in self._frames:
+            path = self.cache_dir / f"{symbol}.csv"
+            try:
+                self._frames[symbol] = pd.read_csv(path, index_col='timestamp', parse_dates=True)
+            except (OSError, ValueError):
+                self._frames[symbol] = pd.DataFrame(columns=['open', 'high', 'low', 'close'])
+        return self._frames[symbol]
+
+    def candles(self, symbol, day):
+        """That session's intraday candles, from cache or one lazy fetch. None if unavailable."""
+        day = pd.Timestamp(day).normalize()
+        key = day.strftime("%Y-%m-%d")
+        frame = self._cached_frame(symbol)
+        if len(frame):
+            session = frame[(frame.index >= day) & (frame.index < day + pd.Timedelta(days=1))]
+            if len(session):
+                return session
+        if self.fetch_fn is None or key in self._misses.get(symbol, ()):
+            return None
+
+        self.stats['fetches'] += 1
+        try:
+            session = self.fetch_fn(symbol, day.date())
+        except Exception as e:
+            logger.debug(f"Intraday fetch failed for {symbol} {key}: {e}")
+            self.stats['fetch_failures'] += 1
+            return None  # transient — not remembered as a miss
+        if session is None or len(session) == 0:
+            self._misses.setdefault(symbol, set()).add(key)
+            self._misses_dirty = True
+            return None
+
+        session = session[['open', 'high', 'low', 'close']].sort_index()
+        if session.index.tz is not None:
+            session.index = session.index.tz_localize(None)
+        session.index.name = 'timestamp'
+        self._frames[symbol] = pd.concat([frame, session]).sort_index() if len(frame) else session
+        self._pending.setdefault(symbol, []).append(session)
+        return session
+
+    def flush(self):
+        """Persist candles fetched since the last flush, and the no-data days (no-op when nothing is new)."""
+        for symbol, sessions in self._pending.items():
+            path = self.cache_dir / f"{symbol}.csv"
+            new = pd.concat(sessions)
+            new.to_csv(path, mode='a', header=not path.exists())
+        self._pending = {}
+        if self._misses_dirty:
+            with open(self._misses_path(), "w") as f:
+                json.dump({symbol: sorted(days) for symbol, days in self._misses.items()}, f)
+            self._misses_dirty = False
+
+    # ------------------------------------------------------------------ #
+    #  RESOLUTION                                                          #
+    # ------------------------------------------------------------------ #
+
+    def resolve(self, symbol, day, stop_loss, take_profit, day_open=None):
+        """Which level a bar with low <= stop_loss and high >= take_profit reached first."""
+        self.stats['ambiguous'] += 1
+
+        # A gap through either level decides it at the open — no candles needed
+        if day_open is not None:
+            if day_open <= stop_loss:
+                self.stats['resolved_open'] += 1
+                return 'stop_loss'
+            if day_open >= take_profit:
+                self.stats['resolved_open'] += 1
+                self.stats['reclassified'] += 1
+                return 'take_profit'
+
+        session = self.candles(symbol, day) if symbol else None
+        if session is not None:
+            for low, high in zip(session['low'].to_numpy(), session['high'].to_numpy()):
+                sl_hit, tp_hit = low <= stop_loss, high >= take_profit
+                if sl_hit and tp_hit:
+                    break  # both inside one intraday candle too — still ambiguous
+                if sl_hit or tp_hit:
+                    self.stats['resolved_intraday'] += 1
+                    if tp_hit:
+                        self.stats['reclassified'] += 1
+                        return 'take_profit'
+                    return 'stop_loss'
+
+        self.stats['unresolved'] += 1
+        return 'stop_loss'
+
+    def summary(self) -> dict:
+        s = dict(self.stats)
+        s['reclassified_pct'] = round(s['reclassified'] / s['ambiguous'] * 100, 1) if s['ambiguous'] else 0.0
+        s['interval'] = self.interval
+        return s
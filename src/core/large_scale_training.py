@@ -112,7 +112,7 @@ class LargeScaleTrainer:
             scraper = ScreenerScraper()
             symbols_list = list(stock_data_dict.keys())
             print(f"\n📊 Fetching fundamentals for {len(symbols_list)} stocks (cached where possible)...")
-            fund_cache = scraper.fetch_fundamentals_batch(symbols_list, delay=1.0)
+            fund_cache = scraper.fetch_fundamentals_batch(symbols_list)
             print(f"   ✓ Got fundamentals for {len(fund_cache)}/{len(symbols_list)} stocks")
         except Exception as e:
             print(f"   ⚠ Fundamental fetch failed: {e} — training continues with technical features only")
@@ -120,6 +120,15 @@ class LargeScaleTrainer:
         # Pre-load the cache into the FeatureEngineer
         self.engineer.set_fundamentals_cache(fund_cache)
 
+        # Point-in-time history for leak-free as-of fundamentals (one query for all symbols)
+        try:
+            from src.core.fundamentals_store import FundamentalsStore
+            fund_history = FundamentalsStore().get_history_frames(list(stock_data_dict.keys()))
+            self.engineer.set_fundamentals_history(fund_history)
+            print(f"   ✓ Point-in-time fundamentals history for {len(fund_history)} stocks")
+        except Exception as e:
+            print(f"   ⚠ Fundamentals history unavailable: {e} — using latest snapshot per stock")
+
         all_data = []
         failed_stocks = []
 
@@ -15,7 +15,16 @@ from sklearn.metrics import (
 from sklearn.isotonic import IsotonicRegression
 import joblib
 import os
+import shutil
+import tempfile
+import time
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from src.core.fast_inference import CompiledPredictor
+from src.core.tree_runtime import TreeModel, export_trees, tree_artifact_path, verify_export
+from src.core.training_data import TrainingData
 
 warnings.filterwarnings('ignore')
 
@@ -63,6 +72,89 @@ def profit_score(y_true, y_pred_proba, threshold=0.6):
     return profit / total_signals
 
 
+# Optuna intermediate values: step = fold * FOLD_STEPS + boosting round (val AUC every
+# REPORT_EVERY rounds); the fold's combined CV score goes at the fold's last step
+FOLD_STEPS = 1000
+REPORT_EVERY = 10
+
+
+def _build_cv_folds(X_cv, y_cv):
+    """Quantize each PurgedTimeSeriesSplit fold once; validation shares the training cut points."""
+    folds = []
+    for tr_idx, va_idx in PurgedTimeSeriesSplit(n_splits=3, gap=10).split(X_cv):
+        # Folds are contiguous row ranges — slice (views) instead of fancy-indexing (copies)
+        tr, va = slice(tr_idx[0], tr_idx[-1] + 1), slice(va_idx[0], va_idx[-1] + 1)
+        dtr = xgb.QuantileDMatrix(X_cv.iloc[tr], label=y_cv.iloc[tr], max_bin=256)
+        dva = xgb.QuantileDMatrix(X_cv.iloc[va], label=y_cv.iloc[va], ref=dtr)
+        folds.append((dtr, dva, np.asarray(y_cv.iloc[va])))
+    return folds
+
+
+class _PruningCallback(xgb.callback.TrainingCallback):
+    """Reports validation AUC to the Optuna trial while boosting and stops pruned trials."""
+
+    def __init__(self, trial, fold):
+        super().__init__()
+        self.trial = trial
+        self.offset = fold * FOLD_STEPS
+
+    def after_iteration(self, model, epoch, evals_log):
+        if epoch % REPORT_EVERY == 0:
+            import optuna
+            self.trial.report(evals_log['val']['auc'][-1], self.offset + epoch)
+            if self.trial.should_prune():
+                raise optuna.TrialPruned()
+        return False
+
+
+def _tune_storage(url):
+    """Optuna storage for a URL; SQLite gets a lock timeout so parallel workers can share it."""
+    if url is None or not url.startswith('sqlite'):
+        return url
+    import optuna
+    return optuna.storages.RDBStorage(url, engine_kwargs={'connect_args': {'timeout': 60}})
+
+
+def _tune_pruner(kind):
+    import optuna
+    if kind == 'hyperband':
+        return optuna.pruners.HyperbandPruner(min_resource=50, max_resource=3 * FOLD_STEPS)
+    if kind == 'median':
+        return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=100)
+    return optuna.pruners.NopPruner()
+
+
+def _tune_worker(task):
+    """One tuning process: own quantized folds, trials pulled from the shared study."""
+    import optuna
+    from optuna.study import MaxTrialsCallback
+    from optuna.trial import TrialState
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+
+    X_cv, y_cv, spw, storage_url, study_name, pruner, n_trials, n_jobs = task
+    trainer = TradingModelTrainer()
+    trainer.n_jobs = n_jobs
+    study = optuna.load_study(study_name=study_name, storage=_tune_storage(storage_url),
+                              pruner=_tune_pruner(pruner))
+    study.optimize(trainer._tune_objective(_build_cv_folds(X_cv, y_cv), spw), n_trials=n_trials,
+                   callbacks=[MaxTrialsCallback(n_trials, states=(TrialState.COMPLETE, TrialState.PRUNED))])
+
+
+def _previous_best_params(storage, prefix, exclude, top_k=5):
+    """Best trials of the most recent earlier study named <prefix>_*, for warm-starting."""
+    import optuna
+    from optuna.trial import TrialState
+    summaries = [s for s in optuna.get_all_study_summaries(storage)
+                 if s.study_name.startswith(f"{prefix}_") and s.study_name != exclude
+                 and s.best_trial is not None]
+    if not summaries:
+        return []
+    latest = max(summaries, key=lambda s: s.datetime_start or datetime.min)
+    trials = optuna.load_study(study_name=latest.study_name, storage=storage).get_trials(
+        deepcopy=False, states=(TrialState.COMPLETE,))
+    return [t.params for t in sorted(trials, key=lambda t: t.value, reverse=True)[:top_k]]
+
+
 class TradingModelTrainer:
     """Trains and manages XGBoost (+ optional ensemble) trading prediction models."""
 
@@ -72,16 +164,39 @@ class TradingModelTrainer:
         self.training_metrics = {}
         self.calibrator = None
         self.ensemble_models = None  # For ensemble mode
-
-    def train_model(self, X_train, y_train, X_val=None, y_val=None, use_ensemble=False):
+        self.best_params = None      # Hyperparameters of the last fit (reused by update_model)
+        self.trained_until = None    # Last training date ('YYYY-MM-DD'), where known
+        # Held-out window after trained_until ({'start', 'end', 'auc'}), re-scored by the
+        # incremental retrain's drift check
+        self.reference_window = None
+        self.compiled = None         # CompiledPredictor for predict(); False if it cannot be built
+        self.n_jobs = -1  # XGBoost threads; lower it when training several models in parallel
+        # Optuna: trial processes (the cores are split between them), pruner
+        # ('median' | 'hyperband' | 'none') and optional persistent storage, e.g.
+        # sqlite:///data/optuna_studies.db — each run then warm-starts from the last study
+        self.tune_workers = 1
+        self.tune_pruner = 'median'
+        self.tune_storage = None
+        self.tune_study = 'tradesage_xgb'
+
+    def train_model(self, X_train, y_train, X_val=None, y_val=None, use_ensemble=False,
+                    params=None, init_model=None, init_ensemble=None):
         """
         Train XGBoost with PurgedTimeSeriesSplit CV + Optuna tuning.
         Optionally train an ensemble with LightGBM and CatBoost.
-        """
-        self.feature_names = list(X_train.columns)
 
+        params skips Optuna and trains with the given hyperparameters; init_model
+        (an XGBClassifier or Booster) continues boosting from an existing model, adding
+        params['n_estimators'] new trees; init_ensemble ({name: model}) does the same for
+        the LightGBM / CatBoost ensemble members.
+
+        X_train / X_val may be TrainingData (y_train / y_val then None): its buffer is
+        already sanitized, and every split below is a view over it rather than a copy.
+        """
         # Sanitize inputs
         X_train, y_train = self._sanitize(X_train, y_train)
+        self.feature_names = list(X_train.columns)
+        self.compiled = None
 
         print(f"\n{'='*60}")
         print("TRADESAGE MODEL TRAINING v2")
@@ -98,19 +213,25 @@ class TradingModelTrainer:
         print(f"scale_pos_weight       : {spw:.2f}")
 
         # ---- Optuna hyperparameter tuning ---- #
-        best_params = self._optuna_tune(X_train, y_train, spw)
+        if params is not None:
+            best_params = {**self._default_params(), **params}
+        else:
+            best_params = self._optuna_tune(X_train, y_train, spw)
 
         # ---- Prepare val set ---- #
-        if X_val is not None and y_val is not None:
+        if X_val is not None and (y_val is not None or isinstance(X_val, TrainingData)):
             X_val, y_val = self._sanitize(X_val, y_val)
         else:
             split = int(len(X_train) * 0.8)
-            X_val  = X_train.iloc[split:]
+            X_val  = X_train.iloc[split:]   # positional slices: views, not copies
             y_val  = y_train.iloc[split:]
             X_train = X_train.iloc[:split]
             y_train = y_train.iloc[:split]
 
         print(f"\nTraining final model  (train={len(X_train):,}  val={len(X_val):,})...")
+        self.best_params = dict(best_params)
+        if isinstance(X_train.index, pd.DatetimeIndex) and len(X_train):
+            self.trained_until = str(X_train.index.max().date())
 
         # ---- Train primary XGBoost ---- #
         self.model = xgb.XGBClassifier(
@@ -119,17 +240,18 @@ class TradingModelTrainer:
             objective='binary:logistic',
             eval_metric='auc',
             random_state=42,
-            n_jobs=-1,
+            n_jobs=self.n_jobs,
             device=_xgb_device(),
             tree_method='hist',
             verbosity=0,
         )
-        self.model.fit(X_train, y_train, verbose=False)
-        print(f"  XGBoost training complete  n_estimators={best_params['n_estimators']}")
+        self.model.fit(X_train, y_train, verbose=False, xgb_model=init_model)
+        warm = " (warm start)" if init_model is not None else ""
+        print(f"  XGBoost training complete  n_estimators={best_params['n_estimators']}{warm}")
 
         # ---- Ensemble (optional) ---- #
         if use_ensemble:
-            self._train_ensemble(X_train, y_train, X_val, y_val, spw, best_params)
+            self._train_ensemble(X_train, y_train, X_val, y_val, spw, best_params, init_ensemble)
 
         # ---- Isotonic calibration ---- #
         print("  Calibrating probabilities (isotonic)...")
@@ -140,10 +262,29 @@ class TradingModelTrainer:
 
         return self.model
 
+    def update_model(self, X_train, y_train=None, X_val=None, y_val=None, new_trees=100):
+        """
+        Incremental retrain of a loaded model (see load_model): append new_trees to the
+        XGBoost model and each ensemble member, trained on the newest window only, with
+        the hyperparameters of the original fit. The meta-learner and isotonic calibrator
+        are refit from scratch on X_val. Raises ValueError if the feature set changed.
+        """
+        if self.model is None:
+            raise ValueError("No model loaded to update.")
+        columns = X_train.feature_names if isinstance(X_train, TrainingData) else list(X_train.columns)
+        if self.feature_names and list(columns) != list(self.feature_names):
+            raise ValueError("Feature set changed since the model was trained — full retrain required")
+
+        params = {**(self.best_params or self._default_params()), 'n_estimators': new_trees}
+        return self.train_model(X_train, y_train, X_val, y_val,
+                                use_ensemble=bool(self.ensemble_models), params=params,
+                                init_model=self.model, init_ensemble=self.ensemble_models)
+
     def _optuna_tune(self, X_train, y_train, spw):
-        """Hyperparameter tuning with Optuna."""
+        """Hyperparameter tuning with Optuna (pruned, optionally parallel and persistent)."""
         try:
             import optuna
+            from optuna.trial import TrialState
             optuna.logging.set_verbosity(optuna.logging.WARNING)
         except ImportError:
             print("  Optuna not installed, using default hyperparameters")
@@ -159,7 +300,57 @@ class TradingModelTrainer:
             X_cv, y_cv = X_train, y_train
             print("\nRunning Optuna tuning...")
 
-        tscv = PurgedTimeSeriesSplit(n_splits=3, gap=10)
+        N_TRIALS = 25  # Reduced for VPS compatibility (3.8GB RAM)
+        workers = max(1, min(self.tune_workers, N_TRIALS))
+
+        # Parallel workers need a shared storage; fall back to a throwaway SQLite file
+        storage_url, tmp_dir = self.tune_storage, None
+        if storage_url is None and workers > 1:
+            tmp_dir = tempfile.mkdtemp(prefix='optuna_')
+            storage_url = f"sqlite:///{os.path.join(tmp_dir, 'study.db')}"
+        storage = _tune_storage(storage_url)
+        study_name = f"{self.tune_study}_{datetime.now():%Y%m%d_%H%M%S}"
+        study = optuna.create_study(direction='maximize', study_name=study_name, storage=storage,
+                                    pruner=_tune_pruner(self.tune_pruner))
+
+        if self.tune_storage:
+            warm = _previous_best_params(storage, self.tune_study, exclude=study_name)
+            for params in warm:
+                study.enqueue_trial(params, skip_if_exists=True)
+            if warm:
+                print(f"  Warm start: {len(warm)} best trials of the previous study queued first")
+
+        try:
+            if workers > 1:
+                n_jobs = max(1, (os.cpu_count() or 1) // workers)
+                print(f"  {workers} trial workers x {n_jobs} threads")
+                task = (X_cv, y_cv, spw, storage_url, study_name, self.tune_pruner, N_TRIALS, n_jobs)
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    list(pool.map(_tune_worker, [task] * workers))
+                study = optuna.load_study(study_name=study_name, storage=storage)
+            else:
+                study.optimize(self._tune_objective(_build_cv_folds(X_cv, y_cv), spw),
+                               n_trials=N_TRIALS, show_progress_bar=False)
+
+            best = dict(study.best_params)
+            best['n_estimators'] = study.best_trial.user_attrs.get('best_rounds', best['n_estimators'])
+            pruned = len(study.get_trials(deepcopy=False, states=(TrialState.PRUNED,)))
+            done = len(study.get_trials(deepcopy=False, states=(TrialState.COMPLETE,)))
+            print(f"\n  Optuna best trial ({done} complete, {pruned} pruned):")
+            print(f"    Score: {study.best_value:.4f}")
+        finally:
+            if tmp_dir:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        print(f"    max_depth={best['max_depth']}, lr={best['learning_rate']:.4f}, "
+              f"n_est={best['n_estimators']}, subsample={best['subsample']:.2f}")
+
+        return best
+
+    def _tune_objective(self, folds, spw):
+        """Optuna objective over pre-quantized CV folds (see _build_cv_folds)."""
+        import optuna
+        EARLY_STOPPING_ROUNDS = 50
 
         def objective(trial):
             params = {
@@ -174,24 +365,19 @@ class TradingModelTrainer:
                 'reg_lambda': trial.suggest_float('reg_lambda', 0.5, 3.0),
             }
 
-            cv_scores = []
-            for tr_idx, va_idx in tscv.split(X_cv):
-                Xf_tr, Xf_va = X_cv.iloc[tr_idx], X_cv.iloc[va_idx]
-                yf_tr, yf_va = y_cv.iloc[tr_idx], y_cv.iloc[va_idx]
-
-                model = xgb.XGBClassifier(
-                    **params,
-                    scale_pos_weight=spw,
-                    objective='binary:logistic',
-                    eval_metric='auc',
-                    random_state=42,
-                    n_jobs=-1,
-                    device=_xgb_device(),
-                    tree_method='hist',
-                    verbosity=0,
+            cv_scores, rounds = [], []
+            for fold, (dtr, dva, yf_va) in enumerate(folds):
+                # n_estimators is the round cap; early stopping on the validation fold decides
+                booster = xgb.train(
+                    self._native_params(params, spw), dtr,
+                    num_boost_round=params['n_estimators'],
+                    evals=[(dva, 'val')],
+                    early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                    callbacks=[_PruningCallback(trial, fold)],
+                    verbose_eval=False,
                 )
-                model.fit(Xf_tr, yf_tr, verbose=False)
-                probs = model.predict_proba(Xf_va)[:, 1]
+                rounds.append(booster.best_iteration + 1)
+                probs = booster.predict(dva, iteration_range=(0, booster.best_iteration + 1))
                 preds = (probs >= 0.5).astype(int)
 
                 auc = roc_auc_score(yf_va, probs)
@@ -202,19 +388,26 @@ class TradingModelTrainer:
                 score = 0.5 * auc + 0.25 * prec + 0.25 * (ps + 1) / 2
                 cv_scores.append(score)
 
-            return np.mean(cv_scores)
+                trial.report(float(np.mean(cv_scores)), (fold + 1) * FOLD_STEPS - 1)
+                if trial.should_prune():
+                    raise optuna.TrialPruned()
 
-        N_TRIALS = 25  # Reduced for VPS compatibility (3.8GB RAM)
-        study = optuna.create_study(direction='maximize')
-        study.optimize(objective, n_trials=N_TRIALS, show_progress_bar=False)
+            trial.set_user_attr('best_rounds', int(np.mean(rounds)))
+            return np.mean(cv_scores)
 
-        best = study.best_params
-        print(f"\n  Optuna best trial ({N_TRIALS} trials):")
-        print(f"    Score: {study.best_value:.4f}")
-        print(f"    max_depth={best['max_depth']}, lr={best['learning_rate']:.4f}, "
-              f"n_est={best['n_estimators']}, subsample={best['subsample']:.2f}")
+        return objective
 
-        return best
+    def _native_params(self, params, spw):
+        """sklearn-style hyperparameters -> native xgb.train params (n_estimators -> num_boost_round)."""
+        return {
+            'objective': 'binary:logistic', 'eval_metric': 'auc', 'tree_method': 'hist',
+            'device': _xgb_device(), 'seed': 42, 'verbosity': 0, 'scale_pos_weight': spw,
+            'nthread': self.n_jobs if self.n_jobs > 0 else os.cpu_count(),
+            'max_depth': params['max_depth'], 'eta': params['learning_rate'],
+            'subsample': params['subsample'], 'colsample_bytree': params['colsample_bytree'],
+            'min_child_weight': params['min_child_weight'], 'gamma': params['gamma'],
+            'alpha': params['reg_alpha'], 'lambda': params['reg_lambda'],
+        }
 
     def _default_params(self):
         """Fallback hyperparameters if Optuna is unavailable."""
@@ -230,8 +423,9 @@ class TradingModelTrainer:
             'reg_lambda': 2.0,
         }
 
-    def _train_ensemble(self, X_train, y_train, X_val, y_val, spw, xgb_params):
-        """Train LightGBM + CatBoost + meta-learner."""
+    def _train_ensemble(self, X_train, y_train, X_val, y_val, spw, xgb_params, init_models=None):
+        """Train LightGBM + CatBoost + meta-learner (init_models: continue from these)."""
+        init_models = init_models or {}
         self.ensemble_models = {}
 
         # LightGBM
@@ -250,7 +444,8 @@ class TradingModelTrainer:
                 n_jobs=-1,
                 verbosity=-1,
             )
-            lgb_model.fit(X_train, y_train)
+            init_lgb = init_models.get('lgbm')
+            lgb_model.fit(X_train, y_train, init_model=getattr(init_lgb, 'booster', init_lgb))
             self.ensemble_models['lgbm'] = lgb_model
             lgb_auc = roc_auc_score(y_val, lgb_model.predict_proba(X_val)[:, 1])
             print(f"    LightGBM val AUC: {lgb_auc:.4f}")
@@ -269,14 +464,17 @@ class TradingModelTrainer:
                 random_seed=42,
                 verbose=0,
             )
-            cb_model.fit(X_train, y_train)
+            cb_model.fit(X_train, y_train, init_model=init_models.get('catboost'))
             self.ensemble_models['catboost'] = cb_model
             cb_auc = roc_auc_score(y_val, cb_model.predict_proba(X_val)[:, 1])
             print(f"    CatBoost val AUC: {cb_auc:.4f}")
         except ImportError:
             print("  CatBoost not available, skipping")
 
-        # Meta-learner (LogisticRegression on base model outputs)
+        self._fit_meta_learner(X_val, y_val)
+
+    def _fit_meta_learner(self, X_val, y_val):
+        """Meta-learner (LogisticRegression on base model outputs) over the validation set."""
         if self.ensemble_models:
             from sklearn.linear_model import LogisticRegression
             print("  Training meta-learner...")
@@ -293,6 +491,108 @@ class TradingModelTrainer:
         else:
             self.meta_learner = None
 
+    def train_external(self, shard_dir, X_val, y_val=None, params=None, use_ensemble=False, cache_dir=None):
+        """
+        Out-of-core training over on-disk feature shards (src/core/feature_shards.py).
+        XGBoost reads the shards through an external-memory DataIter (quantized pages
+        cached on disk) and LightGBM through Sequences, so the full history never has
+        to fit in RAM. Optuna tunes on a uniform in-memory sample unless params is given.
+        X_val (DataFrame or TrainingData) is held in memory for calibration.
+        """
+        from src.core.feature_shards import FeatureShards, HAS_LIGHTGBM, peak_rss_mb
+
+        if not hasattr(xgb, 'ExtMemQuantileDMatrix'):
+            raise RuntimeError(f"Out-of-core training needs xgboost>=3.0 (installed: {xgb.__version__})")
+
+        shards = FeatureShards(shard_dir)
+        self.feature_names = list(shards.feature_names)
+        self.compiled = None
+        X_val, y_val = self._sanitize(X_val, y_val)
+        n_rows = len(shards)
+
+        print(f"\n{'='*60}")
+        print("TRADESAGE MODEL TRAINING v2 (out-of-core)")
+        print(f"{'='*60}")
+        print(f"Total training samples : {n_rows:,}  ({len(shards.shards)} shards)")
+        print(f"Features               : {len(self.feature_names)}")
+        print(f"Positive rate          : {shards.positives / max(n_rows, 1) * 100:.1f}%")
+
+        neg, pos = n_rows - shards.positives, shards.positives
+        spw = max(0.5, min(3.0, neg / max(1, pos)))
+        print(f"scale_pos_weight       : {spw:.2f}")
+
+        if params is not None:
+            best_params = {**self._default_params(), **params}
+        else:
+            X_cv, y_cv = shards.sample(400_000)
+            best_params = self._optuna_tune(X_cv, y_cv, spw)
+            del X_cv, y_cv
+
+        self.best_params = dict(best_params)
+        self.trained_until = max(sh['end'] for sh in shards.shards)[:10] if shards.shards else None
+
+        # ---- XGBoost on external memory ---- #
+        cache_dir = cache_dir or os.path.join(str(shard_dir), "_xgb_cache")
+        t0 = time.time()
+        it = shards.xgb_iter(cache_dir)
+        dtrain = xgb.ExtMemQuantileDMatrix(it, max_bin=256, nthread=self.n_jobs if self.n_jobs > 0 else None)
+        build_seconds = time.time() - t0
+        t1 = time.time()
+        booster = xgb.train(self._native_params(best_params, spw), dtrain, num_boost_round=best_params['n_estimators'])
+        train_seconds = time.time() - t1
+        del dtrain
+
+        # Same sklearn wrapper as train_model() so predict/save/importance work unchanged
+        self.model = xgb.XGBClassifier()
+        self.model.load_model(bytearray(booster.save_raw()))
+        print(f"  XGBoost training complete  n_estimators={best_params['n_estimators']}")
+
+        # ---- LightGBM from Sequences (CatBoost has no streaming input) ---- #
+        if use_ensemble:
+            self.ensemble_models = {}
+            if HAS_LIGHTGBM:
+                import lightgbm as lgb
+                from src.core.feature_shards import BoosterProba, ShardSequence
+                print("  Training LightGBM (out-of-core)...")
+                labels = np.concatenate([np.asarray(shards.load(i)[1]) for i in range(len(shards.shards))])
+                dataset = lgb.Dataset([ShardSequence(shards, i) for i in range(len(shards.shards))],
+                                      label=labels, feature_name=self.feature_names, free_raw_data=True)
+                lgb_booster = lgb.train({
+                    'objective': 'binary', 'max_depth': best_params['max_depth'],
+                    'learning_rate': best_params['learning_rate'],
+                    'bagging_fraction': best_params['subsample'], 'bagging_freq': 1,
+                    'feature_fraction': best_params['colsample_bytree'],
+                    'min_child_weight': best_params['min_child_weight'], 'scale_pos_weight': spw,
+                    'seed': 42, 'num_threads': self.n_jobs if self.n_jobs > 0 else 0, 'verbosity': -1,
+                }, dataset, num_boost_round=best_params['n_estimators'])
+                self.ensemble_models['lgbm'] = BoosterProba(lgb_booster)
+                lgb_auc = roc_auc_score(y_val, self.ensemble_models['lgbm'].predict_proba(X_val)[:, 1])
+                print(f"    LightGBM val AUC: {lgb_auc:.4f}")
+                del dataset, labels
+            else:
+                print("  LightGBM not available, skipping")
+            print("  CatBoost skipped (no out-of-core input)")
+            self._fit_meta_learner(X_val, y_val)
+
+        # ---- Isotonic calibration ---- #
+        print("  Calibrating probabilities (isotonic)...")
+        self.calibrator = IsotonicRegression(out_of_bounds='clip')
+        self.calibrator.fit(self._raw_predict(X_val), y_val)
+
+        rounds = best_params['n_estimators']
+        self.external_stats = {
+            'rows': n_rows,
+            'shards': len(shards.shards),
+            'dmatrix_seconds': round(build_seconds, 1),
+            'train_seconds': round(train_seconds, 1),
+            'rows_per_sec': round(n_rows * rounds / train_seconds) if train_seconds else None,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+        st = self.external_stats
+        print(f"  Out-of-core: DMatrix {st['dmatrix_seconds']}s, train {st['train_seconds']}s "
+              f"({st['rows_per_sec']:,} row-rounds/s), peak RSS {st['peak_rss_mb']} MB")
+        return self.model
+
     def _get_ensemble_features(self, X):
         """Get stacked predictions from all base models."""
         features = [self.model.predict_proba(X)[:, 1]]
@@ -310,7 +610,7 @@ class TradingModelTrainer:
     def predict_proba_calibrated(self, X):
         """Predict probabilities and calibrate them."""
         X, _ = self._sanitize(X)
-        if self.feature_names:
+        if self.feature_names and list(X.columns) != self.feature_names:
             for col in set(self.feature_names) - set(X.columns):
                 X[col] = 0
             X = X[self.feature_names]
@@ -320,15 +620,17 @@ class TradingModelTrainer:
             return self.calibrator.predict(raw_probs)
         return raw_probs
 
-    def evaluate_model(self, X_test, y_test):
+    def evaluate_model(self, X_test, y_test=None):
         """
         Evaluate with AUC, precision, recall, F1, win-rate, and profit_score.
+        X_test may be TrainingData (y_test then None).
         """
         if self.model is None:
             raise ValueError("No model trained.")
 
-        X_test, y_test = self._sanitize(X_test, y_test)
-
+        if isinstance(X_test, TrainingData):
+            y_test = X_test.y
+        # Scores TrainingData through views over its buffer; a DataFrame is sanitized once inside
         probs = self.predict_proba_calibrated(X_test)
         preds = (probs >= 0.5).astype(int)
 
@@ -386,12 +688,31 @@ class TradingModelTrainer:
         return metrics
 
     def predict(self, X):
+        """
+        (predictions, calibrated probabilities) for a feature DataFrame or a float32 matrix
+        in feature order, via the compiled predictor (src/core/fast_inference.py).
+        predict_proba_calibrated() remains the reference sklearn path.
+        """
         if self.model is None:
             raise ValueError("No model loaded.")
-        probs = self.predict_proba_calibrated(X)
+        if self.compiled is None:
+            self.compiled = self._compile()
+        if self.compiled and isinstance(X, pd.DataFrame):
+            probs = self.compiled.predict_frame(X)
+        elif self.compiled and isinstance(X, np.ndarray):
+            probs = self.compiled.predict(X)
+        else:
+            probs = self.predict_proba_calibrated(X)
         preds = (probs >= 0.5).astype(int)
         return preds, probs
 
+    def _compile(self):
+        try:
+            return CompiledPredictor(self)
+        except Exception as e:
+            print(f"  Fast inference unavailable ({e}); using the sklearn path")
+            return False
+
     def get_feature_importance(self, top_n=15):
         if self.model is None:
             raise ValueError("No model trained.")
@@ -409,7 +730,7 @@ class TradingModelTrainer:
             print(f"{i:2d}. {row['feature']:<30s} {row['importance']:.4f} {bar}")
         return imp
 
-    def save_model(self, path='tradesage_model.pkl'):
+    def save_model(self, path='tradesage_model.pkl', export=True):
         if self.model is None:
             raise ValueError("No model to save.")
         os.makedirs(os.path.dirname(path) if os.path.dirname(path) else '.', exist_ok=True)
@@ -418,6 +739,9 @@ class TradingModelTrainer:
             'feature_names':   self.feature_names,
             'metrics':         self.training_metrics,
             'calibrator':      self.calibrator,
+            'params':          self.best_params,
+            'trained_until':   self.trained_until,
+            'reference_window': self.reference_window,
         }
         # Save ensemble if present
         if self.ensemble_models:
@@ -427,6 +751,25 @@ class TradingModelTrainer:
 
         joblib.dump(save_data, path)
         print(f"  Model saved → {path}")
+        if export:
+            self._export_trees(path)
+
+    def _export_trees(self, path):
+        """Pure-NumPy inference artifact next to the pickle (src/core/tree_runtime.py), parity-checked."""
+        artifact = tree_artifact_path(path)
+        try:
+            export_trees(self, artifact)
+            diff = verify_export(self, TreeModel(artifact))
+        except Exception as e:
+            print(f"  Tree artifact export skipped: {e}")
+            if artifact.exists():
+                artifact.unlink()
+            return
+        if diff > 1e-4:  # float32 (XGBoost) vs float64 margin accumulation stays far below this
+            print(f"  Tree artifact parity check failed (max |Δp| {diff:.2e}) — not written")
+            artifact.unlink()
+            return
+        print(f"  Tree artifact → {artifact} (parity max |Δp| {diff:.1e})")
 
     def load_model(self, path='tradesage_model.pkl'):
         if not os.path.exists(path):
@@ -437,6 +780,9 @@ class TradingModelTrainer:
         self.training_metrics = data.get('metrics', {})
         self.calibrator       = data.get('calibrator')
         self.ensemble_models  = data.get('ensemble_models')
+        self.best_params      = data.get('params')
+        self.trained_until    = data.get('trained_until')
+        self.reference_window = data.get('reference_window')
         if hasattr(data, 'get'):
             meta = data.get('meta_learner')
             if meta is not None:
@@ -449,6 +795,7 @@ class TradingModelTrainer:
         print(f"  Saved AUC: {auc}")
         if self.ensemble_models:
             print(f"  Ensemble : {list(self.ensemble_models.keys())}")
+        self.compiled = self._compile()
 
     # ------------------------------------------------------------------ #
     #  INTERNAL                                                            #
@@ -456,6 +803,9 @@ class TradingModelTrainer:
 
     @staticmethod
     def _sanitize(X, y=None):
+        if isinstance(X, TrainingData):
+            X_view, y_view = X.frame()  # sanitized in place when built
+            return X_view, y_view if y is None else y
         X = X.copy()
         X.replace([np.inf, -np.inf], np.nan, inplace=True)
         X.fillna(0, inplace=True)
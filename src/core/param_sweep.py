@@ -0,0 +1,259 @@
+"""
+TradeSage Parameter Sweep
+Backtest parameter search that pays for feature engineering and model inference once:
+per-symbol predictions are cached on disk (keyed by model + data), then every
+parameter combination is just a simulation over the cached arrays, fanned out
+across worker processes that each load the cache a single time.
+
+Supports a full grid or an Optuna-driven search, and reports the Pareto front of
+total return vs max drawdown.
+"""
+
+import hashlib
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.core.backtesting import run_universe_backtest
+from src.core.portfolio_backtest import PortfolioBacktester, build_panel
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "data" / "sweep_cache"
+
+# Metrics copied into the results table for every run
+RESULT_METRICS = ['total_return_pct', 'annual_return_pct', 'max_drawdown_pct', 'sharpe_ratio',
+                  'calmar_ratio', 'win_rate', 'profit_factor', 'total_trades', 'total_fees']
+
+SIM_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'atr']
+
+
+# ══════════════════════════════════════════════════════════════
+#  PREDICTION CACHE — features + inference once per model/data
+# ══════════════════════════════════════════════════════════════
+
+def build_prediction_frames(trainer, engineer, stock_data, index_df=None, min_rows=1):
+    """
+    {symbol: DataFrame of OHLCV/atr + probability + prediction} for every symbol,
+    using the same feature and filtering path as scripts/backtest_angel_one.py.
+    """
+    frames = {}
+    for symbol, df in stock_data.items():
+        try:
+            df_features = engineer.add_technical_indicators(df, index_df=index_df).dropna()
+            if len(df_features) < min_rows:
+                continue
+            X_bt, _, _ = engineer.prepare_training_data(df_features)
+            if len(X_bt) < 1:
+                continue
+            predictions, probabilities = trainer.predict(X_bt)
+            df_sim = df_features.loc[X_bt.index]
+            frames[symbol] = df_sim[[c for c in SIM_COLUMNS if c in df_sim.columns]].assign(
+                probability=probabilities, prediction=predictions)
+        except Exception as e:
+            logger.debug(f"Prediction failed for {symbol}: {e}")
+    return frames
+
+
+class PredictionCache:
+    """joblib files of prediction frames, one per (model, data) fingerprint."""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(model_path, data_files, extra=""):
+        """Changes whenever the model file or any input CSV changes."""
+        h = hashlib.sha1()
+        for path in [Path(model_path)] + sorted(Path(p) for p in data_files):
+            st = path.stat()
+            h.update(f"{path.name}:{st.st_size}:{st.st_mtime_ns};".encode())
+        h.update(str(extra).encode())
+        return h.hexdigest()[:16]
+
+    def path_for(self, key):
+        return self.cache_dir / f"predictions_{key}.joblib"
+
+    def load(self, key):
+        path = self.path_for(key)
+        if not path.exists():
+            return None
+        try:
+            return joblib.load(path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable prediction cache {path.name}: {e}")
+            return None
+
+    def save(self, key, frames):
+        path = self.path_for(key)
+        tmp_path = path.with_suffix(".tmp")
+        joblib.dump(frames, tmp_path, compress=3)
+        os.replace(tmp_path, path)
+        return path
+
+    def get_or_build(self, key, build_fn):
+        frames = self.load(key)
+        if frames is not None:
+            logger.info(f"Loaded cached predictions for {len(frames)} symbols ({key})")
+            return frames
+        frames = build_fn()
+        self.save(key, frames)
+        logger.info(f"Cached predictions for {len(frames)} symbols ({key})")
+        return frames
+
+
+# ══════════════════════════════════════════════════════════════
+#  SWEEP
+# ══════════════════════════════════════════════════════════════
+
+def expand_grid(space: dict) -> list:
+    """{'a': [1, 2], 'b': [3]} -> [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}]"""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+# Per-process state, loaded once by the pool initializer
+_WORKER = {}
+
+
+def _init_worker(frames, engine, base_params, stop_drawdown_pct=None):
+    _WORKER['engine'] = engine
+    _WORKER['base_params'] = base_params
+    _WORKER['stop_drawdown_pct'] = stop_drawdown_pct
+    if engine == 'portfolio':
+        _WORKER['panel'] = build_panel(frames)
+    else:
+        _WORKER['inputs'] = {s: (df, df['prediction'].to_numpy(), df['probability'].to_numpy())
+                             for s, df in frames.items()}
+
+
+def _evaluate(params):
+    """Run one parameter combination against the worker's cached data."""
+    merged = {**_WORKER['base_params'], **params}
+    stopped = False
+    try:
+        if _WORKER['engine'] == 'portfolio':
+            stop = _WORKER['stop_drawdown_pct']
+            sim = PortfolioBacktester(**merged, verbose=False)
+            metrics = sim.run(_WORKER['panel'],
+                              stop_when=(lambda m: m.max_drawdown_pct <= stop) if stop is not None else None)
+            stopped = sim.stopped_early
+        else:
+            min_confidence = merged.pop('min_confidence', 0.6)
+            metrics = run_universe_backtest(_WORKER['inputs'], min_confidence=min_confidence,
+                                            workers=1, verbose=False, **merged)['summary']
+    except Exception as e:
+        logger.debug(f"Sweep run failed for {params}: {e}")
+        metrics = {}
+    return {**params, **{m: metrics.get(m, np.nan) for m in RESULT_METRICS}, 'stopped_early': stopped}
+
+
+class ParameterSweep:
+    """
+    Evaluate backtest parameter sets against cached predictions.
+
+    engine='portfolio' sweeps PortfolioBacktester kwargs (sl_atr_mult, tp_atr_mult,
+    max_hold_days, trade_prob, ...); engine='single' sweeps Backtester kwargs
+    (stop_loss_atr_multiplier, take_profit_pct, ...) plus min_confidence.
+
+    stop_drawdown_pct (portfolio engine) abandons a run as soon as its drawdown
+    reaches that level, e.g. -25; its row reports metrics up to that day.
+    """
+
+    def __init__(self, frames, engine='portfolio', base_params=None, workers=None, stop_drawdown_pct=None):
+        if engine not in ('portfolio', 'single'):
+            raise ValueError(f"Unknown sweep engine: {engine}")
+        self.frames = frames
+        self.engine = engine
+        self.base_params = dict(base_params or {})
+        self.workers = workers or os.cpu_count() or 1
+        self.stop_drawdown_pct = stop_drawdown_pct
+
+    @contextmanager
+    def _executor(self, n_tasks):
+        """
+        Worker pool for one run()/optimize() call: the frames are shipped and the panel
+        built once per worker, then reused by every batch. None = evaluate in-process.
+        """
+        if self.workers > 1 and n_tasks > 1:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(self.frames, self.engine, self.base_params,
+                                               self.stop_drawdown_pct)) as pool:
+                yield pool
+        else:
+            _init_worker(self.frames, self.engine, self.base_params, self.stop_drawdown_pct)
+            yield None
+
+    @staticmethod
+    def _map(pool, param_sets):
+        if pool is None:
+            return [_evaluate(p) for p in param_sets]
+        return list(pool.map(_evaluate, param_sets))
+
+    def run(self, param_sets) -> pd.DataFrame:
+        """Evaluate a list of parameter dicts (see expand_grid). One row per run."""
+        param_sets = list(param_sets)
+        logger.info(f"Sweeping {len(param_sets)} parameter sets on {self.workers} workers "
+                    f"({len(self.frames)} symbols, engine={self.engine})")
+        with self._executor(len(param_sets)) as pool:
+            return pd.DataFrame(self._map(pool, param_sets))
+
+    def optimize(self, space: dict, n_trials=100, objective='sharpe_ratio', seed=42) -> pd.DataFrame:
+        """
+        Optuna search over `space`: (low, high) tuples are ranges (int if both ends
+        are ints), lists are categorical. Trials are asked in batches of `workers`
+        and evaluated in parallel on one pool that lives for the whole search.
+        Returns every trial's row, like run().
+        """
+        import optuna
+        optuna.logging.set_verbosity(optuna.logging.WARNING)
+        study = optuna.create_study(direction='maximize', sampler=optuna.samplers.TPESampler(seed=seed))
+
+        rows = []
+        with self._executor(n_trials) as pool:
+            while len(rows) < n_trials:
+                batch = min(self.workers, n_trials - len(rows))
+                trials = [study.ask() for _ in range(batch)]
+                param_sets = [self._suggest(trial, space) for trial in trials]
+                for trial, row in zip(trials, self._map(pool, param_sets)):
+                    value = row.get(objective)
+                    study.tell(trial, float(value) if value is not None and np.isfinite(value) else float('-inf'))
+                    rows.append(row)
+        return pd.DataFrame(rows)
+
+    @staticmethod
+    def _suggest(trial, space):
+        params = {}
+        for name, spec in space.items():
+            if isinstance(spec, list):
+                params[name] = trial.suggest_categorical(name, spec)
+            elif isinstance(spec[0], int) and isinstance(spec[1], int):
+                params[name] = trial.suggest_int(name, spec[0], spec[1])
+            else:
+                params[name] = trial.suggest_float(name, float(spec[0]), float(spec[1]))
+        return params
+
+    @staticmethod
+    def pareto_front(results: pd.DataFrame, return_col='total_return_pct',
+                     drawdown_col='max_drawdown_pct') -> pd.DataFrame:
+        """
+        Runs not dominated on (higher return, shallower drawdown). Drawdowns are
+        negative percentages, so higher is better for both columns.
+        """
+        df = results.dropna(subset=[return_col, drawdown_col])
+        df = df.sort_values([return_col, drawdown_col], ascending=False)
+        keep, best_dd = [], -np.inf
+        for idx, dd in zip(df.index, df[drawdown_col].to_numpy()):
+            if dd > best_dd:
+                keep.append(idx)
+                best_dd = dd
+        return df.loc[keep]
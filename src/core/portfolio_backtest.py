@@ -0,0 +1,276 @@
+"""
+TradeSage Portfolio Backtester
+Date-major simulation of the live paper-trading rules across the whole universe:
+one shared cash pool, per-day candidate ranking, the scanner's entry filters and
+sizing, and the paper trader's exits — driven by (dates x symbols) matrices so each
+day is a handful of NumPy operations regardless of universe size.
+
+Production rules mirrored (services/scanner.py, scripts/live_trading_angel.py):
+    signal      pred == 1, prob >= 0.55, close >= ₹50, volume >= 1 lakh
+    levels      SL = close - 3.0 x ATR, TP = close + 3.5 x ATR (ATR fallback 2% of close)
+    candidates  top 10 signals by probability each day
+    auto-trade  prob >= 0.75, not already held, skipped when available cash <= ₹2,000
+    sizing      ₹1,000 risk / (entry - SL) shares, capped at min(₹10,000, available cash)
+    cash        ₹50,000 minus capital deployed at entry (realized P&L is not recycled)
+    exits       close >= TP -> close, else close <= SL -> SL, else held >= 5 days -> close
+The fundamental filter applied to the top 10 live is not simulated.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.core.backtesting import Backtester, StreamingMetrics
+
+logger = logging.getLogger(__name__)
+
+PANEL_FIELDS = ['open', 'high', 'low', 'close', 'volume', 'atr', 'probability', 'prediction']
+
+
+def build_panel(symbol_frames: dict) -> dict:
+    """
+    Align per-symbol frames into (dates x symbols) float matrices.
+    Each frame needs close, volume and probability; atr and prediction are optional
+    (prediction defaults to probability >= 0.5). Missing bars are NaN.
+    """
+    symbols = list(symbol_frames)
+    if not symbols:
+        return {'dates': pd.DatetimeIndex([]), 'symbols': [], **{f: np.empty((0, 0)) for f in PANEL_FIELDS}}
+
+    frames = []
+    for symbol in symbols:
+        df = symbol_frames[symbol]
+        df = df.rename(columns=str.lower)
+        cols = {f: df[f] for f in PANEL_FIELDS if f in df.columns}
+        if 'prediction' not in cols:
+            cols['prediction'] = (df['probability'] >= 0.5).astype(float)
+        frames.append(pd.DataFrame(cols, index=df.index))
+    wide = pd.concat(frames, axis=1, keys=symbols).sort_index()
+
+    panel = {'dates': pd.DatetimeIndex(wide.index), 'symbols': symbols}
+    for field in PANEL_FIELDS:
+        if field in wide.columns.get_level_values(1):
+            panel[field] = (wide.xs(field, axis=1, level=1)
+                            .reindex(columns=symbols).to_numpy(dtype=float))
+        else:
+            panel[field] = np.full((len(wide), len(symbols)), np.nan)
+    return panel
+
+
+class PortfolioBacktester:
+    """Shared-capital, multi-position backtest with the scanner's ranking and sizing rules."""
+
+    def __init__(self, capital=50000.0, max_trade_capital=10000.0, risk_per_trade=1000.0,
+                 min_cash=2000.0, signal_prob=0.55, trade_prob=0.75, top_n=10,
+                 max_positions=None, sl_atr_mult=3.0, tp_atr_mult=3.5, max_hold_days=5,
+                 min_price=50.0, min_volume=100000, brokerage_per_order=20.0,
+                 stt_pct=0.001, slippage_pct=0.001, compound=False, verbose=True):
+        self.capital = capital
+        self.max_trade_capital = max_trade_capital
+        self.risk_per_trade = risk_per_trade
+        self.min_cash = min_cash
+        self.signal_prob = signal_prob
+        self.trade_prob = trade_prob
+        self.top_n = top_n
+        self.max_positions = max_positions
+        self.sl_atr_mult = sl_atr_mult
+        self.tp_atr_mult = tp_atr_mult
+        self.max_hold_days = max_hold_days
+        self.min_price = min_price
+        self.min_volume = min_volume
+        self.brokerage = brokerage_per_order
+        self.stt_pct = stt_pct
+        self.slippage_pct = slippage_pct
+        self.compound = compound  # True: realized P&L is available for new trades
+        self.verbose = verbose
+
+        self.trades = []
+        self.equity = pd.Series(dtype=float)
+        self.stream = None  # StreamingMetrics of the last run
+        self.stopped_early = False
+        self.stats = {}
+
+    def size_position(self, entry, stop_loss, available_cash):
+        """The scanner's auto-trade sizing: fixed rupee risk, capped per trade and by cash."""
+        distance = entry - stop_loss
+        if distance <= 0:
+            distance = entry * 0.05  # Fallback to 5% SL distance
+        shares = int(self.risk_per_trade // distance)
+        max_capital = min(self.max_trade_capital, available_cash)
+        if shares * entry > max_capital:
+            shares = int(max_capital // entry)
+        return shares if entry > 0 else 0
+
+    def run(self, panel: dict, stop_when=None) -> dict:
+        """
+        Simulate over a panel from build_panel(). Returns metrics (see Backtester._calculate_metrics).
+        stop_when: optional callable(StreamingMetrics) -> bool checked after every day;
+        when it returns True open positions are closed at that day's close and the run ends.
+        """
+        dates, symbols = panel['dates'], panel['symbols']
+        close, volume = panel['close'], panel['volume']
+        prob, pred = panel['probability'], panel['prediction']
+        n_days, n_sym = close.shape
+
+        # Per-bar signal mask and levels for the whole panel at once
+        atr = panel['atr']
+        atr = np.where(np.isnan(atr) | (atr <= 0), close * 0.02, atr)
+        with np.errstate(invalid='ignore'):
+            signal = ((pred == 1) & (prob >= self.signal_prob) & (close >= self.min_price)
+                      & (volume >= self.min_volume))
+        entry_px = np.round(close, 2)
+        stop_px = np.round(close - self.sl_atr_mult * atr, 2)
+        target_px = np.round(close + self.tp_atr_mult * atr, 2)
+        last_close = pd.DataFrame(close).ffill().to_numpy()  # mark-to-market through data gaps
+        day_numbers = (dates.normalize() - dates[0].normalize()).days.to_numpy() if n_days else np.array([])
+
+        held = np.zeros(n_sym, dtype=bool)
+        shares = np.zeros(n_sym)
+        fill = np.zeros(n_sym)       # entry fill price (after slippage)
+        cost = np.zeros(n_sym)       # capital deployed at signal price (scanner's bookkeeping)
+        sl = np.zeros(n_sym)
+        tp = np.zeros(n_sym)
+        entry_day = np.zeros(n_sym, dtype=int)
+        entry_prob = np.zeros(n_sym)
+        entry_fee = np.zeros(n_sym)
+
+        cash = self.capital
+        realized = 0.0
+        self.trades = []
+        self.stopped_early = False
+        stream = self.stream = StreamingMetrics(self.capital, capacity=n_days + 1)
+        stream.update(self.capital)
+        stats = {'signals': 0, 'candidates': 0, 'skipped_cash': 0, 'skipped_slots': 0,
+                 'skipped_held': 0, 'max_concurrent': 0, 'position_days': 0}
+
+        for t in range(n_days):
+            # ─── EXITS (paper trader: close vs TP, then SL, then time) ───
+            if held.any():
+                idx = np.flatnonzero(held)
+                c = close[t, idx]
+                valid = ~np.isnan(c)
+                tp_hit = valid & (c >= tp[idx])
+                sl_hit = valid & ~tp_hit & (c <= sl[idx])
+                time_hit = valid & ~tp_hit & ~sl_hit & (day_numbers[t] - day_numbers[entry_day[idx]] >= self.max_hold_days)
+                exiting = tp_hit | sl_hit | time_hit
+                for k in np.flatnonzero(exiting):
+                    j = idx[k]
+                    if sl_hit[k]:
+                        reason, px = 'stop_loss', sl[j] * (1 - self.slippage_pct)
+                    elif tp_hit[k]:
+                        reason, px = 'take_profit', c[k] * (1 - self.slippage_pct / 2)
+                    else:
+                        reason, px = 'time_exit', c[k] * (1 - self.slippage_pct / 2)
+                    cash, realized = self._book_exit(j, px, t, reason, dates, symbols, shares, fill,
+                                                     entry_day, entry_prob, entry_fee, cash, realized)
+                    held[j] = False
+
+            # ─── ENTRIES (rank today's signals, auto-trade the top ones) ───
+            day_signal = signal[t]
+            n_signals = int(day_signal.sum())
+            if n_signals:
+                stats['signals'] += n_signals
+                cand = np.flatnonzero(day_signal)
+                p = prob[t, cand]
+                if len(cand) > self.top_n:
+                    top = np.argpartition(-p, self.top_n - 1)[:self.top_n]
+                    cand, p = cand[top], p[top]
+                order = np.argsort(-p, kind='stable')
+                cand, p = cand[order], p[order]
+                stats['candidates'] += len(cand)
+
+                deployed = cost[held].sum()
+                available = (self.capital + realized - deployed) if self.compound else (self.capital - deployed)
+                for j, pj in zip(cand, p):
+                    if pj < self.trade_prob:
+                        break  # sorted descending: nothing further qualifies
+                    if available <= self.min_cash:
+                        stats['skipped_cash'] += 1
+                        continue
+                    if held[j]:
+                        stats['skipped_held'] += 1
+                        continue
+                    if self.max_positions is not None and held.sum() >= self.max_positions:
+                        stats['skipped_slots'] += 1
+                        continue
+                    n = self.size_position(entry_px[t, j], stop_px[t, j], available)
+                    if n <= 0:
+                        continue
+                    available -= n * entry_px[t, j]  # Deduct for next iterations
+                    held[j] = True
+                    shares[j] = n
+                    fill[j] = entry_px[t, j] * (1 + self.slippage_pct)
+                    cost[j] = n * entry_px[t, j]
+                    sl[j], tp[j] = stop_px[t, j], target_px[t, j]
+                    entry_day[j] = t
+                    entry_prob[j] = pj
+                    entry_fee[j] = self.brokerage
+                    cash -= n * fill[j] + self.brokerage
+
+            n_held = int(held.sum())
+            stats['max_concurrent'] = max(stats['max_concurrent'], n_held)
+            stats['position_days'] += n_held
+            stream.update(cash + (shares[held] * last_close[t, held]).sum() if n_held else cash)
+            if stop_when is not None and stop_when(stream):
+                self.stopped_early = True
+                break
+
+        # ─── CLOSE ANY REMAINING POSITIONS AT THE LAST KNOWN CLOSE ───
+        last = stream.bars - 2  # day the run ended on
+        reason = 'early_stop' if self.stopped_early else 'end_of_data'
+        for j in np.flatnonzero(held):
+            cash, realized = self._book_exit(j, last_close[last, j], last, reason, dates, symbols,
+                                             shares, fill, entry_day, entry_prob, entry_fee, cash, realized)
+
+        days_run = stream.bars - 1
+        self.equity = pd.Series(stream.equity[1:].copy(), index=dates[:days_run], name='equity')
+        stats['avg_concurrent'] = round(stats['position_days'] / days_run, 2) if days_run else 0.0
+        self.stats = stats
+        return self._metrics(cash)
+
+    def _book_exit(self, j, px, t, reason, dates, symbols, shares, fill, entry_day,
+                   entry_prob, entry_fee, cash, realized):
+        """Record a closed trade; returns updated (cash, realized P&L)."""
+        n = shares[j]
+        sell_value = px * n
+        exit_fees = self.brokerage + sell_value * self.stt_pct
+        net_pnl = (px - fill[j]) * n - entry_fee[j] - exit_fees
+        trade = {
+            'symbol': symbols[j],
+            'entry_date': dates[entry_day[j]],
+            'exit_date': dates[t],
+            'entry_price': round(fill[j], 2),
+            'exit_price': round(px, 2),
+            'shares': int(n),
+            'gross_pnl': round((px - fill[j]) * n, 2),
+            'fees': round(entry_fee[j] + exit_fees, 2),
+            'net_pnl': round(net_pnl, 2),
+            'pnl_pct': round((px / fill[j] - 1) * 100, 2),
+            'exit_reason': reason,
+            'confidence': entry_prob[j],
+            'hold_days': (dates[t] - dates[entry_day[j]]).days,
+        }
+        self.trades.append(trade)
+        self.stream.record_trade(trade)
+        return cash + sell_value - exit_fees, realized + net_pnl
+
+    def _metrics(self, final_capital):
+        bt = Backtester(initial_capital=self.capital, stop_loss_atr_multiplier=self.sl_atr_mult,
+                        brokerage_per_order=self.brokerage, stt_pct=self.stt_pct,
+                        slippage_pct=self.slippage_pct, min_volume=self.min_volume, verbose=False)
+        bt.trades = self.trades
+        bt.equity_curve = self.stream.equity
+        bt.stream = self.stream
+        results = bt._calculate_metrics(final_capital)
+        results['portfolio'] = dict(self.stats)
+        if self.verbose and self.trades:
+            bt._print_results(results)
+            s = self.stats
+            print(f"Max Concurrent:      {s['max_concurrent']} (avg {s['avg_concurrent']})")
+            print(f"Skipped (cash/held/slots): {s['skipped_cash']}/{s['skipped_held']}/{s['skipped_slots']}")
+        return results
+
+    def get_trades_df(self):
+        """Returns trade log as DataFrame."""
+        return pd.DataFrame(self.trades)
@@ -0,0 +1,234 @@
+"""
+TradeSage Scan History
+Append-only, columnar log of every scan cycle's per-symbol output, plus a diff API
+reporting symbols whose probability crossed a threshold between two cycles.
+
+Layout (under data/scan_history/):
+    cycles.jsonl                 — one JSON line of cycle metadata per scan (append-only)
+    YYYYMMDD/<cycle_id>.npz      — compressed column arrays for that cycle
+"""
+
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_HISTORY_DIR = PROJECT_ROOT / "data" / "scan_history"
+
+# Features snapshotted per symbol (NaN when a symbol never reached feature engineering)
+KEY_FEATURES = [
+    'close', 'volume', 'atr_pct', 'rsi_14', 'adx', 'volume_ratio',
+    'dist_sma200', 'macd_hist_norm', 'bb_pct', 'rel_strength',
+]
+
+# Filter outcomes, stored as small ints in the log
+OUTCOMES = [
+    'fetch_failed',        # no OHLCV from Angel One
+    'no_features',         # too little data after feature engineering
+    'circuit',             # price or volume is zero
+    'penny',               # below minimum price
+    'illiquid',            # below minimum volume
+    'below_threshold',     # scored, but no BUY signal
+    'signal',              # BUY signal, not in the fundamental candidate pool
+    'fundamental_reject',  # rejected by FundamentalAnalyzer
+    'published',           # survived every filter and was published
+    'error',               # signal generation raised
+]
+_OUTCOME_CODE = {name: i for i, name in enumerate(OUTCOMES)}
+
+DEFAULT_THRESHOLDS = (0.55, 0.75)
+
+
+class ScanHistory:
+    """Writes one columnar snapshot per scan cycle and diffs consecutive cycles."""
+
+    def __init__(self, history_dir=None, key_features=None):
+        self.history_dir = Path(history_dir) if history_dir else DEFAULT_HISTORY_DIR
+        self.history_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.history_dir / "cycles.jsonl"
+        self.key_features = list(key_features or KEY_FEATURES)
+
+    # ------------------------------------------------------------------ #
+    #  WRITE                                                               #
+    # ------------------------------------------------------------------ #
+
+    def record_cycle(self, records, started_at=None, meta=None):
+        """
+        Persist one scan cycle.
+        records: list of dicts with symbol, probability, outcome, fetch_latency and
+                 an optional 'features' dict (see KEY_FEATURES).
+        Returns the cycle_id.
+        """
+        started_at = started_at or datetime.now()
+        cycle_id = started_at.strftime("%Y%m%d_%H%M%S")
+        day_dir = self.history_dir / started_at.strftime("%Y%m%d")
+        day_dir.mkdir(parents=True, exist_ok=True)
+
+        n = len(records)
+        symbols = np.array([r['symbol'] for r in records], dtype=str)
+        probability = np.full(n, np.nan, dtype=np.float32)
+        latency = np.full(n, np.nan, dtype=np.float32)
+        outcome = np.zeros(n, dtype=np.int8)
+        features = np.full((n, len(self.key_features)), np.nan, dtype=np.float32)
+
+        for i, r in enumerate(records):
+            if r.get('probability') is not None:
+                probability[i] = r['probability']
+            if r.get('fetch_latency') is not None:
+                latency[i] = r['fetch_latency']
+            outcome[i] = _OUTCOME_CODE.get(r.get('outcome', 'error'), _OUTCOME_CODE['error'])
+            feats = r.get('features') or {}
+            for j, name in enumerate(self.key_features):
+                v = feats.get(name)
+                if v is not None:
+                    features[i, j] = v
+
+        path = day_dir / f"{cycle_id}.npz"
+        tmp_path = day_dir / f".{cycle_id}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            symbol=symbols,
+            probability=probability,
+            fetch_latency=latency,
+            outcome=outcome,
+            features=features,
+            feature_names=np.array(self.key_features, dtype=str),
+        )
+        os.replace(tmp_path, path)
+
+        entry = {
+            'cycle_id': cycle_id,
+            'started_at': started_at.isoformat(),
+            'path': str(path.relative_to(self.history_dir)),
+            'symbols': n,
+            'outcomes': {name: int((outcome == code).sum()) for name, code in _OUTCOME_CODE.items()
+                         if (outcome == code).any()},
+            **(meta or {}),
+        }
+        with open(self.index_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+
+        logger.info(f"Scan snapshot saved: {cycle_id} ({n} symbols)")
+        return cycle_id
+
+    # ------------------------------------------------------------------ #
+    #  READ                                                                #
+    # ------------------------------------------------------------------ #
+
+    def list_cycles(self, limit=None):
+        """Cycle metadata, oldest first (last `limit` entries if given)."""
+        if not self.index_file.exists():
+            return []
+        cycles = []
+        with open(self.index_file, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if (self.history_dir / entry['path']).exists():
+                    cycles.append(entry)
+        return cycles[-limit:] if limit else cycles
+
+    def load_cycle(self, cycle_id=None):
+        """
+        Load a cycle's columns as a dict of arrays (latest cycle if cycle_id is None).
+        'outcome' is decoded back to strings.
+        """
+        cycles = self.list_cycles()
+        if not cycles:
+            return None
+        if cycle_id is None:
+            entry = cycles[-1]
+        else:
+            entry = next((c for c in cycles if c['cycle_id'] == cycle_id), None)
+            if entry is None:
+                return None
+
+        with np.load(self.history_dir / entry['path']) as data:
+            cycle = {k: data[k] for k in data.files}
+        cycle['outcome'] = np.array(OUTCOMES, dtype=object)[cycle['outcome']]
+        cycle['cycle_id'] = entry['cycle_id']
+        return cycle
+
+    def diff(self, cycle_id=None, prev_cycle_id=None, thresholds=DEFAULT_THRESHOLDS):
+        """
+        Symbols whose probability crossed any threshold between two cycles
+        (latest vs previous by default). Only symbols scored in both cycles are
+        compared — a symbol that failed to fetch, or is absent from one cycle, has
+        no probability there and is skipped rather than read as 0 (which would
+        report a spurious down-then-up crossing around a transient failure).
+        Returns a list of dicts sorted by absolute probability change.
+        """
+        cycles = self.list_cycles()
+        if len(cycles) < 2 and prev_cycle_id is None:
+            return []
+        if cycle_id is None:
+            cycle_id = cycles[-1]['cycle_id']
+        if prev_cycle_id is None:
+            ids = [c['cycle_id'] for c in cycles]
+            pos = ids.index(cycle_id) if cycle_id in ids else len(ids) - 1
+            if pos == 0:
+                return []
+            prev_cycle_id = ids[pos - 1]
+
+        cur = self.load_cycle(cycle_id)
+        prev = self.load_cycle(prev_cycle_id)
+        if cur is None or prev is None:
+            return []
+
+        cur_prob = {s: p for s, p in zip(cur['symbol'].tolist(), cur['probability'].tolist()) if np.isfinite(p)}
+        prev_prob = {s: p for s, p in zip(prev['symbol'].tolist(), prev['probability'].tolist()) if np.isfinite(p)}
+
+        symbols = sorted(set(cur_prob) & set(prev_prob))
+        p_now = np.array([cur_prob[s] for s in symbols], dtype=np.float32)
+        p_before = np.array([prev_prob[s] for s in symbols], dtype=np.float32)
+
+        changes = []
+        for t in sorted(thresholds):
+            up = np.flatnonzero((p_before < t) & (p_now >= t))
+            down = np.flatnonzero((p_before >= t) & (p_now < t))
+            for idx, direction in [(i, 'up') for i in up] + [(i, 'down') for i in down]:
+                changes.append({
+                    'symbol': symbols[idx],
+                    'threshold': t,
+                    'direction': direction,
+                    'prev_probability': round(float(p_before[idx]), 4),
+                    'probability': round(float(p_now[idx]), 4),
+                })
+
+        changes.sort(key=lambda c: abs(c['probability'] - c['prev_probability']), reverse=True)
+        return changes
+
+    # ------------------------------------------------------------------ #
+    #  MAINTENANCE                                                         #
+    # ------------------------------------------------------------------ #
+
+    def prune(self, keep_days=30):
+        """Delete day directories older than keep_days and compact the index to the cycles left."""
+        cutoff = (datetime.now() - timedelta(days=keep_days)).strftime("%Y%m%d")
+        removed = 0
+        for day_dir in self.history_dir.iterdir():
+            if day_dir.is_dir() and day_dir.name.isdigit() and day_dir.name < cutoff:
+                shutil.rmtree(day_dir, ignore_errors=True)
+                removed += 1
+
+        if removed and self.index_file.exists():
+            kept = self.list_cycles()
+            tmp_path = self.index_file.with_name(f".{self.index_file.name}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in kept:
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(tmp_path, self.index_file)
+            logger.info(f"Scan history pruned: {removed} day(s) removed, {len(kept)} cycles kept")
+        return removed
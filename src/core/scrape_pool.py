@@ -0,0 +1,222 @@
+"""
+TradeSage Scrape Pool
+Concurrent page fetching through Obscura for bulk Screener refreshes.
+
+Two fetch modes:
+    - persistent: one `obscura serve` CDP process shared by all workers, each worker
+      keeping its own page open for the whole batch (needs `playwright`)
+    - cli: one `obscura fetch` subprocess per URL (always available)
+Either way, page loads across all workers go through one polite global rate limit,
+failed loads are retried with backoff, and throughput is tracked in get_stats().
+"""
+
+import logging
+import queue
+import subprocess
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+try:
+    from playwright.sync_api import sync_playwright
+    HAS_PLAYWRIGHT = True
+except ImportError:
+    HAS_PLAYWRIGHT = False
+
+
+class PoliteRateLimiter:
+    """Thread-safe limiter spacing calls at least 1/rate seconds apart, globally."""
+
+    def __init__(self, rate_per_sec: float = 2.0):
+        self.interval = 1.0 / rate_per_sec if rate_per_sec > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait_for = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait_for > 0:
+            time.sleep(wait_for)
+
+
+class ObscuraPool:
+    """Fetches many URLs concurrently through Obscura under a global rate limit."""
+
+    def __init__(self, obscura_bin: str, workers: int = 4, rate_per_sec: float = 2.0,
+                 retries: int = 2, timeout: float = 30, serve_port: int = None):
+        self.obscura_bin = obscura_bin
+        self.workers = max(1, int(workers))
+        self.retries = retries
+        self.timeout = timeout
+        self.serve_port = serve_port
+        self.limiter = PoliteRateLimiter(rate_per_sec)
+
+        self._server = None
+        self._endpoint = None
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.stats = {'pages': 0, 'failed': 0, 'retries': 0, 'seconds': 0.0, 'mode': 'cli'}
+
+    # ------------------------------------------------------------------ #
+    #  LIFECYCLE                                                           #
+    # ------------------------------------------------------------------ #
+
+    def start(self):
+        """Launch the persistent Obscura CDP server if configured and usable."""
+        if not self.serve_port:
+            return self
+        if not HAS_PLAYWRIGHT:
+            logger.info("playwright not installed — Obscura pool using one subprocess per URL")
+            return self
+        try:
+            self._server = subprocess.Popen(
+                [self.obscura_bin, "serve", "--port", str(self.serve_port), "--stealth"],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            time.sleep(1.0)  # give the CDP endpoint a moment to come up
+            if self._server.poll() is not None:
+                raise RuntimeError(f"obscura serve exited with code {self._server.returncode}")
+            self._endpoint = f"http://127.0.0.1:{self.serve_port}"
+            self.stats['mode'] = 'persistent'
+            logger.info(f"Obscura CDP server running on port {self.serve_port}")
+        except Exception as e:
+            logger.warning(f"Could not start persistent Obscura ({e}) — falling back to subprocess per URL")
+            self._server = None
+            self._endpoint = None
+        return self
+
+    def close(self):
+        if self._server is not None:
+            self._server.terminate()
+            try:
+                self._server.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._server.kill()
+            self._server = None
+            self._endpoint = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------ #
+    #  FETCHING                                                            #
+    # ------------------------------------------------------------------ #
+
+    def fetch(self, url: str) -> str:
+        """Rate-limited fetch with retries. Returns HTML, or "" if every attempt failed."""
+        for attempt in range(self.retries + 1):
+            if attempt:
+                with self._stats_lock:
+                    self.stats['retries'] += 1
+                time.sleep(2 ** attempt)
+            self.limiter.acquire()
+            html = self._fetch_persistent(url) if self._endpoint else self._fetch_cli(url)
+            if html:
+                with self._stats_lock:
+                    self.stats['pages'] += 1
+                return html
+        with self._stats_lock:
+            self.stats['failed'] += 1
+        return ""
+
+    def _fetch_cli(self, url: str) -> str:
+        try:
+            cmd = [self.obscura_bin, "fetch", url, "--stealth", "--dump", "html", "--quiet"]
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.timeout)
+            if result.returncode != 0:
+                logger.debug(f"Obscura execution failed: {result.stderr}")
+                return ""
+            return result.stdout
+        except Exception as e:
+            logger.debug(f"Error running Obscura for {url}: {e}")
+            return ""
+
+    def _fetch_persistent(self, url: str) -> str:
+        try:
+            page = self._thread_page()
+            page.goto(url, timeout=self.timeout * 1000, wait_until="domcontentloaded")
+            return page.content()
+        except Exception as e:
+            logger.debug(f"Persistent Obscura fetch failed for {url}: {e}")
+            self._close_thread_session()  # reconnect on the next attempt
+            return ""
+
+    def _thread_page(self):
+        """The calling worker's page; playwright sync objects are bound to their thread."""
+        if getattr(self._local, 'page', None) is None:
+            pw = sync_playwright().start()
+            browser = pw.chromium.connect_over_cdp(self._endpoint)
+            context = browser.contexts[0] if browser.contexts else browser.new_context()
+            self._local.pw, self._local.browser = pw, browser
+            self._local.page = context.new_page()
+        return self._local.page
+
+    def _close_thread_session(self):
+        for attr in ('page', 'browser'):
+            obj = getattr(self._local, attr, None)
+            if obj is not None:
+                try:
+                    obj.close()
+                except Exception:
+                    pass
+            setattr(self._local, attr, None)
+        pw = getattr(self._local, 'pw', None)
+        if pw is not None:
+            try:
+                pw.stop()
+            except Exception:
+                pass
+            self._local.pw = None
+
+    def map(self, fn, items):
+        """
+        Run fn(item) for every item on `workers` long-lived threads; fn is expected to
+        call self.fetch. Yields (item, result) as each finishes (result None on error).
+        """
+        work = queue.Queue()
+        total = 0
+        for item in items:
+            work.put(item)
+            total += 1
+        done = queue.Queue()
+        t0 = time.time()
+
+        def worker():
+            try:
+                while True:
+                    try:
+                        item = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        result = fn(item)
+                    except Exception as e:
+                        logger.debug(f"Scrape task failed for {item}: {e}")
+                        result = None
+                    done.put((item, result))
+            finally:
+                self._close_thread_session()
+
+        threads = [threading.Thread(target=worker, name=f"obscura-{i}", daemon=True)
+                   for i in range(min(self.workers, total))]
+        for t in threads:
+            t.start()
+
+        for _ in range(total):
+            yield done.get()
+        for t in threads:
+            t.join()
+        with self._stats_lock:
+            self.stats['seconds'] = round(self.stats['seconds'] + time.time() - t0, 3)
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            s = dict(self.stats)
+        s['pages_per_sec'] = round(s['pages'] / s['seconds'], 3) if s['seconds'] else 0.0
+        return s
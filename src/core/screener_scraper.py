@@ -4,34 +4,30 @@ import sys
 import tempfile
 import logging
 import platform
-import json
-import time
+import calendar
+from datetime import datetime, timedelta
 from pathlib import Path
 from bs4 import BeautifulSoup
 
+from src.core.fundamentals_store import FundamentalsStore
+from src.core.scrape_pool import ObscuraPool
+
 logger = logging.getLogger(__name__)
 
 # ── Disk cache for fundamentals (avoids re-scraping during training) ──
-_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / "data_cache" / "fundamentals"
-_CACHE_DIR.mkdir(parents=True, exist_ok=True)
-_CACHE_FILE = _CACHE_DIR / "fundamentals_cache.json"
 _CACHE_MAX_AGE_DAYS = 7  # Re-scrape after 7 days
 
-def _load_cache() -> dict:
-    if _CACHE_FILE.exists():
-        try:
-            with open(_CACHE_FILE, "r") as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
+# Bulk refresh pool: concurrent Obscura workers under one polite global rate limit
+SCRAPE_WORKERS = int(os.getenv("SCREENER_SCRAPE_WORKERS", "4"))
+SCRAPE_RATE_PER_SEC = float(os.getenv("SCREENER_RATE_PER_SEC", "2.0"))
+SCRAPE_RETRIES = int(os.getenv("SCREENER_SCRAPE_RETRIES", "2"))
+OBSCURA_SERVE_PORT = int(os.getenv("OBSCURA_SERVE_PORT", "0")) or None  # 0 = one subprocess per URL
+_SAVE_EVERY = 50  # write scraped symbols to the store in transactions of this size
 
-def _save_cache(cache: dict):
-    try:
-        with open(_CACHE_FILE, "w") as f:
-            json.dump(cache, f, indent=2)
-    except Exception as e:
-        logger.debug(f"Failed to save fundamentals cache: {e}")
+# Days after a reporting period ends before its numbers are public (point-in-time history):
+# quarterly shareholding is filed within ~21 days, annual results within ~60
+_SHAREHOLDING_LAG_DAYS = 21
+_ANNUAL_LAG_DAYS = 60
 
 
 class ScreenerScraper:
@@ -43,8 +39,9 @@ class ScreenerScraper:
     def __init__(self):
         self.project_root = Path(__file__).resolve().parent.parent.parent
         self.obscura_bin = self._find_obscura()
-        self._mem_cache = {}  # In-memory cache for current session
-        self._disk_cache = _load_cache()
+        # Single cache layer: the SQLite store applies the TTL on every read, so a
+        # long-lived scraper (the scanner's) still re-scrapes after _CACHE_MAX_AGE_DAYS
+        self.store = FundamentalsStore(max_age_days=_CACHE_MAX_AGE_DAYS)
         
     def _find_obscura(self):
         """Find the Obscura binary based on OS."""
@@ -68,65 +65,95 @@ class ScreenerScraper:
         Returns a dictionary of key metrics.
         Uses disk cache to avoid redundant scraping during training.
         """
-        # Check in-memory cache first (fastest)
-        if use_cache and symbol in self._mem_cache:
-            return self._mem_cache[symbol]
-            
-        # Check disk cache (fast, survives restarts)
-        if use_cache and symbol in self._disk_cache:
-            entry = self._disk_cache[symbol]
-            age_days = (time.time() - entry.get("_ts", 0)) / 86400
-            if age_days < _CACHE_MAX_AGE_DAYS:
-                data = {k: v for k, v in entry.items() if not k.startswith("_")}
-                self._mem_cache[symbol] = data
-                return data
-        
-        # Live scrape
+        if use_cache:
+            cached = self._cached(symbol)
+            if cached is not None:
+                return cached
+
+        scraped = self._scrape(symbol, self._run_obscura)
+        if scraped is None:
+            return {}
+        result, history = scraped
+        self._store(symbol, result, history)
+        return result
+
+    def _cached(self, symbol: str):
+        """Fresh store entry for a symbol (None if missing or older than the TTL)."""
+        return self.store.get(symbol)
+
+    def _scrape(self, symbol: str, fetch):
+        """
+        Live scrape via `fetch(url) -> html`: consolidated page, then standalone.
+        Returns (latest metrics, point-in-time history rows), or None on failure.
+        """
         formatted_sym = symbol.replace("&", "%26")
         url = f"https://www.screener.in/company/{formatted_sym}/consolidated/"
-        
-        html = self._run_obscura(url)
+
+        html = fetch(url)
         if not html or "404 Not Found" in html or "Oops" in html:
             url_standalone = f"https://www.screener.in/company/{formatted_sym}/"
             logger.debug(f"Consolidated not found for {symbol}, trying standalone: {url_standalone}")
-            html = self._run_obscura(url_standalone)
-            
+            html = fetch(url_standalone)
+
         if not html:
             logger.warning(f"Failed to fetch HTML for {symbol} via Obscura.")
-            return {}
-            
-        result = self._parse_html(html)
-        
-        # Save to both caches
-        self._mem_cache[symbol] = result
-        self._disk_cache[symbol] = {**result, "_ts": time.time()}
-        _save_cache(self._disk_cache)
-        
-        return result
+            return None
+
+        soup = BeautifulSoup(html, "html.parser")
+        return self._parse_soup(soup), self._parse_history(soup)
+
+    def _store(self, symbol: str, result: dict, history: list = None):
+        """Save to the store (latest metrics + point-in-time history)."""
+        self.store.put_many({symbol: result}, history={symbol: history or []})
     
-    def fetch_fundamentals_batch(self, symbols: list, delay: float = 1.0) -> dict:
+    def fetch_fundamentals_batch(self, symbols: list, delay: float = None, workers: int = None) -> dict:
         """
-        Fetch fundamentals for a list of symbols with rate limiting.
+        Fetch fundamentals for a list of symbols.
+        Cached symbols are served directly; the rest are scraped concurrently through an
+        ObscuraPool (SCREENER_SCRAPE_WORKERS workers, SCREENER_RATE_PER_SEC global page rate,
+        retries with backoff). `delay`, if given, overrides the rate as seconds between pages.
         Returns {symbol: {metrics}} dict.
         Used by the training pipeline.
         """
         results = {}
-        cached = 0
-        scraped = 0
-        
+        to_scrape = []
+        stored = self.store.get_many(symbols)
         for symbol in symbols:
-            data = self.fetch_fundamentals(symbol, use_cache=True)
-            if data:
-                results[symbol] = data
-                # If it came from cache, no delay needed
-                if symbol in self._disk_cache:
-                    age_days = (time.time() - self._disk_cache[symbol].get("_ts", 0)) / 86400
-                    if age_days < _CACHE_MAX_AGE_DAYS:
-                        cached += 1
+            data = stored.get(symbol)
+            if data is not None:
+                if data:
+                    results[symbol] = data
+            else:
+                to_scrape.append(symbol)
+        cached = len(results)
+
+        scraped = 0
+        if to_scrape:
+            rate = 1.0 / delay if delay else SCRAPE_RATE_PER_SEC
+            pool = ObscuraPool(self.obscura_bin, workers=workers or SCRAPE_WORKERS,
+                               rate_per_sec=rate, retries=SCRAPE_RETRIES, serve_port=OBSCURA_SERVE_PORT)
+            logger.info(f"Scraping {len(to_scrape)} symbols from Screener "
+                        f"({pool.workers} workers, {rate:.2f} pages/sec max)...")
+            pending, pending_history = {}, {}
+            with pool:
+                for symbol, scraped_data in pool.map(lambda s: self._scrape(s, pool.fetch), to_scrape):
+                    if scraped_data is None:
                         continue
-                scraped += 1
-                time.sleep(delay)  # Rate limit live scrapes
-            
+                    result, pending_history[symbol] = scraped_data
+                    scraped += 1
+                    pending[symbol] = result
+                    if result:
+                        results[symbol] = result
+                    if len(pending) >= _SAVE_EVERY:
+                        self.store.put_many(pending, history=pending_history)
+                        pending, pending_history = {}, {}
+            self.store.put_many(pending, history=pending_history)
+
+            stats = pool.get_stats()
+            logger.info(f"Screener scrape: {stats['pages']} pages in {stats['seconds']:.0f}s "
+                        f"({stats['pages_per_sec']:.2f} pages/sec, {stats['retries']} retries, "
+                        f"{stats['failed']} failed, mode={stats['mode']})")
+
         logger.info(f"Fundamentals batch: {len(results)}/{len(symbols)} fetched "
                      f"({cached} cached, {scraped} scraped)")
         return results
@@ -156,7 +183,10 @@ class ScreenerScraper:
 
     def _parse_html(self, html: str) -> dict:
         """Parse Screener HTML using BeautifulSoup."""
-        soup = BeautifulSoup(html, "html.parser")
+        return self._parse_soup(BeautifulSoup(html, "html.parser"))
+
+    def _parse_soup(self, soup) -> dict:
+        """Latest values: top ratios, latest shareholding quarter, latest balance sheet."""
         data = {}
         
         # 1. Ratios
@@ -212,7 +242,7 @@ class ScreenerScraper:
                     latest_val = cols[-1].text.strip().replace(",", "")
                     if "Borrowings" in name:
                         borrowings = float(latest_val) if latest_val.replace('.', '').isdigit() else 0
-                    if "Share Capital" in name or "Reserves" in name:
+                    if "Share Capital" in name or "Equity Capital" in name or "Reserves" in name:
                         equity += float(latest_val) if latest_val.replace('.', '').isdigit() else 0
                 if equity > 0:
                     data["debt_to_equity"] = borrowings / equity
@@ -233,6 +263,103 @@ class ScreenerScraper:
         # Clean up keys
         return {k: v for k, v in result.items() if v is not None}
 
+    # ------------------------------------------------------------------ #
+    #  POINT-IN-TIME HISTORY                                               #
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _period_end(header: str):
+        """'Mar 2023' -> 2023-03-31; None for 'TTM' and other non-period headers."""
+        try:
+            d = datetime.strptime(header.strip(), "%b %Y")
+        except ValueError:
+            return None
+        return d.replace(day=calendar.monthrange(d.year, d.month)[1])
+
+    @staticmethod
+    def _to_float(text: str):
+        try:
+            return float(text.strip().replace(",", "").replace("%", ""))
+        except ValueError:
+            return None
+
+    def _table_rows(self, section):
+        """{row name: {period_end: value}} for the first data table in a Screener section."""
+        table = section.find("table") if section else None
+        if not table:
+            return {}
+        periods = [self._period_end(th.text) for th in table.find_all("th")[1:]]
+        rows = {}
+        for row in table.find_all("tr"):
+            cols = row.find_all("td")
+            if not cols:
+                continue
+            name = cols[0].text.replace("\xa0", " ").replace("+", "").strip()
+            values = {}
+            for period, col in zip(periods, cols[1:]):
+                value = self._to_float(col.text)
+                if period is not None and value is not None:
+                    values[period] = value
+            rows[name] = values
+        return rows
+
+    def _parse_history(self, soup) -> list:
+        """
+        Per-period history from Screener's tables, dated by when each number became public
+        (period end + disclosure lag). Returns [(as_of 'YYYY-MM-DD', metric, value), ...]:
+        quarterly promoter/FII/DII holding, annual debt_to_equity, eps, roce, roe_annual
+        (net profit / year-end equity) and dps (EPS x dividend payout).
+        """
+        history = []
+
+        def add(rows, lag_days, metric):
+            for period, value in rows.items():
+                as_of = (period + timedelta(days=lag_days)).strftime("%Y-%m-%d")
+                history.append((as_of, metric, value))
+
+        # 1. Quarterly shareholding (first table in the section is the quarterly one)
+        for name, values in self._table_rows(soup.find("section", {"id": "shareholding"})).items():
+            lname = name.lower()
+            if "promoter" in lname:
+                add(values, _SHAREHOLDING_LAG_DAYS, "promoter_holding")
+            elif "fii" in lname:
+                add(values, _SHAREHOLDING_LAG_DAYS, "fii_holding")
+            elif "dii" in lname:
+                add(values, _SHAREHOLDING_LAG_DAYS, "dii_holding")
+
+        # 2. Annual balance sheet -> debt to equity
+        borrowings, equity = {}, {}
+        for name, values in self._table_rows(soup.find("section", {"id": "balance-sheet"})).items():
+            if "Borrowings" in name:
+                borrowings = values
+            if "Share Capital" in name or "Equity Capital" in name or "Reserves" in name:
+                for period, value in values.items():
+                    equity[period] = equity.get(period, 0.0) + value
+        add({p: borrowings.get(p, 0.0) / e for p, e in equity.items() if e > 0},
+            _ANNUAL_LAG_DAYS, "debt_to_equity")
+
+        # 3. Annual EPS and dividend per share (P/E and yield are rebuilt per bar from price),
+        #    ROE from net profit over the balance-sheet equity, and ROCE
+        eps, net_profit, payout = {}, {}, {}
+        for name, values in self._table_rows(soup.find("section", {"id": "profit-loss"})).items():
+            if name.startswith("EPS"):
+                eps = values
+            elif name.startswith("Net Profit"):
+                net_profit = values
+            elif name.startswith("Dividend Payout"):
+                payout = values
+        add(eps, _ANNUAL_LAG_DAYS, "eps")
+        add({p: v / equity[p] * 100 for p, v in net_profit.items() if equity.get(p, 0) > 0},
+            _ANNUAL_LAG_DAYS, "roe_annual")
+        add({p: eps[p] * v / 100 for p, v in payout.items() if p in eps},
+            _ANNUAL_LAG_DAYS, "dps")
+        for name, values in self._table_rows(soup.find("section", {"id": "ratios"})).items():
+            if name.startswith("ROCE"):
+                add(values, _ANNUAL_LAG_DAYS, "roce")
+
+        return history
+
+
 if __name__ == "__main__":
     # Test script locally
     logging.basicConfig(level=logging.DEBUG)
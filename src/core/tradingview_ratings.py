@@ -0,0 +1,140 @@
+"""
+TradeSage TradingView Ratings
+26-indicator TradingView consensus for many symbols in one scanner request
+(tradingview_ta.get_multiple_analysis), cached per (symbol, interval) with an
+interval-specific TTL — a daily rating barely moves between 15-minute scans.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from tradingview_ta import Interval, get_multiple_analysis
+
+logger = logging.getLogger(__name__)
+
+# Cache lifetime per interval (seconds); daily is overridable via TV_RATING_TTL_MINUTES
+DEFAULT_TTL = {
+    Interval.INTERVAL_1_DAY: float(os.getenv("TV_RATING_TTL_MINUTES", "15")) * 60,
+    Interval.INTERVAL_1_HOUR: 5 * 60,
+    Interval.INTERVAL_15_MINUTES: 2 * 60,
+}
+
+UNKNOWN_RATING = {'recommendation': 'UNKNOWN', 'buy': 0, 'sell': 0, 'neutral': 0, 'score': 0.0}
+
+
+class TradingViewRatings:
+    """Batched, TTL-cached TradingView ratings for NSE symbols."""
+
+    def __init__(self, exchange="NSE", screener="india", ttl=None, chunk_size=200, timeout=10):
+        self.exchange = exchange
+        self.screener = screener
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self._cache = {}  # {(symbol, interval): (timestamp, rating)}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'requests': 0, 'errors': 0, 'request_seconds': 0.0}
+
+    @staticmethod
+    def summarize(summary: dict) -> dict:
+        """Analysis.summary -> rating dict with a weighted score in [-1, 1]."""
+        recommendation = summary.get('RECOMMENDATION', 'UNKNOWN')
+        buy_count = summary.get('BUY', 0)
+        sell_count = summary.get('SELL', 0)
+        neutral_count = summary.get('NEUTRAL', 0)
+        total = buy_count + sell_count + neutral_count
+
+        # Weighted score: -1.0 (strong sell) to +1.0 (strong buy)
+        if total > 0:
+            weighted_score = round((buy_count - sell_count) / total, 3)
+        else:
+            weighted_score = 0.0
+
+        return {
+            'recommendation': recommendation,
+            'buy': buy_count,
+            'sell': sell_count,
+            'neutral': neutral_count,
+            'score': weighted_score,  # -1.0 to +1.0
+        }
+
+    def get_ratings(self, symbols, interval=Interval.INTERVAL_1_DAY) -> dict:
+        """
+        {symbol: rating} for every symbol. Fresh cache entries are served directly;
+        the rest are fetched in as few multi-symbol requests as possible. Symbols
+        TradingView has no data for (or that failed) come back as UNKNOWN and are not cached.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        ttl = self.ttl.get(interval, DEFAULT_TTL[Interval.INTERVAL_1_DAY])
+        now = time.time()
+
+        ratings, missing = {}, []
+        with self._lock:
+            for symbol in symbols:
+                hit = self._cache.get((symbol, interval))
+                if hit is not None and now - hit[0] < ttl:
+                    ratings[symbol] = dict(hit[1])
+                else:
+                    missing.append(symbol)
+            self.stats['hits'] += len(ratings)
+            self.stats['misses'] += len(missing)
+
+        for i in range(0, len(missing), self.chunk_size):
+            chunk = missing[i:i + self.chunk_size]
+            fetched = self._fetch(chunk, interval)
+            with self._lock:
+                for symbol, rating in fetched.items():
+                    self._cache[(symbol, interval)] = (time.time(), rating)
+            for symbol in chunk:
+                ratings[symbol] = dict(fetched.get(symbol, UNKNOWN_RATING))
+
+        return ratings
+
+    def get_rating(self, symbol, interval=Interval.INTERVAL_1_DAY) -> dict:
+        return self.get_ratings([symbol], interval)[symbol]
+
+    def _fetch(self, symbols, interval) -> dict:
+        """One scanner request for `symbols`. Returns {symbol: rating} for those with data."""
+        t0 = time.time()
+        try:
+            analyses = get_multiple_analysis(
+                screener=self.screener,
+                interval=interval,
+                symbols=[f"{self.exchange}:{s}" for s in symbols],
+                timeout=self.timeout,
+            )
+        except Exception as e:
+            logger.debug(f"TradingView batch fetch failed for {len(symbols)} symbols: {e}")
+            with self._lock:
+                self.stats['errors'] += 1
+            return {}
+        finally:
+            with self._lock:
+                self.stats['requests'] += 1
+                self.stats['request_seconds'] = round(self.stats['request_seconds'] + time.time() - t0, 3)
+
+        # The library uppercases tickers in its result keys; map them back to what was asked for
+        requested = {f"{self.exchange}:{s}".upper(): s for s in symbols}
+        out = {}
+        for key, analysis in (analyses or {}).items():
+            if analysis is None:
+                continue
+            symbol = requested.get(key.upper(), key.split(":", 1)[-1])
+            out[symbol] = self.summarize(analysis.summary)
+        return out
+
+    def prune_cache(self):
+        """Drop entries past their interval's TTL."""
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (ts, _) in self._cache.items()
+                        if now - ts >= self.ttl.get(k[1], DEFAULT_TTL[Interval.INTERVAL_1_DAY])]:
+                del self._cache[key]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {**self.stats, 'cache_size': len(self._cache),
+                    'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else 0.0}
@@ -0,0 +1,123 @@
+"""
+TradeSage Training Data
+One contiguous float32 feature buffer (optionally memory-mapped to disk) shared by
+every stage of training, instead of pd.concat -> astype -> sanitize -> per-fold
+.iloc copies of the same rows.
+
+Rows are stored date-sorted, so train/val/test splits and time-series CV folds are
+contiguous row ranges: slice() returns views over the same buffer, and frame() wraps
+them as pandas views that XGBoost builds its QuantileDMatrix from without another copy.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class TrainingData:
+    """Date-sorted float32 feature matrix + labels, sanitized once, sliceable without copies."""
+
+    def __init__(self, X: np.ndarray, y: np.ndarray, feature_names, dates=None):
+        self.X = X
+        self.y = y
+        self.feature_names = list(feature_names)
+        self.dates = dates
+
+    @classmethod
+    def from_frames(cls, frames, feature_columns, target_col='target', memmap_path=None, consume=False):
+        """
+        Build from per-symbol frames (features + target, date-indexed) without concatenating.
+
+        feature_columns: callable(columns) -> model columns (e.g. FeatureEngineer.feature_columns)
+        memmap_path: back the buffer by a .npy file instead of RAM
+        consume: release each input frame (set its list slot to None) once copied
+
+        Row selection matches pd.concat(frames) + dropna(): a row is kept only if every
+        column of the union is present and non-NaN for it.
+        """
+        columns = list(dict.fromkeys(c for df in frames for c in df.columns))
+        feature_names = feature_columns(columns)
+
+        # Pass 1: which rows survive, and where each lands in date order
+        keep_masks, dates = [], []
+        for df in frames:
+            if any(c not in df.columns for c in columns):
+                keep = np.zeros(len(df), dtype=bool)
+            else:
+                keep = df[columns].notna().all(axis=1).to_numpy()
+            keep_masks.append(keep)
+            dates.append(df.index.to_numpy(dtype='datetime64[ns]')[keep])
+        all_dates = np.concatenate(dates) if dates else np.array([], dtype='datetime64[ns]')
+        order = np.argsort(all_dates, kind='stable')
+        position = np.empty_like(order)
+        position[order] = np.arange(len(order))
+
+        n, n_features = len(all_dates), len(feature_names)
+        if memmap_path:
+            X = np.lib.format.open_memmap(str(memmap_path), mode='w+', dtype=np.float32, shape=(n, n_features))
+        else:
+            X = np.empty((n, n_features), dtype=np.float32)
+        y = np.empty(n, dtype=np.float32)
+
+        # Pass 2: scatter each frame's rows straight into their sorted slots
+        start = 0
+        for i, (df, keep) in enumerate(zip(frames, keep_masks)):
+            rows = int(keep.sum())
+            if rows:
+                slots = position[start:start + rows]
+                X[slots] = df[feature_names].to_numpy(dtype=np.float32)[keep]
+                y[slots] = df[target_col].to_numpy(dtype=np.float32)[keep]
+                start += rows
+            if consume:
+                frames[i] = None
+
+        data = cls(X, y, feature_names, dates=all_dates[order])
+        data.sanitize()
+        logger.info(f"Training buffer: {n:,} rows x {n_features} features "
+                    f"({X.nbytes / 1e9:.2f} GB float32{', memory-mapped' if memmap_path else ''})")
+        return data
+
+    @classmethod
+    def from_frame(cls, X: pd.DataFrame, y):
+        """Wrap an existing feature DataFrame (one float32 copy, then sanitized in place)."""
+        data = cls(np.ascontiguousarray(X.to_numpy(dtype=np.float32)),
+                   np.asarray(y, dtype=np.float32), X.columns,
+                   dates=X.index.to_numpy() if isinstance(X.index, pd.DatetimeIndex) else None)
+        data.sanitize()
+        return data
+
+    def sanitize(self, chunk_rows=250_000):
+        """inf / NaN -> 0, in place and chunked (no full-size temporaries)."""
+        for start in range(0, len(self.X), chunk_rows):
+            block = self.X[start:start + chunk_rows]
+            block[~np.isfinite(block)] = 0.0
+        return self
+
+    def __len__(self):
+        return len(self.y)
+
+    @property
+    def shape(self):
+        return self.X.shape
+
+    def slice(self, start, stop):
+        """Rows [start, stop) as a view over the same buffer."""
+        return TrainingData(self.X[start:stop], self.y[start:stop], self.feature_names,
+                            dates=self.dates[start:stop] if self.dates is not None else None)
+
+    def split_dates(self, *boundaries):
+        """Views split at each boundary date (rows before / on-or-after), e.g. val_start, test_start."""
+        if self.dates is None:
+            raise ValueError("TrainingData has no dates to split on")
+        cuts = [0] + [int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(b)), 'left'))
+                      for b in boundaries] + [len(self)]
+        return [self.slice(a, b) for a, b in zip(cuts[:-1], cuts[1:])]
+
+    def frame(self):
+        """Pandas views (X DataFrame, y Series) for APIs that need them — no copy."""
+        index = pd.DatetimeIndex(self.dates) if self.dates is not None else None
+        X = pd.DataFrame(self.X, columns=self.feature_names, index=index, copy=False)
+        return X, pd.Series(self.y, index=index, copy=False)
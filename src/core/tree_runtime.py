@@ -0,0 +1,428 @@
+"""
+TradeSage Tree Runtime
+Self-contained, pure-NumPy artifact for scoring a trained ensemble without xgboost,
+lightgbm, catboost or sklearn installed — for a lightweight scanner container.
+
+export_trees() flattens every booster into node arrays (feature, threshold, children,
+default direction, leaf value) and stores them with the meta-learner coefficients, the
+isotonic thresholds and the feature names in one uncompressed .npz next to the pickle:
+
+    models/current.pkl         full trainer state (training, evaluation)
+    models/current.trees.npz   inference-only artifact (this module)
+
+Every array's data is 64-byte aligned inside the file, so TreeModel memory-maps the
+artifact read-only instead of copying it: API workers, the scanner and scripts scoring the
+same model share one set of physical pages. Publishing replaces the file (os.replace), so
+a mapped artifact is never modified underneath a reader — it keeps the old inode until
+it reloads.
+
+TreeModel evaluates all trees level by level, vectorized over
+rows x trees. Split semantics follow each library: XGBoost goes left on x < threshold,
+LightGBM on x <= threshold (with its zero-as-missing rule), CatBoost trees are oblivious.
+Inputs are sanitized like the trainer (inf / NaN -> 0), so results match predict().
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT = 'tradesage-trees'
+FORMAT_VERSION = 1
+LGBM_ZERO_THRESHOLD = 1e-35  # LightGBM kZeroThreshold: |x| below it counts as zero / missing
+ARRAY_ALIGN = 64             # npy headers pad to 64 bytes; members start aligned too
+PAD_EXTRA_ID = 0xD935        # zip extra-field id used for alignment padding (as zipalign)
+
+
+def tree_artifact_path(model_path):
+    """models/x.pkl -> models/x.trees.npz"""
+    return Path(model_path).with_suffix('.trees.npz')
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+# ══════════════════════════════════════════════════════════════
+#  ARTIFACT I/O (np.load-compatible .npz, mappable in place)
+# ══════════════════════════════════════════════════════════════
+
+def _write_npz(path, arrays):
+    """Like np.savez, but each member's data starts on an ARRAY_ALIGN boundary in the file."""
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as zf:
+        for name, array in arrays.items():
+            info = zipfile.ZipInfo(f'{name}.npy', date_time=(1980, 1, 1, 0, 0, 0))
+            # local header = 30 bytes + file name + extra; pad the extra field to align the data
+            data_start = zf.fp.tell() + 30 + len(info.filename.encode()) + 4
+            pad = -data_start % ARRAY_ALIGN
+            info.extra = struct.pack('<HH', PAD_EXTRA_ID, pad) + bytes(pad)
+            with zf.open(info, 'w') as f:
+                np.lib.format.write_array(f, np.asarray(array), allow_pickle=False)
+
+
+def _read_npz(path, use_mmap=True):
+    """{name: array}; stored members are zero-copy read-only views of one shared mapping."""
+    if not use_mmap:
+        with np.load(path, allow_pickle=False) as data:
+            return {k: data[k] for k in data.files}
+
+    arrays = {}
+    with open(path, 'rb') as f, zipfile.ZipFile(f) as zf:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        for info in zf.infolist():
+            name = info.filename[:-len('.npy')]
+            if info.compress_type != zipfile.ZIP_STORED:
+                arrays[name] = np.lib.format.read_array(zf.open(info), allow_pickle=False)
+                continue
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = struct.unpack('<HH', f.read(4))
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            count = int(np.prod(shape))
+            flat = np.frombuffer(mapped, dtype=dtype, count=count, offset=f.tell()) if count else np.empty(0, dtype)
+            arrays[name] = flat.reshape(shape, order='F' if fortran else 'C')
+    return arrays
+
+
+# ══════════════════════════════════════════════════════════════
+#  FOREST EVALUATORS
+# ══════════════════════════════════════════════════════════════
+
+class _Forest:
+    """Binary trees flattened into node arrays; leaves point at themselves."""
+
+    def __init__(self, arrays, inclusive, base_margin):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.default_left = arrays['default_left']
+        self.missing_zero = arrays['missing_zero']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.depth = int(arrays['depth'])
+        self.inclusive = inclusive        # LightGBM: x <= t; XGBoost: x < t
+        self.base_margin = base_margin
+        self._has_missing_zero = bool(self.missing_zero.any())
+
+    def margin(self, X):
+        node = np.repeat(self.roots[None, :], len(X), axis=0)
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.depth):
+            x = X[rows, self.feature[node]]
+            go_left = x <= self.threshold[node] if self.inclusive else x < self.threshold[node]
+            if self._has_missing_zero:
+                missing = self.missing_zero[node] & (np.abs(x) <= LGBM_ZERO_THRESHOLD)
+                go_left = np.where(missing, self.default_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node].sum(axis=1) + self.base_margin
+
+
+class _ObliviousForest:
+    """CatBoost symmetric trees: one (feature, border) per level, leaf index from the bits."""
+
+    def __init__(self, arrays, scale, bias):
+        self.split_feature = arrays['split_feature']   # (trees, depth)
+        self.border = arrays['border']                 # (trees, depth); padding = +inf
+        self.leaf_values = arrays['leaf_values']       # (trees, 2 ** depth)
+        self.scale = scale
+        self.bias = bias
+
+    def margin(self, X):
+        bits = X[:, self.split_feature] > self.border[None, :, :]
+        index = (bits * (1 << np.arange(self.border.shape[1]))).sum(axis=2)
+        trees = np.arange(len(self.leaf_values))[None, :]
+        return self.leaf_values[trees, index].sum(axis=1) * self.scale + self.bias
+
+
+# ══════════════════════════════════════════════════════════════
+#  EXPORT (reads the libraries' own model dumps — no imports needed)
+# ══════════════════════════════════════════════════════════════
+
+def _pack_nodes(trees):
+    """[(feature, threshold, left, right, default_left, missing_zero, value) per tree] -> flat arrays."""
+    cols = [[] for _ in range(7)]
+    roots, depth, offset = [], 0, 0
+    for tree in trees:
+        feature, threshold, left, right, default_left, missing_zero, value = tree
+        n = len(feature)
+        is_leaf = np.asarray(left) < 0
+        idx = np.arange(n)
+        roots.append(offset)
+        cols[0].append(np.where(is_leaf, 0, feature))
+        cols[1].append(threshold)
+        cols[2].append(np.where(is_leaf, idx, left) + offset)
+        cols[3].append(np.where(is_leaf, idx, right) + offset)
+        cols[4].append(default_left)
+        cols[5].append(missing_zero)
+        cols[6].append(np.where(is_leaf, value, 0.0))
+        depth = max(depth, _tree_depth(left, right))
+        offset += n
+    return {
+        'feature': np.concatenate(cols[0]).astype(np.int32),
+        'threshold': np.concatenate(cols[1]).astype(np.float64),
+        'left': np.concatenate(cols[2]).astype(np.int32),
+        'right': np.concatenate(cols[3]).astype(np.int32),
+        'default_left': np.concatenate(cols[4]).astype(bool),
+        'missing_zero': np.concatenate(cols[5]).astype(bool),
+        'value': np.concatenate(cols[6]).astype(np.float64),
+        'roots': np.asarray(roots, dtype=np.int32),
+        'depth': np.asarray(depth),
+    }
+
+
+def _tree_depth(left, right):
+    depth, level = 0, [0]
+    while level:
+        level = [c for n in level for c in (left[n], right[n]) if c >= 0]
+        depth += bool(level)
+    return depth
+
+
+def _export_xgboost(booster):
+    model = json.loads(bytes(booster.save_raw('json')))['learner']
+    if model['objective']['name'] != 'binary:logistic' or model['gradient_booster']['name'] != 'gbtree':
+        raise ValueError("Only binary:logistic gbtree XGBoost models can be exported")
+    trees = []
+    for t in model['gradient_booster']['model']['trees']:
+        if any(t['split_type']):
+            raise ValueError("Categorical XGBoost splits are not supported")
+        left = np.asarray(t['left_children'])
+        trees.append((t['split_indices'],
+                      # float32 thresholds; float32 inputs compare identically in float64
+                      np.asarray(t['split_conditions'], dtype=np.float32),
+                      left, t['right_children'], t['default_left'],
+                      np.zeros(len(left), dtype=bool), t['split_conditions']))
+    base_score = float(str(model['learner_model_param']['base_score']).strip('[]'))
+    return _pack_nodes(trees), float(np.log(base_score / (1 - base_score)))
+
+
+def _export_lightgbm(booster):
+    model = booster.dump_model()
+    if not str(model['objective']).startswith('binary') or model['num_tree_per_iteration'] != 1:
+        raise ValueError("Only binary LightGBM models can be exported")
+    if model.get('average_output'):
+        raise ValueError("Averaged (random forest) LightGBM models are not supported")
+    sigmoid = float(str(model['objective']).split('sigmoid:')[-1]) if 'sigmoid:' in str(model['objective']) else 1.0
+
+    trees = []
+    for info in model['tree_info']:
+        nodes = []
+
+        def walk(node):
+            i = len(nodes)
+            nodes.append(None)
+            if 'leaf_value' in node:
+                nodes[i] = (0, 0.0, -1, -1, False, False, node['leaf_value'] * sigmoid)
+                return i
+            if node['decision_type'] != '<=':
+                raise ValueError("Categorical LightGBM splits are not supported")
+            left = walk(node['left_child'])
+            right = walk(node['right_child'])
+            nodes[i] = (node['split_feature'], node['threshold'], left, right,
+                        node['default_left'], node['missing_type'] == 'Zero', 0.0)
+            return i
+
+        walk(info['tree_structure'])
+        trees.append(tuple(np.asarray(col) for col in zip(*nodes)))
+    return _pack_nodes(trees)
+
+
+def _export_catboost(model):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.json')
+        model.save_model(path, format='json')
+        with open(path) as f:
+            dump = json.load(f)
+    float_features = {ff['feature_index']: ff['flat_feature_index']
+                      for ff in dump['features_info'].get('float_features', [])}
+    trees = dump['oblivious_trees']
+    depth = max(len(t['splits']) for t in trees)
+    split_feature = np.zeros((len(trees), depth), dtype=np.int32)
+    border = np.full((len(trees), depth), np.inf)
+    leaf_values = np.zeros((len(trees), 2 ** depth))
+    for i, t in enumerate(trees):
+        for d, split in enumerate(t['splits']):
+            if split.get('split_type', 'FloatFeature') != 'FloatFeature':
+                raise ValueError("Only float CatBoost splits are supported")
+            split_feature[i, d] = float_features[split['float_feature_index']]
+            border[i, d] = split['border']
+        leaf_values[i, :len(t['leaf_values'])] = t['leaf_values']
+    scale, bias = dump.get('scale_and_bias', [1.0, [0.0]])
+    bias = bias[0] if isinstance(bias, list) else bias
+    return {'split_feature': split_feature, 'border': border, 'leaf_values': leaf_values}, float(scale), float(bias)
+
+
+def export_trees(trainer, path):
+    """Write the trainer's boosters, meta-learner and calibrator to one .npz artifact."""
+    arrays, members = {}, []
+
+    xgb_arrays, base_margin = _export_xgboost(trainer.model.get_booster())
+    arrays.update({f'xgb_{k}': v for k, v in xgb_arrays.items()})
+    members.append({'name': 'xgb', 'kind': 'forest', 'inclusive': False, 'base_margin': base_margin})
+
+    meta = getattr(trainer, 'meta_learner', None)
+    if trainer.ensemble_models and meta is not None:
+        for name, model in trainer.ensemble_models.items():
+            if name == 'lgbm':
+                booster = getattr(model, 'booster_', None) or getattr(model, 'booster')
+                arrays.update({f'lgbm_{k}': v for k, v in _export_lightgbm(booster).items()})
+                members.append({'name': 'lgbm', 'kind': 'forest', 'inclusive': True, 'base_margin': 0.0})
+            elif name == 'catboost':
+                cb_arrays, scale, bias = _export_catboost(model)
+                arrays.update({f'catboost_{k}': v for k, v in cb_arrays.items()})
+                members.append({'name': 'catboost', 'kind': 'oblivious', 'scale': scale, 'bias': bias})
+            else:
+                raise ValueError(f"Cannot export ensemble member '{name}'")
+        arrays['meta_coef'] = np.asarray(meta.coef_, dtype=np.float64).ravel()
+        arrays['meta_intercept'] = np.asarray(meta.intercept_, dtype=np.float64).ravel()[:1]
+
+    if trainer.calibrator is not None:
+        arrays['iso_x'] = np.asarray(trainer.calibrator.X_thresholds_, dtype=np.float64)
+        arrays['iso_y'] = np.asarray(trainer.calibrator.y_thresholds_, dtype=np.float64)
+
+    header = {'format': FORMAT, 'version': FORMAT_VERSION, 'members': members,
+              'feature_names': list(trainer.feature_names)}
+    arrays['header'] = np.asarray(json.dumps(header))
+
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp.npz')
+    _write_npz(tmp_path, arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+# ══════════════════════════════════════════════════════════════
+#  RUNTIME
+# ══════════════════════════════════════════════════════════════
+
+class TreeModel:
+    """
+    Scores rows from a .trees.npz artifact with NumPy only. Drop-in for the scanner's
+    use of TradingModelTrainer: load_model(path) and predict(X) -> (preds, probs).
+    """
+
+    CHUNK_ROWS = 4096  # bounds the rows x trees node-index matrix
+
+    def __init__(self, path=None):
+        self.feature_names = None
+        self.forests = []
+        self.meta_coef = self.meta_intercept = None
+        self.iso_x = self.iso_y = None
+        if path is not None:
+            self.load_model(path)
+
+    def load_model(self, path, use_mmap=True):
+        """Load an artifact (memory-mapped unless use_mmap=False); a .pkl path loads its sibling .trees.npz."""
+        path = Path(path)
+        if path.suffix == '.pkl':
+            path = tree_artifact_path(path)
+        arrays = _read_npz(path, use_mmap)
+        header = json.loads(str(arrays.pop('header')))
+        if header.get('format') != FORMAT or header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported tree artifact: {path}")
+
+        self.feature_names = header['feature_names']
+        self._feature_index = {name: i for i, name in enumerate(self.feature_names)}
+        self._layouts = {}  # {tuple(columns): (source positions, feature positions)}
+        self.forests = []
+        for m in header['members']:
+            sub = {k[len(m['name']) + 1:]: v for k, v in arrays.items() if k.startswith(m['name'] + '_')}
+            if m['kind'] == 'forest':
+                self.forests.append(_Forest(sub, m['inclusive'], m['base_margin']))
+            else:
+                self.forests.append(_ObliviousForest(sub, m['scale'], m['bias']))
+        self.meta_coef = arrays.get('meta_coef')
+        self.meta_intercept = float(arrays['meta_intercept'][0]) if 'meta_intercept' in arrays else None
+        self.iso_x, self.iso_y = arrays.get('iso_x'), arrays.get('iso_y')
+        logger.info(f"Tree artifact loaded: {path} ({len(self.forests)} forests, {len(self.feature_names)} features)")
+        return self
+
+    def matrix(self, df):
+        """DataFrame -> float32 matrix in feature order (missing features = 0)."""
+        key = tuple(df.columns)
+        layout = self._layouts.get(key)
+        if layout is None:
+            pairs = [(src, self._feature_index[c]) for src, c in enumerate(key) if c in self._feature_index]
+            layout = self._layouts[key] = (np.array([p[0] for p in pairs], dtype=np.intp),
+                                           np.array([p[1] for p in pairs], dtype=np.intp))
+        src, dst = layout
+        X = np.zeros((len(df), len(self.feature_names)), dtype=np.float32)
+        # Only the model's columns are converted: extra ones (e.g. 'symbol') may be non-numeric
+        X[:, dst] = df.iloc[:, src].to_numpy(dtype=np.float32)
+        return X
+
+    def records_matrix(self, records):
+        """[{feature: value}, ...] -> float32 matrix in feature order (missing / unknown = 0)."""
+        X = np.zeros((len(records), len(self.feature_names)), dtype=np.float32)
+        for i, record in enumerate(records):
+            for name, value in record.items():
+                j = self._feature_index.get(name)
+                if j is not None and value is not None:
+                    X[i, j] = value
+        return X
+
+    def predict_proba(self, X):
+        """Calibrated P(class 1) for a matrix in feature order."""
+        # Through float32 first, like the trainer's buffers and the boosters' input
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        X[~np.isfinite(X)] = 0.0
+
+        out = np.empty(len(X))
+        for start in range(0, len(X), self.CHUNK_ROWS):
+            block = X[start:start + self.CHUNK_ROWS]
+            probs = [_sigmoid(f.margin(block)) for f in self.forests]
+            if self.meta_coef is not None:
+                raw = _sigmoid(np.column_stack(probs) @ self.meta_coef + self.meta_intercept)
+            else:
+                raw = probs[0]
+            out[start:start + len(block)] = raw
+        if self.iso_x is not None:
+            return np.interp(out, self.iso_x, self.iso_y)
+        return out
+
+    def predict(self, X):
+        probs = self.predict_proba(self.matrix(X) if hasattr(X, 'columns') else X)
+        return (probs >= 0.5).astype(int), probs
+
+
+def verify_export(trainer, model: TreeModel, n_rows=512, seed=0):
+    """
+    Max |TreeModel - trainer.predict| over rows built from the exported split thresholds
+    (exact thresholds and their float32 neighbours), so every comparison edge is exercised.
+    """
+    rng = np.random.default_rng(seed)
+    n_features = len(model.feature_names)
+    candidates = [[0.0] for _ in range(n_features)]
+    for forest in model.forests:
+        if isinstance(forest, _Forest):
+            split = forest.left != np.arange(len(forest.left))
+            for f, t in zip(forest.feature[split], forest.threshold[split]):
+                candidates[f].append(t)
+        else:
+            for f, t in zip(forest.split_feature.ravel(), forest.border.ravel()):
+                if np.isfinite(t):
+                    candidates[f].append(t)
+    X = np.empty((n_rows, n_features), dtype=np.float32)
+    for j, values in enumerate(candidates):
+        picks = np.asarray(values, dtype=np.float32)[rng.integers(0, len(values), n_rows)]
+        nudge = rng.integers(-1, 2, n_rows)
+        X[:, j] = np.where(nudge < 0, np.nextafter(picks, np.float32(-np.inf)),
+                           np.where(nudge > 0, np.nextafter(picks, np.float32(np.inf)), picks))
+    import pandas as pd
+    _, expected = trainer.predict(pd.DataFrame(X, columns=model.feature_names))
+    return float(np.abs(model.predict_proba(X) - expected).max())
@@ -0,0 +1,275 @@
+"""
+TradeSage Walk-Forward Harness
+Honest out-of-sample numbers: retrain on rolling date windows and only ever score
+each model on the dates right after its training window.
+
+    1. Features + labels for the whole universe are built once and cached on disk as
+       date-sorted arrays (data/walk_forward/features_<key>.joblib).
+    2. Windows slice that table by date: train on `train_days`, skip `forward_days`
+       (purges label overlap), predict the next `test_days`, step forward.
+    3. Windows run in worker processes that memory-map the table, so each only
+       materializes its own slice; the worker count is capped by a memory budget.
+       Within a worker, consecutive windows warm-start from the previous booster
+       (early-stopped and calibrated only on dates it has not seen); a
+       full refit every `refit_every` windows (or once the booster would exceed
+       `max_trees`) keeps models from growing without bound.
+    4. The out-of-sample predictions are stitched and replayed through the
+       portfolio backtester for one continuous equity curve.
+"""
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+
+from src.core.model_training import TradingModelTrainer
+from src.core.portfolio_backtest import PortfolioBacktester, build_panel
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "data" / "walk_forward"
+
+SIM_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'atr']
+
+
+# ══════════════════════════════════════════════════════════════
+#  FEATURE TABLE — built once, memory-mapped by every window
+# ══════════════════════════════════════════════════════════════
+
+def _data_signature(stock_data, extra):
+    """Cheap fingerprint of the input universe: symbol, length, date range, last close."""
+    h = hashlib.sha1()
+    for symbol in sorted(stock_data):
+        df = stock_data[symbol]
+        if len(df):
+            h.update(f"{symbol}:{len(df)}:{df.index[0]}:{df.index[-1]}:{df['close'].iloc[-1]};".encode())
+    h.update(str(extra).encode())
+    return h.hexdigest()[:16]
+
+
+def build_feature_table(engineer, stock_data, index_df=None, forward_days=5, gain_threshold=0.04,
+                        max_drawdown=-0.03, cache_dir=None, rebuild=False):
+    """
+    Engineer features and labels for every symbol and save them as date-sorted
+    arrays. Returns the cache path; load with load_feature_table().
+    """
+    cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    key = _data_signature(stock_data, (forward_days, gain_threshold, max_drawdown, index_df is not None))
+    path = cache_dir / f"features_{key}.joblib"
+    if path.exists() and not rebuild:
+        logger.info(f"Using cached walk-forward feature table {path.name}")
+        return path
+
+    frames = []
+    for symbol, df in stock_data.items():
+        try:
+            df_feat = engineer.add_technical_indicators(df, index_df=index_df)
+            df_final = engineer.create_target_variable(df_feat, forward_days=forward_days,
+                                                       gain_threshold=gain_threshold,
+                                                       max_drawdown=max_drawdown)
+            df_final['symbol'] = symbol
+            frames.append(df_final.dropna())
+        except Exception as e:
+            logger.debug(f"Feature engineering failed for {symbol}: {e}")
+    if not frames:
+        raise ValueError("No symbols produced features")
+
+    combined = pd.concat(frames).sort_index(kind='stable')
+    X, y, feature_names = engineer.prepare_training_data(combined)  # no rows dropped: already dropna'd
+    symbols = sorted(combined['symbol'].unique())
+    table = {
+        'X': np.ascontiguousarray(X.to_numpy(dtype=np.float32)),
+        'y': y.to_numpy(dtype=np.float32),
+        'dates': combined.index.to_numpy(dtype='datetime64[ns]'),
+        'symbol_codes': pd.Categorical(combined['symbol'], categories=symbols).codes.astype(np.int32),
+        'sim': combined.reindex(columns=SIM_COLUMNS).to_numpy(dtype=np.float64),
+        'symbols': symbols,
+        'feature_names': list(feature_names),
+        'forward_days': forward_days,
+    }
+    tmp_path = path.with_suffix(".tmp")
+    joblib.dump(table, tmp_path)  # uncompressed so workers can mmap it
+    os.replace(tmp_path, path)
+    logger.info(f"Cached walk-forward feature table: {len(X):,} rows x {X.shape[1]} features "
+                f"({table['X'].nbytes / 1e9:.2f} GB) -> {path.name}")
+    return path
+
+
+def load_feature_table(path, mmap=True):
+    return joblib.load(path, mmap_mode='r' if mmap else None)
+
+
+# ══════════════════════════════════════════════════════════════
+#  WINDOWS
+# ══════════════════════════════════════════════════════════════
+
+def make_windows(dates, train_days=504, test_days=63, gap=5, expanding=False):
+    """
+    Row ranges for each window over a date-sorted `dates` array, as dicts with
+    train/test row bounds and dates. Windows are measured in trading days.
+    """
+    unique_dates = np.unique(dates)
+    windows = []
+    test_pos = train_days + gap
+    while test_pos < len(unique_dates):
+        train_from = 0 if expanding else test_pos - gap - train_days
+        test_to = min(test_pos + test_days, len(unique_dates))
+        d_train_start, d_train_end = unique_dates[train_from], unique_dates[test_pos - gap]
+        d_test_start = unique_dates[test_pos]
+        d_test_end = unique_dates[test_to] if test_to < len(unique_dates) else None
+        windows.append({
+            'window': len(windows),
+            'train_rows': (int(np.searchsorted(dates, d_train_start, 'left')),
+                           int(np.searchsorted(dates, d_train_end, 'left'))),
+            'test_rows': (int(np.searchsorted(dates, d_test_start, 'left')),
+                          int(np.searchsorted(dates, d_test_end, 'left')) if d_test_end is not None else len(dates)),
+            'train_start': pd.Timestamp(d_train_start),
+            'test_start': pd.Timestamp(d_test_start),
+        })
+        test_pos += test_days
+    return windows
+
+
+def _run_windows(task):
+    """Worker: train/predict a contiguous run of windows, warm-starting within the run."""
+    table_path, windows, params, warm_start, warm_rounds, n_jobs, refit_every, max_trees = task
+    table = load_feature_table(table_path)
+    feature_names = table['feature_names']
+    dates = table['dates']
+    results, prev_model, prev_train_end, since_refit = [], None, None, 0
+
+    for w in windows:
+        (a, b), (c, d) = w['train_rows'], w['test_rows']
+        X_te = pd.DataFrame(np.asarray(table['X'][c:d]), columns=feature_names)
+        y_te = np.asarray(table['y'][c:d])
+
+        trainer = TradingModelTrainer()
+        trainer.n_jobs = n_jobs
+        window_params = dict(params)
+        init_model, v = None, b
+        if (warm_start and prev_model is not None and since_refit < refit_every - 1
+                and prev_model.get_booster().num_boosted_rounds() + warm_rounds <= max_trees):
+            # The previous booster already learned rows up to prev_train_end, so early
+            # stopping and calibration use only the later half of the dates after it
+            new_dates = np.unique(np.asarray(dates[prev_train_end:b]))
+            if len(new_dates) >= 2:
+                init_model = prev_model.get_booster()
+                window_params['n_estimators'] = warm_rounds
+                v = int(np.searchsorted(dates, new_dates[len(new_dates) // 2], 'left'))
+
+        X_tr = pd.DataFrame(np.asarray(table['X'][a:v]), columns=feature_names)
+        y_tr = pd.Series(np.asarray(table['y'][a:v]))
+        X_val = pd.DataFrame(np.asarray(table['X'][v:b]), columns=feature_names) if v < b else None
+        y_val = pd.Series(np.asarray(table['y'][v:b])) if v < b else None
+        trainer.train_model(X_tr, y_tr, X_val, y_val, use_ensemble=False, params=window_params,
+                            init_model=init_model)
+        prev_model, prev_train_end = trainer.model, b
+        since_refit = since_refit + 1 if init_model is not None else 0
+
+        _, probs = trainer.predict(X_te)
+        try:
+            auc = float(roc_auc_score(y_te, probs))
+        except ValueError:
+            auc = float('nan')  # single-class test window
+        results.append({**w, 'train_size': b - a, 'test_size': d - c, 'auc': round(auc, 4),
+                        'test_positive_rate': round(float(y_te.mean()), 4) if d > c else float('nan'),
+                        'warm_start': init_model is not None,
+                        'trees': int(trainer.model.get_booster().num_boosted_rounds()),
+                        'probabilities': np.asarray(probs, dtype=np.float32)})
+    return results
+
+
+# ══════════════════════════════════════════════════════════════
+#  HARNESS
+# ══════════════════════════════════════════════════════════════
+
+class WalkForward:
+    """Rolling-window retrain + out-of-sample prediction over a cached feature table."""
+
+    def __init__(self, table_path, train_days=504, test_days=63, expanding=False, params=None,
+                 warm_start=True, warm_rounds=100, refit_every=4, max_trees=None, workers=None,
+                 memory_budget_gb=2.0):
+        self.table_path = Path(table_path)
+        self.train_days = train_days
+        self.test_days = test_days
+        self.expanding = expanding
+        # Optuna per window is prohibitively slow; default to the trainer's fallback params
+        self.params = dict(params or TradingModelTrainer()._default_params())
+        self.warm_start = warm_start
+        self.warm_rounds = warm_rounds
+        # Warm starts only add trees: refit from scratch every `refit_every` windows, or
+        # sooner once a booster would pass `max_trees` (default 2x the tuned n_estimators)
+        self.refit_every = max(1, refit_every)
+        self.max_trees = max_trees or 2 * int(self.params.get('n_estimators', 500))
+        self.workers = workers or os.cpu_count() or 1
+        self.memory_budget_gb = memory_budget_gb
+        self.windows = pd.DataFrame()
+
+    def _worker_count(self, table, windows):
+        """Processes that fit in the memory budget: ~4x the largest train slice each."""
+        n_features = table['X'].shape[1]
+        largest = max(w['train_rows'][1] - w['train_rows'][0] for w in windows)
+        per_worker_gb = largest * n_features * 4 * 4 / 1e9
+        fit = max(1, int(self.memory_budget_gb // per_worker_gb)) if per_worker_gb > 0 else self.workers
+        return max(1, min(self.workers, fit, len(windows)))
+
+    def run(self, backtest_params=None, verbose=True) -> dict:
+        """
+        Train every window, stitch out-of-sample predictions and backtest them.
+        Returns {'windows', 'predictions', 'frames', 'metrics', 'equity', 'trades'}.
+        """
+        table = load_feature_table(self.table_path)
+        windows = make_windows(table['dates'], self.train_days, self.test_days,
+                               gap=table['forward_days'], expanding=self.expanding)
+        if not windows:
+            raise ValueError(f"Not enough history for a {self.train_days}+{self.test_days} day window")
+
+        workers = self._worker_count(table, windows)
+        n_jobs = max(1, (os.cpu_count() or 1) // workers)
+        logger.info(f"Walk-forward: {len(windows)} windows "
+                    f"({self.train_days}d train / {self.test_days}d test) on {workers} workers x {n_jobs} threads")
+
+        chunks = [list(c) for c in np.array_split(np.array(windows, dtype=object), workers) if len(c)]
+        tasks = [(str(self.table_path), chunk, self.params, self.warm_start, self.warm_rounds, n_jobs,
+                  self.refit_every, self.max_trees)
+                 for chunk in chunks]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = [r for chunk in pool.map(_run_windows, tasks) for r in chunk]
+        else:
+            results = [r for task in tasks for r in _run_windows(task)]
+
+        # ---- Stitch out-of-sample predictions ---- #
+        rows = np.concatenate([np.arange(*r['test_rows']) for r in results])
+        probs = np.concatenate([r['probabilities'] for r in results])
+        symbols = np.asarray(table['symbols'], dtype=object)[np.asarray(table['symbol_codes'])[rows]]
+        predictions = pd.DataFrame(np.asarray(table['sim'])[rows], columns=SIM_COLUMNS,
+                                   index=pd.DatetimeIndex(np.asarray(table['dates'])[rows], name='date'))
+        predictions['symbol'] = symbols
+        predictions['probability'] = probs
+        predictions['prediction'] = (probs >= 0.5).astype(int)
+        predictions['target'] = np.asarray(table['y'])[rows]
+
+        frames = {s: g.drop(columns=['symbol', 'target']) for s, g in predictions.groupby('symbol', sort=False)}
+        self.windows = pd.DataFrame([{k: v for k, v in r.items() if k not in ('probabilities', 'train_rows', 'test_rows')}
+                                     for r in results])
+
+        sim = PortfolioBacktester(**(backtest_params or {}), verbose=verbose)
+        metrics = sim.run(build_panel(frames))
+        valid = ~np.isnan(self.windows['auc'])
+        metrics['walk_forward'] = {
+            'windows': len(results),
+            'oos_rows': int(len(rows)),
+            'oos_start': str(predictions.index.min().date()),
+            'mean_auc': round(float(self.windows.loc[valid, 'auc'].mean()), 4) if valid.any() else float('nan'),
+        }
+        return {'windows': self.windows, 'predictions': predictions, 'frames': frames,
+                'metrics': metrics, 'equity': sim.equity, 'trades': sim.get_trades_df()}
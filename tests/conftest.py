@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# Tests import the app as `src.core...`, like the scripts and services do
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
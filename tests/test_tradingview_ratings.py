@@ -0,0 +1,134 @@
+"""
+TradingViewRatings against a local stub of TradingView's scanner endpoint
+(POST /<screener>/scan), so the tests never touch the network.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+tradingview_ta = pytest.importorskip("tradingview_ta")
+
+from tradingview_ta import Interval, TradingView  # noqa: E402
+
+from src.core import tradingview_ratings  # noqa: E402
+from src.core.tradingview_ratings import TradingViewRatings  # noqa: E402
+
+NO_DATA = "NODATA"  # ticker the stub has nothing for
+
+
+class _ScannerStub(BaseHTTPRequestHandler):
+    requests = []  # [(path, [tickers])] — reset per test
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        tickers = body["symbols"]["tickers"]
+        self.requests.append((self.path, tickers))
+
+        n_columns = len(body["columns"])
+        data = []
+        for ticker in tickers:
+            if ticker.endswith(NO_DATA):
+                continue
+            # Recommend.Other / .All / .MA first, then neutral-ish values for everything else
+            data.append({"s": ticker, "d": [0.6, 0.6, 0.6] + [1.0] * (n_columns - 3)})
+
+        payload = json.dumps({"totalCount": len(data), "data": data}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def scanner(monkeypatch):
+    server = HTTPServer(("127.0.0.1", 0), _ScannerStub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    _ScannerStub.requests = []
+    monkeypatch.setattr(TradingView, "scan_url", f"http://127.0.0.1:{server.server_port}/")
+    yield _ScannerStub.requests
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(t=1_000_000.0)
+    monkeypatch.setattr(tradingview_ratings, "time", SimpleNamespace(time=lambda: now.t))
+    return now
+
+
+def test_batches_symbols_into_chunked_requests(scanner):
+    tv = TradingViewRatings(chunk_size=2)
+    ratings = tv.get_ratings(["TCS", "INFY", "RELIANCE"])
+
+    assert [path for path, _ in scanner] == ["/india/scan", "/india/scan"]
+    assert [tickers for _, tickers in scanner] == [["NSE:TCS", "NSE:INFY"], ["NSE:RELIANCE"]]
+    assert set(ratings) == {"TCS", "INFY", "RELIANCE"}
+    for rating in ratings.values():
+        assert rating["recommendation"] == "STRONG_BUY"
+        assert rating["buy"] + rating["sell"] + rating["neutral"] > 0
+        assert -1.0 <= rating["score"] <= 1.0
+
+
+def test_missing_symbol_is_unknown_and_not_cached(scanner):
+    tv = TradingViewRatings()
+    ratings = tv.get_ratings(["TCS", NO_DATA])
+
+    assert ratings[NO_DATA]["recommendation"] == "UNKNOWN"
+    assert tv.get_stats()["cache_size"] == 1
+
+    tv.get_ratings([NO_DATA])
+    assert len(scanner) == 2  # retried, not served from cache
+
+
+def test_hits_and_misses_are_counted(scanner, clock):
+    tv = TradingViewRatings()
+    tv.get_ratings(["TCS", "INFY"])
+    tv.get_ratings(["TCS", "INFY", "WIPRO"])
+
+    stats = tv.get_stats()
+    assert stats["misses"] == 3
+    assert stats["hits"] == 2
+    assert stats["requests"] == 2
+    assert stats["hit_rate"] == 0.4
+    assert scanner[-1][1] == ["NSE:WIPRO"]  # only the miss is fetched
+
+
+def test_ttl_expiry_is_per_interval(scanner, clock):
+    tv = TradingViewRatings(ttl={Interval.INTERVAL_1_DAY: 900, Interval.INTERVAL_1_HOUR: 300})
+    tv.get_rating("TCS", Interval.INTERVAL_1_DAY)
+    tv.get_rating("TCS", Interval.INTERVAL_1_HOUR)
+    assert len(scanner) == 2
+
+    clock.t += 400  # past the hourly TTL, within the daily one
+    tv.get_rating("TCS", Interval.INTERVAL_1_DAY)
+    assert len(scanner) == 2
+    tv.get_rating("TCS", Interval.INTERVAL_1_HOUR)
+    assert len(scanner) == 3
+
+    clock.t += 600  # daily entry (fetched at t=0) has now expired too
+    tv.get_rating("TCS", Interval.INTERVAL_1_DAY)
+    assert len(scanner) == 4
+
+    tv.prune_cache()  # the hourly entry (refetched at t=400) is 600s old -> dropped
+    assert tv.get_stats()["cache_size"] == 1
+
+
+def test_uppercased_result_keys_map_back_to_requested_symbols(scanner):
+    tv = TradingViewRatings()
+    ratings = tv.get_ratings(["m&m", "Bajaj-Auto"])
+
+    assert scanner[0][1] == ["NSE:M&M", "NSE:BAJAJ-AUTO"]  # the library uppercases tickers
+    assert ratings["m&m"]["recommendation"] == "STRONG_BUY"
+    assert ratings["Bajaj-Auto"]["recommendation"] == "STRONG_BUY"
+    assert tv.get_rating("m&m")["recommendation"] == "STRONG_BUY"
+    assert len(scanner) == 1  # the second lookup is a cache hit under the requested name
@@ -0,0 +1,126 @@
+"""
+Parity of the pure-NumPy tree runtime (TreeModel over an exported, memory-mapped
+.trees.npz) with the reference sklearn path, TradingModelTrainer.predict_proba_calibrated.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("xgboost")
+pytest.importorskip("sklearn")
+
+from src.core.model_training import TradingModelTrainer  # noqa: E402
+from src.core.tree_runtime import TreeModel, export_trees  # noqa: E402
+
+FEATURES = [f"f{i}" for i in range(6)]
+PARAMS = {"n_estimators": 25, "max_depth": 3, "learning_rate": 0.1}
+TOLERANCE = 1e-4
+
+
+def _frame(n, seed):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, len(FEATURES))).astype(np.float32), columns=FEATURES,
+                     index=pd.date_range("2015-01-01", periods=n, freq="D"))
+    X["f5"] = rng.integers(0, 4, n).astype(np.float32)  # few distinct values: splits sit on them
+    y = pd.Series(((X["f0"] + 0.5 * X["f1"] * X["f5"] + rng.normal(0, 0.7, n)) > 0).astype(int),
+                  index=X.index)
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def data():
+    X, y = _frame(1500, seed=0)
+    return X.iloc[:1200], y.iloc[:1200], X.iloc[1200:], y.iloc[1200:]
+
+
+def _train(data, use_ensemble):
+    X_train, y_train, X_val, y_val = data
+    trainer = TradingModelTrainer()
+    trainer.train_model(X_train, y_train, X_val, y_val, use_ensemble=use_ensemble, params=dict(PARAMS))
+    return trainer
+
+
+def _thresholds(trainer):
+    """{feature: split values} read from each library's own model dump, not from the export."""
+    found = {name: [] for name in FEATURES}
+    dump = trainer.model.get_booster().trees_to_dataframe()
+    for feature, split in dump[dump["Feature"] != "Leaf"][["Feature", "Split"]].itertuples(index=False):
+        found[feature].append(split)
+    for name, model in (trainer.ensemble_models or {}).items():
+        if name == "lgbm":
+            dump = model.booster_.trees_to_dataframe()
+            for feature, split in dump[dump["split_feature"].notna()][["split_feature", "threshold"]].itertuples(index=False):
+                found[feature].append(split)
+        elif name == "catboost":
+            for index, borders in model.get_borders().items():
+                found[FEATURES[int(index)]].extend(borders)
+    return found
+
+
+def _probe_rows(trainer, n=600, seed=1):
+    """Random rows, rows exactly on (and one float32 step either side of) split thresholds, and NaNs."""
+    rng = np.random.default_rng(seed)
+    X, _ = _frame(n, seed)
+    X = X.to_numpy(dtype=np.float32)
+    for j, values in enumerate(_thresholds(trainer).values()):
+        if not values:
+            continue
+        picks = np.asarray(values, dtype=np.float32)[rng.integers(0, len(values), n)]
+        step = rng.integers(-1, 2, n)
+        on_edge = np.where(step < 0, np.nextafter(picks, np.float32(-np.inf)),
+                           np.where(step > 0, np.nextafter(picks, np.float32(np.inf)), picks))
+        replace = rng.random(n) < 0.6
+        X[replace, j] = on_edge[replace]
+    X[rng.random(X.shape) < 0.05] = np.nan
+    X[0] = np.nan
+    return X
+
+
+def _assert_parity(trainer, tmp_path):
+    artifact = export_trees(trainer, tmp_path / "model.trees.npz")
+    model = TreeModel().load_model(artifact, use_mmap=True)
+
+    X = _probe_rows(trainer)
+    expected = trainer.predict_proba_calibrated(pd.DataFrame(X, columns=FEATURES))
+    got = model.predict_proba(X)
+    assert np.abs(got - expected).max() < TOLERANCE
+
+    # Same rows through the DataFrame entry point, columns shuffled, plus a non-feature string column
+    frame = pd.DataFrame(X, columns=FEATURES)[FEATURES[::-1]]
+    frame.insert(2, "symbol", "ABC")
+    _, probs = model.predict(frame)
+    assert np.abs(probs - expected).max() < TOLERANCE
+    _, probs = trainer.predict(frame)  # CompiledPredictor takes the same frames
+    assert np.abs(probs - expected).max() < TOLERANCE
+    return model
+
+
+def test_xgboost_parity(data, tmp_path):
+    trainer = _train(data, use_ensemble=False)
+    model = _assert_parity(trainer, tmp_path)
+    assert len(model.forests) == 1
+
+
+def test_lightgbm_ensemble_parity(data, tmp_path):
+    pytest.importorskip("lightgbm")
+    trainer = _train(data, use_ensemble=True)
+    assert "lgbm" in trainer.ensemble_models
+    model = _assert_parity(trainer, tmp_path)
+    assert model.meta_coef is not None
+
+
+def test_catboost_ensemble_parity(data, tmp_path):
+    pytest.importorskip("catboost")
+    trainer = _train(data, use_ensemble=True)
+    assert "catboost" in trainer.ensemble_models
+    _assert_parity(trainer, tmp_path)
+
+
+def test_artifact_is_memory_mapped(data, tmp_path):
+    trainer = _train(data, use_ensemble=False)
+    artifact = export_trees(trainer, tmp_path / "model.trees.npz")
+    model = TreeModel().load_model(artifact, use_mmap=True)
+    threshold = model.forests[0].threshold
+    assert not threshold.flags.writeable
+    assert not threshold.flags.owndata